@@ -0,0 +1,494 @@
+"""
+Offline benchmarks of the S3Watcher pipeline
+
+Drives the real poll -> process_messages -> download_file_from_s3 pipeline of SQSQueueHandler against
+in-process S3 and SQS stand-ins from moto, and reports messages/sec, MB/sec, latency percentiles and
+peak RSS for each scenario. Every scenario runs in its own process so peak RSS is measured per scenario.
+
+Usage:
+    python benchmarks/benchmark.py
+    python benchmarks/benchmark.py --scenario small_files --scale 2 --concurrency 40
+"""
+
+import json
+import multiprocessing as mp
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from argparse import ArgumentParser
+from typing import Any, Callable, Dict, List
+
+# Credentials and region of the stand-ins, set before boto3 is imported
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_SESSION_TOKEN", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_REGION", os.environ["AWS_DEFAULT_REGION"])
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from s3watcher import log  # noqa: E402
+from s3watcher.SQSQueueHandler import SQSQueueHandler  # noqa: E402
+from s3watcher.SQSQueueHandlerConfig import SQSQueueHandlerConfig  # noqa: E402
+
+BUCKET_NAME = "s3watcher-benchmark"
+QUEUE_NAME = "s3watcher-benchmark"
+KB = 1024
+MB = 1024 * KB
+
+
+class Scenario:
+    """
+    Class to describe a benchmark workload: the objects in the bucket and how their events reach the queue
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        count: int,
+        size: int,
+        bursts: int = 1,
+        burst_interval: float = 0,
+        preload: bool = True,
+        backfill: bool = False,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.name = name
+        self.description = description
+        self.count = count
+        self.size = size
+        self.bursts = bursts
+        self.burst_interval = burst_interval
+        self.preload = preload
+        self.backfill = backfill
+
+    def scaled(self, scale: float) -> "Scenario":
+        """
+        Function to get a copy of the scenario with the number of objects scaled.
+        """
+        return Scenario(
+            self.name,
+            self.description,
+            count=max(self.bursts, int(self.count * scale)),
+            size=self.size,
+            bursts=self.bursts,
+            burst_interval=self.burst_interval,
+            preload=self.preload,
+            backfill=self.backfill,
+        )
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario(
+            "small_files",
+            "Queue drained of many small objects",
+            count=2000,
+            size=4 * KB,
+        ),
+        Scenario(
+            "large_files",
+            "Queue drained of a few objects large enough for multipart downloads",
+            count=4,
+            size=64 * MB,
+        ),
+        Scenario(
+            "bursty",
+            "Bursts of events sent while the pipeline is running",
+            count=1000,
+            size=16 * KB,
+            bursts=5,
+            burst_interval=2.0,
+            preload=False,
+        ),
+        Scenario(
+            "backfill",
+            "Reconciliation of a bucket with no queued events",
+            count=1000,
+            size=16 * KB,
+            backfill=True,
+        ),
+    ]
+}
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Function to get a percentile of the values by the nearest rank.
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    rank = max(0, min(len(values) - 1, int(round(percent / 100 * len(values))) - 1))
+    return values[rank]
+
+
+def s3_event_body(file_key: str, size: int, etag: str, sequencer: str) -> str:
+    """
+    Function to build the body of an S3 ObjectCreated notification.
+    """
+    return json.dumps(
+        {
+            "Records": [
+                {
+                    "eventVersion": "2.1",
+                    "eventSource": "aws:s3",
+                    "eventName": "ObjectCreated:Put",
+                    "s3": {
+                        "bucket": {"name": BUCKET_NAME},
+                        "object": {
+                            "key": file_key,
+                            "size": size,
+                            "eTag": etag,
+                            "sequencer": sequencer,
+                        },
+                    },
+                }
+            ]
+        }
+    )
+
+
+class BenchmarkHandler(SQSQueueHandler):
+    """
+    SQSQueueHandler recording when each task completes and how long it took
+    """
+
+    def __init__(
+        self, config: SQSQueueHandlerConfig, expected: int, on_done: Callable
+    ) -> None:
+        """
+        Class Constructor
+        """
+        super().__init__(config)
+        self.expected = expected
+        self.on_done = on_done
+        self.completed = 0
+        self.failed = 0
+        self.service_times = []
+        self.event_lags = []
+        self._results_lock = threading.Lock()
+
+        # Benchmarks measure the pipeline, not Timestream
+        self.timestream_client = None
+
+        # The pipeline runs in threads here, and only the main thread can handle the profiling signal
+        self.profiler.install = lambda *args: None
+
+    def process_task(self, task: Any) -> bool:
+        start_time = time.perf_counter()
+        success = super().process_task(task)
+        duration = time.perf_counter() - start_time
+
+        with self._results_lock:
+            self.service_times.append(duration)
+            if success is False:
+                self.failed += 1
+            self.completed += 1
+            if self.completed == self.expected:
+                self.on_done()
+        return success
+
+    def delete_event(self, sqs_event: Any, superseded: bool = False):
+        # Time from the event being sent to the queue until it is acknowledged
+        if sqs_event.sent_timestamp:
+            with self._results_lock:
+                self.event_lags.append(time.time() - sqs_event.sent_timestamp)
+        super().delete_event(sqs_event, superseded=superseded)
+
+
+def create_objects(s3: Any, scenario: Scenario) -> List[dict]:
+    """
+    Function to upload the objects of a scenario and return their keys, sizes and ETags.
+    """
+    body = os.urandom(scenario.size)
+    objects = []
+    for index in range(scenario.count):
+        file_key = f"benchmark/{index % 100:02d}/file-{index:06d}.bin"
+        response = s3.put_object(Bucket=BUCKET_NAME, Key=file_key, Body=body)
+        objects.append(
+            {
+                "key": file_key,
+                "size": scenario.size,
+                "etag": response["ETag"].strip('"'),
+                "sequencer": f"{index + 1:016X}",
+            }
+        )
+    return objects
+
+
+def send_events(sqs: Any, queue_url: str, objects: List[dict]) -> None:
+    """
+    Function to send an S3 event notification for each object, in batches of ten.
+    """
+    for start in range(0, len(objects), 10):
+        sqs.send_message_batch(
+            QueueUrl=queue_url,
+            Entries=[
+                {
+                    "Id": str(index),
+                    "MessageBody": s3_event_body(
+                        s3_object["key"],
+                        s3_object["size"],
+                        s3_object["etag"],
+                        s3_object["sequencer"],
+                    ),
+                }
+                for index, s3_object in enumerate(objects[start : start + 10])
+            ],
+        )
+
+
+def run_scenario(scenario: Scenario, args: Any) -> Dict[str, Any]:
+    """
+    Function to run a scenario against the stand-ins and return its results.
+    """
+    download_path = tempfile.mkdtemp(prefix="s3watcher-benchmark-")
+    done = threading.Event()
+
+    with mock_aws():
+        s3 = boto3.client("s3")
+        sqs = boto3.client("sqs")
+        s3.create_bucket(Bucket=BUCKET_NAME)
+        queue_url = sqs.create_queue(QueueName=QUEUE_NAME)["QueueUrl"]
+
+        objects = create_objects(s3, scenario)
+        if scenario.preload and not scenario.backfill:
+            send_events(sqs, queue_url, objects)
+
+        if scenario.backfill:
+            os.environ["CHECK_S3"] = "true"
+        else:
+            os.environ.pop("CHECK_S3", None)
+
+        config = SQSQueueHandlerConfig(
+            bucket_name=BUCKET_NAME,
+            queue_name=QUEUE_NAME,
+            path=download_path,
+            concurrency_limit=args.concurrency,
+            wait_time_seconds=1,
+            receive_concurrency=args.receive_concurrency,
+        )
+        handler = BenchmarkHandler(config, expected=scenario.count, on_done=done.set)
+
+        # Fresh queue between the poller and the consumer, both run as threads of this process
+        SQSQueueHandler.event_queue = mp.Queue()
+
+        start_time = time.time()
+        consumer = threading.Thread(
+            target=handler.process_messages, name="benchmark-consumer", daemon=True
+        )
+        consumer.start()
+        poller = threading.Thread(
+            target=handler.poll, name="benchmark-poller", daemon=True
+        )
+        if not scenario.backfill:
+            poller.start()
+
+        if not scenario.preload and not scenario.backfill:
+            burst_size = -(-scenario.count // scenario.bursts)
+            for start in range(0, scenario.count, burst_size):
+                if start:
+                    time.sleep(scenario.burst_interval)
+                send_events(sqs, queue_url, objects[start : start + burst_size])
+
+        finished = done.wait(args.timeout)
+        elapsed = time.time() - start_time
+
+        # Shut down through the sentinel as on SIGTERM: the feeder stops the workers and the poller, and
+        # process_messages flushes the background services once the downloads in progress are done
+        SQSQueueHandler.event_queue.put(None)
+        consumer.join()
+        if poller.is_alive():
+            poller.join()
+
+        results = summarize(scenario, handler, finished, elapsed)
+
+    shutil.rmtree(download_path, ignore_errors=True)
+    return results
+
+
+def summarize(
+    scenario: Scenario, handler: BenchmarkHandler, finished: bool, elapsed: float
+) -> Dict[str, Any]:
+    """
+    Function to compute the results of a finished scenario.
+    """
+    downloaded_bytes = handler.metrics.download_bytes.get(
+        "live"
+    ) + handler.metrics.download_bytes.get("backfill")
+    latencies = handler.event_lags if not scenario.backfill else handler.service_times
+    return {
+        "scenario": scenario.name,
+        "description": scenario.description,
+        "finished": finished,
+        "objects": scenario.count,
+        "completed": handler.completed,
+        "failed": handler.failed,
+        "elapsed_s": round(elapsed, 3),
+        "messages_per_s": round(handler.completed / elapsed, 1),
+        "mb_per_s": round(downloaded_bytes / MB / elapsed, 2),
+        "latency": "service time" if scenario.backfill else "queue to ack",
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies, default=0) * 1000, 1),
+        # Kilobytes on Linux, bytes on macOS
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            / (MB if sys.platform == "darwin" else KB),
+            1,
+        ),
+    }
+
+
+def scenario_process(scenario: Scenario, args: Any, results: Any) -> None:
+    """
+    Function run in the child process of a scenario, sending back its results.
+    """
+    try:
+        results.put(run_scenario(scenario, args))
+    except Exception as e:
+        log.error(f"Error running scenario ({scenario.name}): {e}")
+        results.put({"scenario": scenario.name, "error": str(e)})
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    """
+    Function to print the results of every scenario as a table.
+    """
+    columns = [
+        ("scenario", "scenario"),
+        ("objects", "objects"),
+        ("elapsed_s", "elapsed s"),
+        ("messages_per_s", "msgs/s"),
+        ("mb_per_s", "MB/s"),
+        ("p50_ms", "p50 ms"),
+        ("p90_ms", "p90 ms"),
+        ("p99_ms", "p99 ms"),
+        ("max_ms", "max ms"),
+        ("peak_rss_mb", "peak RSS MB"),
+    ]
+    rows = [[header for _, header in columns]]
+    for result in results:
+        if "error" in result:
+            rows.append([result["scenario"], f"error: {result['error']}"])
+            continue
+        rows.append([str(result[key]) for key, _ in columns])
+
+    widths = [max(len(row[i]) for row in rows if i < len(row)) for i in range(len(columns))]
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+
+    for result in results:
+        if "error" not in result and not result["finished"]:
+            print(
+                f"{result['scenario']}: timed out with {result['completed']} of {result['objects']} done"
+            )
+
+
+def create_argparse() -> ArgumentParser:
+    """
+    Function to initialize the Argument Parser with the benchmark options
+    """
+    parser = ArgumentParser(description="Offline benchmarks of the S3Watcher pipeline")
+
+    # Add Argument to parse the scenarios to run
+    parser.add_argument(
+        "-s",
+        "--scenario",
+        action="append",
+        choices=list(SCENARIOS),
+        help="Scenario to run, may be repeated. Runs every scenario by default",
+    )
+
+    # Add Argument to parse the multiplier of the number of objects
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Multiplier of the number of objects in each scenario",
+    )
+
+    # Add Argument to parse the number of download workers
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=20,
+        help="Number of download workers",
+    )
+
+    # Add Argument to parse the number of concurrent receives
+    parser.add_argument(
+        "-rc",
+        "--receive_concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of concurrent SQS receive calls",
+    )
+
+    # Add Argument to parse the timeout of each scenario
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=600,
+        help="Seconds to wait for a scenario to finish",
+    )
+
+    # Add Argument to parse the path of the JSON results
+    parser.add_argument("--json", help="Path to write the results as JSON")
+
+    # Add Argument to parse whether to show the pipeline logs
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Show the pipeline logs"
+    )
+
+    return parser
+
+
+def main() -> None:
+    """
+    Function to run the selected scenarios, each in its own process.
+    """
+    args = create_argparse().parse_args()
+    if not args.verbose:
+        log.setLevel("WARNING")
+
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        scenario = SCENARIOS[name].scaled(args.scale)
+        print(f"Running {scenario.name}: {scenario.description} ({scenario.count} objects)")
+
+        result_queue = mp.Queue()
+        process = mp.Process(
+            target=scenario_process, args=(scenario, args, result_queue)
+        )
+        process.start()
+        results.append(result_queue.get())
+        process.join()
+
+    print()
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w") as results_file:
+            json.dump(
+                {"run_id": uuid.uuid4().hex, "time": time.time(), "results": results},
+                results_file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Atomic Downloader Module
+"""
+
+import base64
+import hashlib
+import json
+import os
+from typing import Any, Callable
+import botocore
+from s3watcher import log
+
+
+class AtomicDownloader:
+    """
+    Class to download objects to a temporary part file, resume it with ranged GETs, verify it and atomically
+    rename it into place. The object version a part file was started from is recorded next to it, so a part
+    file is only resumed while the object is unchanged.
+    """
+
+    # Suffix of the partial files kept next to their final path
+    part_suffix = ".s3watcher-part"
+
+    # Suffix added to a part file's path for the file recording the version its bytes come from
+    version_suffix = ".json"
+
+    def __init__(
+        self,
+        get_s3_client: Callable[[], Any],
+        chunk_size: int = 1024 * 1024,
+        max_attempts: int = 2,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.get_s3_client = get_s3_client
+        self.chunk_size = chunk_size
+        self.max_attempts = max_attempts
+
+    @classmethod
+    def is_part_file(cls, path: str) -> bool:
+        """
+        Function to check whether a path is a partial download or its version record.
+        """
+        return path.endswith((cls.part_suffix, cls.part_suffix + cls.version_suffix))
+
+    @staticmethod
+    def is_md5_etag(head: dict) -> bool:
+        """
+        Function to check whether an object's ETag is the MD5 of its content, which is not the case for multipart
+        uploads and KMS or customer key encrypted objects.
+        """
+        return (
+            "-" not in head["ETag"]
+            and not head.get("ServerSideEncryption", "").startswith("aws:kms")
+            and "SSECustomerAlgorithm" not in head
+        )
+
+    @staticmethod
+    def is_full_object_sha256(head: dict) -> bool:
+        """
+        Function to check whether an object has a SHA-256 checksum of its whole content. Checksums of multipart
+        uploads are usually composite, a checksum of the part checksums, which cannot be checked from the file.
+        """
+        checksum = head.get("ChecksumSHA256")
+        return bool(
+            checksum
+            and "-" not in checksum
+            and head.get("ChecksumType", "FULL_OBJECT") == "FULL_OBJECT"
+        )
+
+    @staticmethod
+    def get_version(head: dict) -> dict:
+        """
+        Function to get the fields identifying the version of an object.
+        """
+        return {
+            "etag": head["ETag"].strip('"'),
+            "size": head["ContentLength"],
+            "version_id": head.get("VersionId"),
+        }
+
+    def download(
+        self,
+        bucket_name: str,
+        file_key: str,
+        local_path: str,
+        callback: Callable[[int], None] = None,
+    ) -> dict:
+        """
+        Function to download an object to local_path. Raises if the download could not be completed and verified.
+        Returns the size, ETag and last modified time of the downloaded version. The callback is called with the
+        number of bytes of every chunk written.
+        """
+        part_path = local_path + self.part_suffix
+
+        for attempt in range(1, self.max_attempts + 1):
+            head = self.get_s3_client().head_object(
+                Bucket=bucket_name, Key=file_key, ChecksumMode="ENABLED"
+            )
+            try:
+                self._download_part(bucket_name, file_key, part_path, head, callback)
+                break
+
+            except botocore.exceptions.ClientError as e:
+                # The object changed since the part file was started, start over
+                if (
+                    e.response.get("Error", {}).get("Code") in ["PreconditionFailed", "412"]
+                    and attempt < self.max_attempts
+                ):
+                    log.info(f"File ({file_key}) changed during download, restarting")
+                    self._remove_part(part_path)
+                    continue
+                raise
+
+        # Only a complete, verified file is moved into place
+        os.replace(part_path, local_path)
+        self._remove(part_path + self.version_suffix)
+
+        return {
+            "size": head["ContentLength"],
+            "etag": head["ETag"].strip('"'),
+            "last_modified": head.get("LastModified"),
+        }
+
+    def _download_part(
+        self,
+        bucket_name: str,
+        file_key: str,
+        part_path: str,
+        head: dict,
+        callback: Callable[[int], None] = None,
+    ) -> None:
+        """
+        Function to download the remainder of an object to its part file and verify it.
+        """
+        size = head["ContentLength"]
+        version = self.get_version(head)
+        version_path = part_path + self.version_suffix
+
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if offset and (offset > size or self._read_version(version_path) != version):
+            # The bytes already written may come from another version of the object
+            log.info(f"File ({file_key}) changed since its part file was written, restarting")
+            self._remove_part(part_path)
+            offset = 0
+
+        if not offset:
+            with open(version_path, "w") as version_file:
+                json.dump(version, version_file)
+
+        # Checksums of the whole content, the MD5 ETag of single part uploads or a full object SHA-256
+        checksums = []
+        if self.is_md5_etag(head):
+            checksums.append((hashlib.md5(), version["etag"], "ETag"))
+        if self.is_full_object_sha256(head):
+            checksums.append((hashlib.sha256(), head["ChecksumSHA256"], "SHA-256"))
+
+        if checksums and offset:
+            with open(part_path, "rb") as part_file:
+                for chunk in iter(lambda: part_file.read(self.chunk_size), b""):
+                    for checksum, _, _ in checksums:
+                        checksum.update(chunk)
+
+        with open(part_path, "ab") as part_file:
+            if offset < size:
+                if offset:
+                    log.info(f"Resuming download of file ({file_key}) at byte {offset}")
+
+                # IfMatch makes sure every byte comes from the version recorded for the part file
+                kwargs = {"Bucket": bucket_name, "Key": file_key, "IfMatch": head["ETag"]}
+                if version["version_id"]:
+                    kwargs["VersionId"] = version["version_id"]
+                if offset:
+                    kwargs["Range"] = f"bytes={offset}-"
+                response = self.get_s3_client().get_object(**kwargs)
+
+                for chunk in response["Body"].iter_chunks(self.chunk_size):
+                    part_file.write(chunk)
+                    for checksum, _, _ in checksums:
+                        checksum.update(chunk)
+                    if callback:
+                        callback(len(chunk))
+
+            part_file.flush()
+            os.fsync(part_file.fileno())
+
+        # Verify the part file against the object
+        downloaded_size = os.path.getsize(part_path)
+        if downloaded_size != size:
+            raise ValueError(
+                f"Size of file ({file_key}) is {downloaded_size}, expected {size}"
+            )
+        for checksum, expected, name in checksums:
+            actual = (
+                checksum.hexdigest()
+                if name == "ETag"
+                else base64.b64encode(checksum.digest()).decode()
+            )
+            if actual != expected:
+                self._remove_part(part_path)
+                raise ValueError(f"Checksum of file ({file_key}) does not match its {name}")
+
+    @staticmethod
+    def _read_version(version_path: str) -> dict:
+        """
+        Function to read the version recorded for a part file, None if there is no valid record.
+        """
+        try:
+            with open(version_path) as version_file:
+                return json.load(version_file)
+        except (OSError, ValueError):
+            return None
+
+    def _remove_part(self, part_path: str) -> None:
+        """
+        Function to remove a part file and its version record.
+        """
+        self._remove(part_path)
+        self._remove(part_path + self.version_suffix)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        """
+        Function to remove a file if it exists.
+        """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,244 @@
+"""
+Client Provider Module
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Tuple
+import boto3
+import botocore
+import botocore.session
+from botocore.credentials import CredentialResolver, RefreshableCredentials
+from s3watcher import log
+from s3watcher.ReloadingCredentialProvider import ReloadingCredentialProvider
+
+
+class ClientProvider:
+    """
+    Class to create the boto3 session and clients once and share them between threads, so their connection
+    pools stay warm. Credentials refresh in place: temporary credentials from roles, SSO or instance metadata
+    refresh themselves, and static credentials are reloaded periodically to pick up rotated credential files.
+    Clients are created again in forked processes, which must not share connections with their parent.
+    """
+
+    # botocore refreshes credentials this many seconds ahead of their expiry
+    advisory_refresh_timeout = 15 * 60
+
+    def __init__(
+        self,
+        profile: str = "",
+        region_name: str = None,
+        refresh_interval: float = 900,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.profile = profile or None
+        self.region_name = region_name
+        self.refresh_interval = refresh_interval
+
+        self.credential_refreshes = 0
+        self._session = None
+        self._clients = {}
+        self._resources = {}
+        self._pid = None
+        self._lock = threading.RLock()
+
+        # Pool statistics already added to the metrics by this process
+        self._published = {}
+        self._stop_event = threading.Event()
+
+    @property
+    def session(self) -> boto3.session.Session:
+        """
+        Session of the current process
+        """
+        with self._lock:
+            self._check_process()
+            if self._session is None:
+                self._session = self._create_session()
+            return self._session
+
+    def client(
+        self, service_name: str, name: str = None, max_pool_connections: int = None
+    ) -> Any:
+        """
+        Function to get the shared client of a service. Clients with different pool sizes are told apart by
+        their name.
+        """
+        name = name or service_name
+        client = self._clients.get(name)
+        if client is not None and self._pid == os.getpid():
+            return client
+
+        with self._lock:
+            self._check_process()
+            client = self._clients.get(name)
+            if client is None:
+                config = (
+                    botocore.config.Config(max_pool_connections=max_pool_connections)
+                    if max_pool_connections
+                    else None
+                )
+                client = self.session.client(service_name, config=config)
+                self._clients[name] = client
+            return client
+
+    def resource(self, service_name: str) -> Any:
+        """
+        Function to get the shared resource of a service.
+        """
+        with self._lock:
+            self._check_process()
+            resource = self._resources.get(service_name)
+            if resource is None:
+                resource = self.session.resource(service_name)
+                self._resources[service_name] = resource
+            return resource
+
+    def _check_process(self) -> None:
+        """
+        Function to drop the session and clients inherited from a parent process.
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._session = None
+            self._clients = {}
+            self._resources = {}
+            self._published = {}
+
+    def _new_session(self) -> boto3.session.Session:
+        """
+        Function to create a session resolving credentials from the profile or the default chain.
+        """
+        return boto3.session.Session(
+            profile_name=self.profile, region_name=self.region_name
+        )
+
+    def _create_session(self) -> boto3.session.Session:
+        """
+        Function to create the session of the current process with refreshable credentials.
+        """
+        session = self._new_session()
+        credentials = session.get_credentials()
+        if credentials is None or isinstance(credentials, RefreshableCredentials):
+            return session
+
+        # Reload static credentials periodically without rebuilding the clients using them
+        botocore_session = botocore.session.Session(profile=self.profile)
+        botocore_session.register_component(
+            "credential_provider",
+            CredentialResolver(
+                [ReloadingCredentialProvider(self._load_credentials, credentials.method)]
+            ),
+        )
+        return boto3.session.Session(
+            botocore_session=botocore_session, region_name=self.region_name
+        )
+
+    def _load_credentials(self) -> dict:
+        """
+        Function to resolve the current static credentials, valid until the next refresh.
+        """
+        credentials = self._new_session().get_credentials().get_frozen_credentials()
+        self.credential_refreshes += 1
+        expiry_time = datetime.now(timezone.utc) + timedelta(
+            seconds=self.refresh_interval + self.advisory_refresh_timeout
+        )
+        return {
+            "access_key": credentials.access_key,
+            "secret_key": credentials.secret_key,
+            "token": credentials.token,
+            "expiry_time": expiry_time.isoformat(),
+        }
+
+    @staticmethod
+    def _pool_stats(client: Any) -> Tuple[int, int]:
+        """
+        Function to count the connections opened and requests sent by the connection pools of a client.
+        """
+        connections = requests = 0
+        try:
+            http_session = client._endpoint.http_session
+            managers = [http_session._manager] + list(
+                http_session._proxy_managers.values()
+            )
+            for manager in managers:
+                for key in list(manager.pools.keys()):
+                    pool = manager.pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+                        requests += pool.num_requests
+
+        except AttributeError:
+            # Internals of another botocore version, no statistics
+            pass
+
+        return connections, requests
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Function to return the connections opened, requests sent and share of requests that reused a pooled
+        connection for every client of the current process.
+        """
+        with self._lock:
+            clients = dict(self._clients) if self._pid == os.getpid() else {}
+
+        stats = {}
+        for name, client in clients.items():
+            connections, requests = self._pool_stats(client)
+            stats[name] = {
+                "connections": connections,
+                "requests": requests,
+                "reuse": round(1 - connections / requests, 3) if requests else 0,
+            }
+        return stats
+
+    def publish(self, metrics: Any) -> None:
+        """
+        Function to add the pool statistics of the current process since the last call to the metrics.
+        """
+        for name, client_stats in self.stats().items():
+            if name not in metrics.clients:
+                continue
+
+            published = self._published.get(name, {"connections": 0, "requests": 0})
+            metrics.http_connections.inc(
+                client_stats["connections"] - published["connections"], name
+            )
+            metrics.http_requests.inc(
+                client_stats["requests"] - published["requests"], name
+            )
+            self._published[name] = client_stats
+
+    def start(self, metrics: Any = None, interval: float = 15) -> None:
+        """
+        Function to publish the pool statistics of the current process periodically.
+        """
+        self._stop_event.clear()
+        if metrics:
+            threading.Thread(
+                target=self._report,
+                args=(metrics, interval),
+                name="client-stats",
+                daemon=True,
+            ).start()
+
+    def _report(self, metrics: Any, interval: float) -> None:
+        """
+        Function run by the statistics thread.
+        """
+        while not self._stop_event.wait(interval):
+            self.publish(metrics)
+
+    def stop(self, metrics: Any = None) -> None:
+        """
+        Function to stop publishing the pool statistics and log them.
+        """
+        self._stop_event.set()
+        if metrics:
+            self.publish(metrics)
+        log.info(
+            f"Client connection pools: {self.stats()}, credential refreshes: {self.credential_refreshes}"
+        )
@@ -0,0 +1,123 @@
+"""
+Deduplication Cache Module
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class DeduplicationCache:
+    """
+    Bounded set of recently seen keys with O(1) lookups, optional expiry and hit/miss counters. Keys can be
+    added to a group, such as the versions of an object, and discarded together.
+    """
+
+    def __init__(self, capacity: int = 100000, ttl: float = 0) -> None:
+        """
+        Class Constructor
+        """
+        self.capacity = max(1, int(capacity or 1))
+        self.ttl = ttl or 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Keys in insertion order mapped to the time they were added
+        self.entries = OrderedDict()
+
+        # Keys of each group, and the group of each grouped key
+        self.groups = {}
+        self.key_groups = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def seen(self, key: Hashable) -> bool:
+        """
+        Function to check whether a key is in the cache, counting the lookup as a hit or a miss.
+        """
+        if key is None:
+            return False
+
+        with self._lock:
+            added = self.entries.get(key)
+            if added is not None and self.ttl and time.time() - added > self.ttl:
+                self._remove(key)
+                added = None
+
+            if added is None:
+                self.misses += 1
+                return False
+
+            self.hits += 1
+            return True
+
+    def add(self, key: Hashable, group: Hashable = None) -> None:
+        """
+        Function to add a key, evicting the oldest keys once the cache is full or they expire.
+        """
+        if key is None:
+            return
+
+        with self._lock:
+            now = time.time()
+            self.entries[key] = now
+            self.entries.move_to_end(key)
+            if group is not None:
+                self.groups.setdefault(group, set()).add(key)
+                self.key_groups[key] = group
+
+            while len(self.entries) > self.capacity:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+            if self.ttl:
+                while self.entries:
+                    oldest_key, added = next(iter(self.entries.items()))
+                    if now - added <= self.ttl:
+                        break
+                    self._remove(oldest_key)
+                    self.evictions += 1
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Function to remove a key if present.
+        """
+        with self._lock:
+            self._remove(key)
+
+    def discard_group(self, group: Hashable) -> None:
+        """
+        Function to remove every key of a group.
+        """
+        with self._lock:
+            for key in list(self.groups.get(group, ())):
+                self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        """
+        Function to remove a key and its group membership, called with the lock held.
+        """
+        self.entries.pop(key, None)
+        group = self.key_groups.pop(key, None)
+        if group is not None:
+            keys = self.groups[group]
+            keys.discard(key)
+            if not keys:
+                del self.groups[group]
+
+    def stats(self) -> dict:
+        """
+        Function to return the cache counters.
+        """
+        with self._lock:
+            return {
+                "size": len(self.entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
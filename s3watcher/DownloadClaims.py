@@ -0,0 +1,366 @@
+"""
+Download Claims Module
+"""
+
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Optional
+from s3watcher import log
+
+# Results of claiming a key
+CLAIMED = "claimed"
+BUSY = "busy"
+PENDING = "pending"
+COMPLETED = "completed"
+
+
+class DownloadClaims:
+    """
+    Class to coordinate instances sharing a download path through claim files, so each object is transferred
+    by a single instance. Claims are created exclusively, kept alive by heartbeats while the transfer runs,
+    taken over once stale and turned into completion markers when the transfer succeeds.
+    """
+
+    # Directory of the claim files under the download path
+    claim_directory = ".s3watcher-claims"
+
+    def __init__(
+        self,
+        download_path: str,
+        stale_after: float = 300,
+        completed_ttl: float = 3600,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.path = os.path.join(download_path, self.claim_directory)
+        self.stale_after = stale_after
+        self.completed_ttl = completed_ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        # Claim files held by this instance, refreshed by the heartbeat thread
+        self.held = set()
+        self.claimed = 0
+        self.busy = 0
+        self.pending = 0
+        self.completed = 0
+        self.recovered = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def is_claim_path(cls, relative_path: str) -> bool:
+        """
+        Function to check whether a path relative to the download path is inside the claim directory.
+        """
+        return relative_path.split("/", 1)[0] == cls.claim_directory
+
+    def start(self) -> None:
+        """
+        Function to start the heartbeat thread, which also prunes expired completion markers.
+        """
+        os.makedirs(self.path, exist_ok=True)
+
+        # Identify the process the claims are made from, which may be forked after construction
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="download-claims", daemon=True
+        )
+        self._thread.start()
+        log.info(f"Coordinating downloads through ({self.path}) as ({self.owner})")
+
+    def claim_path(self, bucket_name: str, file_key: str) -> str:
+        """
+        Function to get the claim file of an object, fanned out over subdirectories by its hash.
+        """
+        digest = hashlib.sha1(f"{bucket_name}/{file_key}".encode()).hexdigest()
+        return os.path.join(self.path, digest[:2], digest + ".claim")
+
+    def claim(
+        self, bucket_name: str, file_key: str, etag: str = None, sequencer: str = None
+    ) -> str:
+        """
+        Function to claim a version of an object before transferring it. Returns CLAIMED if this instance should
+        transfer it, BUSY if another instance holds a live claim on the same version, PENDING if another instance
+        holds a live claim on a different or unknown version, or COMPLETED if this version was already
+        transferred.
+        """
+        path = self.claim_path(bucket_name, file_key)
+
+        # A takeover can race with other instances, so retry a few times
+        for _ in range(3):
+            if self._create(path, file_key, etag, sequencer):
+                with self._lock:
+                    self.held.add(path)
+                    self.claimed += 1
+                return CLAIMED
+
+            entry = self._read(path)
+            if entry is None:
+                # Released or taken over since, try again
+                continue
+
+            if entry["state"] == COMPLETED and etag and entry.get("etag") == etag:
+                with self._lock:
+                    self.completed += 1
+                return COMPLETED
+
+            if entry["state"] == CLAIMED and not self._is_stale(entry):
+                # The claimed version may be older, so only the same version is left to the claim's owner
+                if self.is_same_version(entry, etag, sequencer):
+                    with self._lock:
+                        self.busy += 1
+                    return BUSY
+
+                with self._lock:
+                    self.pending += 1
+                return PENDING
+
+            # Stale claims and markers of other versions are replaced
+            if self._take_over(path, entry):
+                with self._lock:
+                    self.recovered += 1
+
+        with self._lock:
+            self.pending += 1
+        return PENDING
+
+    @staticmethod
+    def is_same_version(
+        entry: dict, etag: Optional[str], sequencer: Optional[str]
+    ) -> bool:
+        """
+        Function to check whether a claim is on a given version of its object, by ETag and by S3 sequencer when
+        both are known. Unknown ETags never match.
+        """
+        if not etag or entry.get("etag") != etag:
+            return False
+        if sequencer and entry.get("sequencer"):
+            return entry["sequencer"] == sequencer
+        return True
+
+    def release(
+        self,
+        bucket_name: str,
+        file_key: str,
+        success: bool,
+        etag: str = None,
+        sequencer: str = None,
+    ) -> None:
+        """
+        Function to release a claim, leaving a completion marker if the transfer succeeded so other instances
+        skip the same version.
+        """
+        path = self.claim_path(bucket_name, file_key)
+        with self._lock:
+            self.held.discard(path)
+
+        try:
+            if success:
+                self._write(path, file_key, etag, sequencer, COMPLETED)
+            else:
+                os.remove(path)
+        except Exception as e:
+            log.error(f"Error releasing claim of file ({file_key}): {e}")
+
+    def forget(self, bucket_name: str, file_key: str) -> None:
+        """
+        Function to remove the completion marker of a deleted object, so it is transferred again if it is
+        created again with the same content. Live claims are left to their owner.
+        """
+        path = self.claim_path(bucket_name, file_key)
+        entry = self._read(path)
+        if entry is not None and entry["state"] == COMPLETED:
+            self._take_over(path, entry)
+
+    def _create(
+        self,
+        path: str,
+        file_key: str,
+        etag: Optional[str],
+        sequencer: Optional[str],
+    ) -> bool:
+        """
+        Function to create a claim file, returns False if it already exists.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # Exclusive creation is atomic on local filesystems and NFSv3 or later
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return False
+
+        with os.fdopen(fd, "w") as claim_file:
+            json.dump(self._entry(file_key, etag, sequencer, CLAIMED), claim_file)
+        return True
+
+    def _write(
+        self,
+        path: str,
+        file_key: str,
+        etag: Optional[str],
+        sequencer: Optional[str],
+        state: str,
+    ) -> None:
+        """
+        Function to replace the content of a held claim file.
+        """
+        temp_path = f"{path}.{self.owner.replace(':', '-')}.tmp"
+        with open(temp_path, "w") as claim_file:
+            json.dump(self._entry(file_key, etag, sequencer, state), claim_file)
+        os.replace(temp_path, path)
+
+    def _entry(
+        self,
+        file_key: str,
+        etag: Optional[str],
+        sequencer: Optional[str],
+        state: str,
+    ) -> dict:
+        """
+        Function to get the content of a claim file.
+        """
+        return {
+            "owner": self.owner,
+            "file_key": file_key,
+            "etag": etag,
+            "sequencer": sequencer,
+            "state": state,
+            "time": time.time(),
+        }
+
+    def _read(self, path: str) -> Optional[dict]:
+        """
+        Function to read a claim file, None if it does not exist. The heartbeat time is the file's mtime.
+        """
+        try:
+            with open(path) as claim_file:
+                entry = json.load(claim_file)
+            entry["heartbeat"] = os.path.getmtime(path)
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Still being written by its owner, or left empty by an owner that crashed
+            try:
+                return {"state": CLAIMED, "heartbeat": os.path.getmtime(path)}
+            except OSError:
+                return None
+
+    def _is_stale(self, entry: dict) -> bool:
+        """
+        Function to check whether a claim's owner stopped sending heartbeats.
+        """
+        return time.time() - entry["heartbeat"] > self.stale_after
+
+    def _take_over(self, path: str, entry: dict) -> bool:
+        """
+        Function to remove a stale claim or completion marker so it can be claimed again. The file is moved
+        aside first, so only one instance removes it, and put back if it turns out to be a newer claim.
+        """
+        aside_path = f"{path}.{self.owner.replace(':', '-')}.stale"
+        try:
+            os.rename(path, aside_path)
+        except FileNotFoundError:
+            return False
+
+        moved = self._read(aside_path)
+        if (
+            moved
+            and moved.get("owner") != entry.get("owner")
+            and moved["state"] == CLAIMED
+            and not self._is_stale(moved)
+        ):
+            # Claimed by another instance in the meantime, give it back
+            try:
+                os.link(aside_path, path)
+            except OSError:
+                pass
+            os.remove(aside_path)
+            return False
+
+        os.remove(aside_path)
+        if entry["state"] == CLAIMED:
+            log.info(
+                f"Recovered stale claim of file ({entry.get('file_key')}) held by ({entry.get('owner')})"
+            )
+        return True
+
+    def _run(self) -> None:
+        """
+        Function run by the heartbeat thread, touching held claims and pruning expired completion markers.
+        """
+        interval = max(1.0, self.stale_after / 3)
+        last_prune = time.time()
+        while not self._stop_event.wait(interval):
+            with self._lock:
+                held = list(self.held)
+
+            for path in held:
+                try:
+                    os.utime(path)
+                except OSError as e:
+                    log.error(f"Error refreshing claim ({path}): {e}")
+
+            if time.time() - last_prune >= self.completed_ttl / 2:
+                last_prune = time.time()
+                self.prune()
+
+    def prune(self) -> None:
+        """
+        Function to remove completion markers older than their time to live and stale claims.
+        """
+        now = time.time()
+        pruned = 0
+        try:
+            with os.scandir(self.path) as directories:
+                for directory in directories:
+                    if not directory.is_dir(follow_symlinks=False):
+                        continue
+                    with os.scandir(directory.path) as entries:
+                        for entry in entries:
+                            try:
+                                age = now - entry.stat().st_mtime
+                                if age > max(self.completed_ttl, self.stale_after):
+                                    os.remove(entry.path)
+                                    pruned += 1
+                            except FileNotFoundError:
+                                pass
+
+        except OSError as e:
+            log.error(f"Error pruning claims in ({self.path}): {e}")
+
+        if pruned:
+            log.info(f"Pruned {pruned} expired download claims")
+
+    def stats(self) -> dict:
+        """
+        Function to return the number of claims taken, skipped as busy or completed, left pending behind
+        another version and recovered.
+        """
+        with self._lock:
+            return {
+                "claimed": self.claimed,
+                "busy": self.busy,
+                "pending": self.pending,
+                "completed": self.completed,
+                "recovered": self.recovered,
+                "held": len(self.held),
+            }
+
+    def stop(self) -> None:
+        """
+        Function to stop the heartbeat thread. Claims still held go stale and are recovered by other instances.
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        log.info(f"Download claims: {self.stats()}")
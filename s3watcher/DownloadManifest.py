@@ -0,0 +1,232 @@
+"""
+Download Manifest Module
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Iterator, Optional
+from s3watcher import log
+
+
+class DownloadManifest:
+    """
+    On-disk SQLite index of every object that was downloaded, per download path so watches of the same
+    bucket keep their own entries
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Class Constructor
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Function to get the connection for the current process, SQLite connections must not cross a fork.
+        """
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._connection = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            columns = [
+                row[1]
+                for row in self._connection.execute("PRAGMA table_info(downloads)")
+            ]
+            if columns and "download_path" not in columns:
+                self._migrate(self._connection)
+            self._create_table(self._connection)
+            self._connection.commit()
+            self._pid = os.getpid()
+            log.info(f"Opened download manifest ({self.path})")
+
+        return self._connection
+
+    @staticmethod
+    def _create_table(connection: sqlite3.Connection) -> None:
+        """
+        Function to create the downloads table if it does not exist.
+        """
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS downloads (
+                download_path TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                key TEXT NOT NULL,
+                size INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                local_path TEXT NOT NULL,
+                downloaded_at REAL NOT NULL,
+                PRIMARY KEY (download_path, bucket, key)
+            )
+            """
+        )
+
+    def _migrate(self, connection: sqlite3.Connection) -> None:
+        """
+        Function to move the entries of a manifest keyed on bucket and key only to their download path. The
+        download path is the local path less the longest trailing part of the key it ends with, entries of
+        watches with a folder may end up under a shorter path and are downloaded again.
+        """
+        rows = connection.execute(
+            "SELECT bucket, key, size, etag, last_modified, local_path, downloaded_at FROM downloads"
+        ).fetchall()
+        connection.execute("DROP TABLE downloads")
+        self._create_table(connection)
+
+        for row in rows:
+            key, local_path = row[1], row[5]
+            relative_keys = [key] + [
+                key[index + 1 :] for index, char in enumerate(key) if char == "/"
+            ]
+            relative_key = next(
+                (part for part in relative_keys if local_path.endswith(part)), ""
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (local_path[: len(local_path) - len(relative_key)],) + tuple(row),
+            )
+        log.info(
+            f"Migrated {len(rows)} download manifest entries to their download path"
+        )
+
+    def get(self, download_path: str, bucket: str, key: str) -> Optional[dict]:
+        """
+        Function to get the manifest entry of an object downloaded to a download path, None if it was never
+        downloaded there.
+        """
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT size, etag, last_modified, local_path, downloaded_at FROM downloads WHERE download_path = ? AND bucket = ? AND key = ?",
+                    (download_path, bucket, key),
+                )
+                .fetchone()
+            )
+
+        if row is None:
+            return None
+
+        return {
+            "size": row[0],
+            "etag": row[1],
+            "last_modified": row[2],
+            "local_path": row[3],
+            "downloaded_at": row[4],
+        }
+
+    def is_current(
+        self,
+        download_path: str,
+        bucket: str,
+        key: str,
+        local_path: str,
+        size: Optional[int] = None,
+        etag: Optional[str] = None,
+    ) -> bool:
+        """
+        Function to check whether the local copy of an object is identical to the given version.
+        An object is current if it was downloaded to the same path with the same ETag and size and the file is
+        still there. Without an ETag or size to compare against the object is never considered current.
+        """
+        entry = self.get(download_path, bucket, key)
+        current = (
+            entry is not None
+            and (etag is not None or size is not None)
+            and entry["local_path"] == local_path
+            and (etag is None or entry["etag"] == etag)
+            and (size is None or entry["size"] == size)
+            and os.path.isfile(local_path)
+            and (entry["size"] is None or os.path.getsize(local_path) == entry["size"])
+        )
+
+        if current:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        return current
+
+    def record(
+        self,
+        download_path: str,
+        bucket: str,
+        key: str,
+        local_path: str,
+        size: Optional[int] = None,
+        etag: Optional[str] = None,
+        last_modified: Any = None,
+    ) -> None:
+        """
+        Function to record a completed download.
+        """
+        if size is None and os.path.isfile(local_path):
+            size = os.path.getsize(local_path)
+
+        if last_modified is not None and not isinstance(last_modified, str):
+            last_modified = last_modified.isoformat()
+
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    download_path,
+                    bucket,
+                    key,
+                    size,
+                    etag,
+                    last_modified,
+                    local_path,
+                    time.time(),
+                ),
+            )
+            connection.commit()
+
+    def remove(self, download_path: str, bucket: str, key: str) -> None:
+        """
+        Function to remove an object downloaded to a download path from the manifest.
+        """
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "DELETE FROM downloads WHERE download_path = ? AND bucket = ? AND key = ?",
+                (download_path, bucket, key),
+            )
+            connection.commit()
+
+    def keys(self, download_path: str, bucket: str) -> Iterator[str]:
+        """
+        Function to iterate over every key of a bucket recorded for a download path.
+        """
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT key FROM downloads WHERE download_path = ? AND bucket = ?",
+                    (download_path, bucket),
+                )
+                .fetchall()
+            )
+
+        for row in rows:
+            yield row[0]
+
+    def stats(self) -> dict:
+        """
+        Function to return the manifest counters.
+        """
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,159 @@
+"""
+Download Worker Pool Module
+"""
+
+import threading
+import time
+from typing import Any, Callable, List
+from s3watcher import log
+
+
+class WorkerStats:
+    """
+    Class to hold the statistics of a single download worker
+    """
+
+    def __init__(self, worker_id: int) -> None:
+        """
+        Class Constructor
+        """
+        self.worker_id = worker_id
+        self.processed = 0
+        self.failed = 0
+        self.busy_time = 0.0
+        self.last_event_time = None
+        self._lock = threading.Lock()
+
+    def record(self, duration: float, success: bool) -> None:
+        """
+        Function to record the outcome of a processed event.
+        """
+        with self._lock:
+            if success:
+                self.processed += 1
+            else:
+                self.failed += 1
+            self.busy_time += duration
+            self.last_event_time = time.time()
+
+    def as_dict(self) -> dict:
+        """
+        Function to return the worker statistics as a dictionary.
+        """
+        with self._lock:
+            return {
+                "worker_id": self.worker_id,
+                "processed": self.processed,
+                "failed": self.failed,
+                "busy_time": round(self.busy_time, 3),
+                "last_event_time": self.last_event_time,
+            }
+
+
+class DownloadWorkerPool:
+    """
+    Pool of download worker threads fed from a shared event queue
+    """
+
+    def __init__(
+        self,
+        source_queue: Any,
+        handler: Callable[[Any], bool],
+        concurrency_limit: int = 20,
+        stats_interval: int = 300,
+        name: str = "download-worker",
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.source_queue = source_queue
+        self.handler = handler
+        self.concurrency_limit = max(1, int(concurrency_limit or 1))
+        self.stats_interval = stats_interval
+        self.name = name
+        self.stats = [WorkerStats(i) for i in range(self.concurrency_limit)]
+        self.threads = []
+        self._stop_event = threading.Event()
+
+    def start(self) -> None:
+        """
+        Function to start the worker threads.
+        """
+        for stats in self.stats:
+            thread = threading.Thread(
+                target=self._run,
+                args=(stats,),
+                name=f"{self.name}-{stats.worker_id}",
+                daemon=True,
+            )
+            thread.start()
+            self.threads.append(thread)
+
+        if self.stats_interval:
+            thread = threading.Thread(
+                target=self._report_stats, name=f"{self.name}-stats", daemon=True
+            )
+            thread.start()
+
+        log.info(f"Started {self.concurrency_limit} download workers")
+
+    def _run(self, stats: WorkerStats) -> None:
+        """
+        Function run by each worker to process events until the pool is stopped.
+        """
+        while not self._stop_event.is_set():
+            event = self.source_queue.get()
+
+            # None is used as the shutdown sentinel
+            if event is None:
+                break
+
+            start_time = time.time()
+            try:
+                success = self.handler(event) is not False
+            except Exception as e:
+                log.error(f"Worker {stats.worker_id} failed processing {event}: {e}")
+                success = False
+            stats.record(time.time() - start_time, success)
+
+    def _report_stats(self) -> None:
+        """
+        Function to periodically log the worker statistics.
+        """
+        while not self._stop_event.wait(self.stats_interval):
+            self.log_stats()
+
+    def get_stats(self) -> List[dict]:
+        """
+        Function to get the statistics of every worker.
+        """
+        return [stats.as_dict() for stats in self.stats]
+
+    def log_stats(self) -> None:
+        """
+        Function to log a summary of the worker statistics.
+        """
+        worker_stats = self.get_stats()
+        processed = sum(stats["processed"] for stats in worker_stats)
+        failed = sum(stats["failed"] for stats in worker_stats)
+        log.info(
+            f"Download workers: {len(worker_stats)}, processed: {processed}, failed: {failed}"
+        )
+        log.info(f"Download worker stats: {worker_stats}")
+
+    def join(self) -> None:
+        """
+        Function to block until every worker thread has exited.
+        """
+        for thread in self.threads:
+            thread.join()
+
+    def stop(self) -> None:
+        """
+        Function to stop the worker threads once they finish their current event.
+        """
+        self._stop_event.set()
+        for _ in self.threads:
+            self.source_queue.put(None)
+        self.join()
+        self.log_stats()
@@ -0,0 +1,155 @@
+"""
+Event Coalescer Module
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+from s3watcher import log
+from s3watcher.KeySequencer import KeySequencer
+
+
+class EventCoalescer:
+    """
+    Class to hold events for a short window and collapse the events of the same object key into the newest by
+    S3 sequencer, so a burst of overwrites is transferred once. Superseded events are acknowledged right away.
+    """
+
+    def __init__(
+        self,
+        submit: Callable[[Any], None],
+        supersede: Callable[[Any], None],
+        window: float = 1.0,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.submit = submit
+        self.supersede = supersede
+        self.window = window
+
+        # Newest event of each key as key -> [first seen, event], first seen first
+        self.pending = OrderedDict()
+        self.received = 0
+        self.coalesced = 0
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Function to start the background thread submitting events once their window has passed.
+        """
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="event-coalescer", daemon=True
+        )
+        self._thread.start()
+        log.info(f"Coalescing events of the same key over {self.window}s")
+
+    @staticmethod
+    def is_newer(sqs_event: Any, other: Any) -> bool:
+        """
+        Function to check whether an event supersedes another of the same key. Events without a sequencer are
+        ordered by arrival.
+        """
+        if sqs_event.sequencer and other.sequencer:
+            return KeySequencer.compare(sqs_event.sequencer, other.sequencer) >= 0
+        return True
+
+    def add(self, sqs_event: Any) -> None:
+        """
+        Function to hold an event until its key's window has passed, keeping only the newest event of the key.
+        """
+        key = (sqs_event.queue_url, sqs_event.bucket_name, sqs_event.file_key)
+        with self._condition:
+            if self._stopped:
+                superseded = None
+                submit = sqs_event
+            else:
+                self.received += 1
+                submit = None
+                entry = self.pending.get(key)
+                if entry is None:
+                    self.pending[key] = [time.time(), sqs_event]
+                    superseded = None
+                    self._condition.notify()
+                elif self.is_newer(sqs_event, entry[1]):
+                    superseded, entry[1] = entry[1], sqs_event
+                else:
+                    superseded = sqs_event
+
+                if superseded is not None:
+                    self.coalesced += 1
+
+        if submit is not None:
+            self.submit(submit)
+        if superseded is not None:
+            self.supersede(superseded)
+
+    def _run(self) -> None:
+        """
+        Function run by the coalescer thread, submitting the events of keys whose window has passed.
+        """
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if not self.pending:
+                        self._condition.wait()
+                        continue
+
+                    # Wait for the window of the oldest key
+                    first_seen = next(iter(self.pending.values()))[0]
+                    delay = first_seen + self.window - time.time()
+                    if delay <= 0:
+                        break
+                    self._condition.wait(delay)
+
+                if self._stopped:
+                    return
+
+                # Keys are in the order they were first seen, so the due ones come first
+                due = []
+                now = time.time()
+                while self.pending:
+                    key, (first_seen, sqs_event) = next(iter(self.pending.items()))
+                    if first_seen + self.window > now:
+                        break
+                    del self.pending[key]
+                    due.append(sqs_event)
+
+            for sqs_event in due:
+                self.submit(sqs_event)
+
+    def stats(self) -> dict:
+        """
+        Function to return the number of events received, coalesced into newer ones and still held.
+        """
+        with self._condition:
+            return {
+                "received": self.received,
+                "coalesced": self.coalesced,
+                "pending": len(self.pending),
+            }
+
+    def stop(self) -> None:
+        """
+        Function to stop the coalescer thread and submit every event still held. Events added afterwards are
+        submitted directly.
+        """
+        with self._condition:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._condition.notify_all()
+
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+        with self._condition:
+            pending, self.pending = self.pending, OrderedDict()
+        for _, sqs_event in pending.values():
+            self.submit(sqs_event)
+        log.info(f"Event coalescer: {self.stats()}")
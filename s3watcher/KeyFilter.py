@@ -0,0 +1,190 @@
+"""
+Key Filter Module
+"""
+
+import fnmatch
+import re
+from typing import List, Optional, Tuple
+from s3watcher.TransferPlanner import MB
+
+
+class KeyFilter:
+    """
+    Class to select the object keys to mirror with include and exclude rules and size bounds, compiled once
+    into prefix tuples and a single regular expression. Rules match keys relative to the watched folder and
+    are prefixes, globs containing *, ? or [, or regular expressions starting with re:.
+    """
+
+    def __init__(
+        self,
+        include: List[str] = None,
+        exclude: List[str] = None,
+        min_size: float = 0,
+        max_size: float = 0,
+        prefix: str = "",
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.prefix = prefix
+        self.min_size = int(min_size * MB) if min_size else 0
+        self.max_size = int(max_size * MB) if max_size else 0
+
+        self.include_prefixes, self.include_pattern = self.compile(include or [])
+        self.exclude_prefixes, self.exclude_pattern = self.compile(exclude or [])
+        self.has_include = bool(self.include_prefixes or self.include_pattern)
+
+        self.selected = 0
+        self.filtered = 0
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether any rule or size bound is set
+        """
+        return bool(
+            self.has_include
+            or self.exclude_prefixes
+            or self.exclude_pattern
+            or self.min_size
+            or self.max_size
+        )
+
+    @staticmethod
+    def compile(rules: List[str]) -> Tuple[tuple, Optional[re.Pattern]]:
+        """
+        Function to split rules into a tuple of plain prefixes and one pattern matching any glob or regular
+        expression.
+        """
+        prefixes = []
+        patterns = []
+        for rule in rules:
+            rule = rule.strip()
+            if not rule:
+                continue
+
+            if rule.startswith("re:"):
+                patterns.append(rule[3:])
+            elif any(char in rule for char in "*?["):
+                patterns.append(fnmatch.translate(rule))
+            else:
+                prefixes.append(rule)
+
+        pattern = (
+            re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+            if patterns
+            else None
+        )
+        return tuple(prefixes), pattern
+
+    def matches(self, file_key: str, size: int = None) -> bool:
+        """
+        Function to check whether a key, given in full, should be mirrored. Unknown sizes are not bounded.
+        """
+        key = (
+            file_key[len(self.prefix) :]
+            if file_key.startswith(self.prefix)
+            else file_key
+        )
+
+        selected = self.matches_key(key) and self.matches_size(size)
+        if selected:
+            self.selected += 1
+        else:
+            self.filtered += 1
+        return selected
+
+    def matches_key(self, key: str) -> bool:
+        """
+        Function to check a key relative to the watched folder against the include and exclude rules.
+        """
+        if self.has_include and not (
+            key.startswith(self.include_prefixes)
+            or (self.include_pattern and self.include_pattern.match(key))
+        ):
+            return False
+
+        if key.startswith(self.exclude_prefixes) or (
+            self.exclude_pattern and self.exclude_pattern.match(key)
+        ):
+            return False
+
+        return True
+
+    def matches_size(self, size: Optional[int]) -> bool:
+        """
+        Function to check a size against the size bounds.
+        """
+        if size is None:
+            return True
+        if self.min_size and size < self.min_size:
+            return False
+        if self.max_size and size > self.max_size:
+            return False
+        return True
+
+    def list_prefixes(self, shard_prefixes: List[str] = None) -> Optional[List[str]]:
+        """
+        Function to get the prefixes relative to the watched folder that need to be listed, narrowing the
+        listing shards to the include prefixes when every include rule is a prefix. None means the whole
+        folder.
+        """
+        prefixes = list(shard_prefixes or [])
+        if self.has_include and not self.include_pattern:
+            if prefixes:
+                # Keep the narrower of each overlapping shard and include prefix
+                prefixes = [
+                    include if include.startswith(shard) else shard
+                    for shard in prefixes
+                    for include in self.include_prefixes
+                    if include.startswith(shard) or shard.startswith(include)
+                ]
+            else:
+                prefixes = list(self.include_prefixes)
+
+            # Drop prefixes covered by a shorter one
+            prefixes = [
+                prefix
+                for prefix in sorted(set(prefixes))
+                if not any(
+                    prefix != other and prefix.startswith(other) for other in prefixes
+                )
+            ]
+
+        elif not prefixes:
+            return None
+
+        return [prefix for prefix in prefixes if not self.excludes_prefix(prefix)]
+
+    def excludes_prefix(self, prefix: str) -> bool:
+        """
+        Function to check whether every key under a prefix relative to the watched folder is excluded, so it
+        does not need to be listed.
+        """
+        if prefix.startswith(self.exclude_prefixes):
+            return True
+
+        # Prefix includes rule out subtrees outside all of them
+        if self.has_include and not self.include_pattern:
+            return not any(
+                prefix.startswith(include) or include.startswith(prefix)
+                for include in self.include_prefixes
+            )
+
+        return False
+
+    def splits_prefix(self, prefix: str) -> bool:
+        """
+        Function to check whether an exclude prefix lies below a prefix relative to the watched folder, so the
+        prefix has to be listed by its sub-prefixes for the excluded subtree to be left out.
+        """
+        return any(
+            exclude != prefix and exclude.startswith(prefix)
+            for exclude in self.exclude_prefixes
+        )
+
+    def stats(self) -> dict:
+        """
+        Function to return the number of keys selected and filtered out.
+        """
+        return {"selected": self.selected, "filtered": self.filtered}
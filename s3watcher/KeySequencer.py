@@ -0,0 +1,87 @@
+"""
+Key Sequencer Module
+"""
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class KeySequencer:
+    """
+    Class to order events of the same object key by their S3 sequencer and serialize their processing
+    """
+
+    def __init__(self, capacity: int = 100000) -> None:
+        """
+        Class Constructor
+        """
+        self.capacity = max(1, int(capacity or 1))
+
+        # Sequencer of the last event applied to each key, least recently applied first
+        self.applied = OrderedDict()
+        self.stale = 0
+
+        # Per-key locks as key -> [lock, holders and waiters]
+        self.locks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def compare(sequencer: str, other: str) -> int:
+        """
+        Function to compare two sequencers of the same key. They are hexadecimal strings of varying length
+        that are right padded with zeros before comparing.
+        """
+        length = max(len(sequencer), len(other))
+        sequencer, other = sequencer.ljust(length, "0"), other.ljust(length, "0")
+        return (sequencer > other) - (sequencer < other)
+
+    @contextmanager
+    def lock(self, file_key: str) -> Iterator[None]:
+        """
+        Function to hold the lock of a key while one of its events is processed.
+        """
+        with self._lock:
+            entry = self.locks.setdefault(file_key, [threading.Lock(), 0])
+            entry[1] += 1
+
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self.locks[file_key]
+
+    def is_stale(self, file_key: str, sequencer: str) -> bool:
+        """
+        Function to check whether a later event of the key has already been applied. Events without a
+        sequencer are never stale.
+        """
+        if not sequencer:
+            return False
+
+        with self._lock:
+            applied = self.applied.get(file_key)
+            if applied is not None and self.compare(sequencer, applied) < 0:
+                self.stale += 1
+                return True
+            return False
+
+    def record(self, file_key: str, sequencer: str) -> None:
+        """
+        Function to record the sequencer of an event applied to a key.
+        """
+        if not sequencer:
+            return
+
+        with self._lock:
+            applied = self.applied.get(file_key)
+            if applied is None or self.compare(sequencer, applied) > 0:
+                self.applied[file_key] = sequencer
+            self.applied.move_to_end(file_key)
+
+            while len(self.applied) > self.capacity:
+                self.applied.popitem(last=False)
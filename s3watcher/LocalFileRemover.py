@@ -0,0 +1,171 @@
+"""
+Local File Remover Module
+"""
+
+import os
+import threading
+import time
+from typing import Callable, List
+from s3watcher import log
+
+
+class LocalFileRemover:
+    """
+    Class to remove local copies of deleted objects in batches from a background thread and prune the
+    directories left empty
+    """
+
+    def __init__(
+        self,
+        download_path: str,
+        on_removed: Callable[[str], None] = None,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.download_path = os.path.abspath(download_path)
+        self.on_removed = on_removed
+        self.batch_size = max(1, int(batch_size or 1))
+        self.flush_interval = flush_interval
+
+        # Pending removals as (file_key, local_path, queued time, callback)
+        self.pending = []
+        self.removed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.pruned = 0
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Function to start the background removal thread.
+        """
+        self._thread = threading.Thread(
+            target=self._run, name="local-file-remover", daemon=True
+        )
+        self._thread.start()
+
+    def remove(
+        self,
+        file_key: str,
+        local_path: str,
+        callback: Callable[[str, bool], None] = None,
+        queued_time: float = None,
+    ) -> None:
+        """
+        Function to queue the removal of a local file. Files modified after the queued time, such as a newer
+        download of the same key, are kept. The callback is called with the key and whether it was removed.
+        """
+        with self._condition:
+            self.pending.append(
+                (file_key, local_path, queued_time or time.time(), callback)
+            )
+            if len(self.pending) >= self.batch_size:
+                self._condition.notify()
+
+    def _run(self) -> None:
+        """
+        Function run by the removal thread, flushing when a batch fills up or the interval elapses.
+        """
+        while True:
+            with self._condition:
+                if not self._stopped and len(self.pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                if self._stopped:
+                    return
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Function to remove every pending file and prune the directories left empty.
+        """
+        with self._condition:
+            pending, self.pending = self.pending, []
+
+        directories = set()
+        for file_key, local_path, queued_time, callback in pending:
+            removed = self._remove_file(file_key, local_path, queued_time)
+            if removed:
+                directories.add(os.path.dirname(os.path.abspath(local_path)))
+            if callback:
+                try:
+                    callback(file_key, removed)
+                except Exception as e:
+                    log.error(f"Error in removal callback of file ({file_key}): {e}")
+
+        self.prune(directories)
+
+    def _remove_file(self, file_key: str, local_path: str, queued_time: float) -> bool:
+        """
+        Function to remove a single file. Returns False if the file was kept.
+        """
+        try:
+            if os.path.getmtime(local_path) > queued_time:
+                # Downloaded again after the removal was queued
+                self.skipped += 1
+                log.info(f"Keeping file ({file_key}) downloaded after it was deleted")
+                return False
+
+            os.remove(local_path)
+            self.removed += 1
+            log.info(f"Removed file ({file_key})")
+
+        except FileNotFoundError:
+            # Already gone, nothing left to do
+            pass
+
+        except Exception as e:
+            self.failed += 1
+            log.error(f"Error removing file ({file_key}): {e}")
+            return False
+
+        if self.on_removed:
+            self.on_removed(file_key)
+        return True
+
+    def prune(self, directories: List[str]) -> None:
+        """
+        Function to remove empty directories, walking up to the download path.
+        """
+        # Deepest first so parents are emptied before they are tried
+        for directory in sorted(directories, key=len, reverse=True):
+            while (
+                directory.startswith(self.download_path + os.sep)
+                and directory != self.download_path
+            ):
+                try:
+                    os.rmdir(directory)
+                    self.pruned += 1
+                except OSError:
+                    # Not empty or already removed
+                    break
+                directory = os.path.dirname(directory)
+
+    def stats(self) -> dict:
+        """
+        Function to return the number of removed, kept and failed files and pruned directories.
+        """
+        return {
+            "removed": self.removed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "pruned": self.pruned,
+            "pending": len(self.pending),
+        }
+
+    def stop(self) -> None:
+        """
+        Function to stop the removal thread and remove anything still pending.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+
+        self.flush()
+        log.info(f"Local file remover: {self.stats()}")
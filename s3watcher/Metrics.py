@@ -0,0 +1,402 @@
+"""
+Metrics Module
+"""
+
+import multiprocessing as mp
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List, Sequence
+from s3watcher import log
+
+
+class Metric:
+    """
+    Base class of metrics kept in shared memory, so the poll and download processes update the same values.
+    Metrics must be created before the processes are started. An optional single label takes a fixed set of
+    values.
+    """
+
+    metric_type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label: str = None,
+        label_values: Sequence[str] = (),
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.label_values = list(label_values) if label else [None]
+        self._lock = mp.Lock()
+
+    def _index(self, label_value: str = None) -> int:
+        """
+        Function to get the position of a label value.
+        """
+        return self.label_values.index(label_value)
+
+    def _labels(self, label_value: str = None, **extra: str) -> str:
+        """
+        Function to format the labels of a sample.
+        """
+        labels = [f'{self.label}="{label_value}"'] if self.label else []
+        labels.extend(f'{key}="{value}"' for key, value in extra.items())
+        return "{" + ",".join(labels) + "}" if labels else ""
+
+    def samples(self) -> List[str]:
+        """
+        Function to get the exposition lines of the metric samples.
+        """
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """
+        Function to render the metric in the Prometheus text format.
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing counter
+    """
+
+    metric_type = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        """
+        Class Constructor
+        """
+        super().__init__(*args, **kwargs)
+        self.values = mp.RawArray("d", len(self.label_values))
+
+    def inc(self, amount: float = 1, label_value: str = None) -> None:
+        """
+        Function to increase the counter.
+        """
+        index = self._index(label_value)
+        with self._lock:
+            self.values[index] += amount
+
+    def get(self, label_value: str = None) -> float:
+        """
+        Function to get the current value.
+        """
+        return self.values[self._index(label_value)]
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{self._labels(label_value)} {self.values[i]}"
+            for i, label_value in enumerate(self.label_values)
+        ]
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down
+    """
+
+    metric_type = "gauge"
+
+    def set(self, value: float, label_value: str = None) -> None:
+        """
+        Function to set the value.
+        """
+        index = self._index(label_value)
+        with self._lock:
+            self.values[index] = value
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in cumulative buckets
+    """
+
+    metric_type = "histogram"
+
+    # Seconds, suited to request and transfer latencies
+    default_buckets = (
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+        30,
+        60,
+        300,
+    )
+
+    def __init__(self, *args, buckets: Sequence[float] = None, **kwargs) -> None:
+        """
+        Class Constructor
+        """
+        super().__init__(*args, **kwargs)
+        self.buckets = list(buckets or self.default_buckets)
+
+        # Per label value, a count per bucket plus +Inf, then the sum
+        self.width = len(self.buckets) + 2
+        self.values = mp.RawArray("d", len(self.label_values) * self.width)
+
+    def observe(self, value: float, label_value: str = None) -> None:
+        """
+        Function to record an observed value.
+        """
+        offset = self._index(label_value) * self.width
+        bucket = len(self.buckets)
+        for i, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                bucket = i
+                break
+
+        with self._lock:
+            self.values[offset + bucket] += 1
+            self.values[offset + self.width - 1] += value
+
+    @contextmanager
+    def time(self, label_value: str = None) -> Iterator[None]:
+        """
+        Function to observe the duration of a block of code.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, label_value)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for index, label_value in enumerate(self.label_values):
+            offset = index * self.width
+            with self._lock:
+                values = self.values[offset : offset + self.width]
+
+            cumulative = 0
+            for upper_bound, count in zip(self.buckets + ["+Inf"], values[:-1]):
+                cumulative += count
+                labels = self._labels(label_value, le=upper_bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(label_value)} {values[-1]}")
+            lines.append(f"{self.name}_count{self._labels(label_value)} {cumulative}")
+        return lines
+
+
+class PipelineMetrics:
+    """
+    Class to hold the metrics of the pipeline and serve them over HTTP for Prometheus
+    """
+
+    stages = [
+        "receive",
+        "parse",
+        "download",
+        "delete",
+        "notification",
+        "timestream",
+    ]
+
+    traffic_classes = ["live", "backfill"]
+
+    clients = ["sqs", "s3", "s3_transfer"]
+
+    def __init__(self, watches: Sequence[str] = ()) -> None:
+        """
+        Class Constructor
+        """
+        self.watches = list(watches)
+
+        self.messages_received = Counter(
+            "s3watcher_messages_received_total", "SQS messages received"
+        )
+        self.messages_deleted = Counter(
+            "s3watcher_messages_deleted_total",
+            "SQS messages deleted after processing",
+        )
+        self.events_coalesced = Counter(
+            "s3watcher_events_coalesced_total",
+            "Events acknowledged without processing because a newer event of the same key replaced them",
+        )
+        self.events_filtered = Counter(
+            "s3watcher_events_filtered_total",
+            "Events acknowledged without processing because the key filter excludes their key",
+        )
+        self.events_deferred = Counter(
+            "s3watcher_events_deferred_total",
+            "Events put back on the queue while another instance downloads a different version of their key",
+        )
+        self.queue_depth = Gauge(
+            "s3watcher_queue_depth",
+            "Approximate number of messages waiting in the queue",
+        )
+        self.events_waiting = Gauge(
+            "s3watcher_events_waiting",
+            "Received events waiting for a download worker, the poller holds off receiving while too many wait",
+        )
+        self.event_lag = Histogram(
+            "s3watcher_event_lag_seconds",
+            "Seconds from an event being sent to the queue until it is processed",
+            buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+        )
+        self.downloads = Counter(
+            "s3watcher_downloads_total",
+            "Files downloaded",
+            label="traffic_class",
+            label_values=self.traffic_classes,
+        )
+        self.download_bytes = Counter(
+            "s3watcher_download_bytes_total",
+            "Bytes downloaded",
+            label="traffic_class",
+            label_values=self.traffic_classes,
+        )
+        self.stage_duration = Histogram(
+            "s3watcher_stage_duration_seconds",
+            "Seconds spent in each stage of processing",
+            label="stage",
+            label_values=self.stages,
+        )
+        self.retries = Counter(
+            "s3watcher_retries_total",
+            "Operations retried",
+            label="stage",
+            label_values=self.stages,
+        )
+        self.failures = Counter(
+            "s3watcher_failures_total",
+            "Operations that failed",
+            label="stage",
+            label_values=self.stages,
+        )
+        self.http_requests = Counter(
+            "s3watcher_http_requests_total",
+            "HTTP requests sent through the connection pool of each client",
+            label="client",
+            label_values=self.clients,
+        )
+        self.http_connections = Counter(
+            "s3watcher_http_connections_total",
+            "HTTP connections opened by the connection pool of each client",
+            label="client",
+            label_values=self.clients,
+        )
+
+        # Per watch, when the process watches more than one queue
+        self.watch_messages_received = Counter(
+            "s3watcher_watch_messages_received_total",
+            "SQS messages received by each watch",
+            label="watch",
+            label_values=self.watches,
+        )
+        self.watch_queue_depth = Gauge(
+            "s3watcher_watch_queue_depth",
+            "Approximate number of messages waiting in the queue of each watch",
+            label="watch",
+            label_values=self.watches,
+        )
+        self.watch_downloads = Counter(
+            "s3watcher_watch_downloads_total",
+            "Files downloaded by each watch",
+            label="watch",
+            label_values=self.watches,
+        )
+        self.watch_download_bytes = Counter(
+            "s3watcher_watch_download_bytes_total",
+            "Bytes downloaded by each watch",
+            label="watch",
+            label_values=self.watches,
+        )
+
+        self.metrics = [
+            self.messages_received,
+            self.messages_deleted,
+            self.events_coalesced,
+            self.events_filtered,
+            self.events_deferred,
+            self.queue_depth,
+            self.events_waiting,
+            self.event_lag,
+            self.downloads,
+            self.download_bytes,
+            self.stage_duration,
+            self.retries,
+            self.failures,
+            self.http_requests,
+            self.http_connections,
+        ]
+        if len(self.watches) > 1:
+            self.metrics.extend(
+                [
+                    self.watch_messages_received,
+                    self.watch_queue_depth,
+                    self.watch_downloads,
+                    self.watch_download_bytes,
+                ]
+            )
+        self.server = None
+
+    def render(self) -> str:
+        """
+        Function to render every metric in the Prometheus text format.
+        """
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+    def start_server(self, port: int) -> None:
+        """
+        Function to serve the metrics on /metrics from a background thread.
+        """
+        metrics = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                # Scrapes are too frequent to log
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer(("", port), MetricsRequestHandler)
+            self.server.daemon_threads = True
+            threading.Thread(
+                target=self.server.serve_forever, name="metrics-server", daemon=True
+            ).start()
+            log.info(f"Serving metrics on port {port}")
+
+        except Exception as e:
+            log.error(f"Error starting metrics server on port {port}: {e}")
+            self.server = None
+
+    def stop_server(self) -> None:
+        """
+        Function to stop serving the metrics.
+        """
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -0,0 +1,153 @@
+"""
+Parallel Bucket Lister Module
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Iterator, List, Tuple
+from s3watcher import log
+
+
+class ParallelBucketLister:
+    """
+    Class to list a bucket prefix as several sub-prefix shards concurrently, yielding a single stream of pages
+    """
+
+    def __init__(
+        self,
+        get_s3_client: Callable[[], Any],
+        bucket_name: str,
+        prefix: str = "",
+        shard_prefixes: List[str] = None,
+        max_workers: int = 8,
+        discovery_depth: int = 1,
+        skip_prefix: Callable[[str], bool] = None,
+        split_prefix: Callable[[str], bool] = None,
+    ) -> None:
+        """
+        Class Constructor, skip_prefix tells which prefixes are left out and split_prefix which prefixes hold a
+        prefix that is left out
+        """
+        self.get_s3_client = get_s3_client
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.shard_prefixes = shard_prefixes or []
+        self.max_workers = max(1, int(max_workers or 1))
+        self.discovery_depth = discovery_depth
+        self.skip_prefix = skip_prefix
+        self.split_prefix = split_prefix
+        self.errors = 0
+
+    def discover_shards(self) -> Tuple[List[str], List[dict]]:
+        """
+        Function to split the prefix into sub-prefix shards using Delimiter="/". Returns the shards and the
+        objects found directly under the prefixes that were expanded.
+        """
+        objects = []
+
+        # Shards given by the user are not discovered
+        if self.shard_prefixes:
+            shards = [self.prefix + shard for shard in self.shard_prefixes]
+        else:
+            shards = [self.prefix]
+            for _ in range(self.discovery_depth):
+                sub_prefixes = []
+                for shard in shards:
+                    shard_prefixes, shard_objects = self.list_level(shard)
+                    sub_prefixes.extend(shard_prefixes)
+                    objects.extend(shard_objects)
+                shards = sub_prefixes
+                if not shards:
+                    break
+
+        # Shards holding an excluded subtree are listed by their sub-prefixes down to it
+        split_shards = []
+        while shards:
+            shard = shards.pop()
+            if self.split_prefix and self.split_prefix(shard):
+                shard_prefixes, shard_objects = self.list_level(shard)
+                shards.extend(shard_prefixes)
+                objects.extend(shard_objects)
+            else:
+                split_shards.append(shard)
+
+        return split_shards, objects
+
+    def list_level(self, prefix: str) -> Tuple[List[str], List[dict]]:
+        """
+        Function to list one level of a prefix using Delimiter="/". Returns the sub-prefixes that are not
+        skipped and the objects directly under the prefix.
+        """
+        sub_prefixes = []
+        objects = []
+        paginator = self.get_s3_client().get_paginator("list_objects_v2")
+        for page in paginator.paginate(
+            Bucket=self.bucket_name, Prefix=prefix, Delimiter="/"
+        ):
+            objects.extend(page.get("Contents", []))
+            sub_prefixes.extend(
+                common_prefix["Prefix"]
+                for common_prefix in page.get("CommonPrefixes", [])
+                # Excluded subtrees are never listed
+                if not (self.skip_prefix and self.skip_prefix(common_prefix["Prefix"]))
+            )
+        return sub_prefixes, objects
+
+    def _list_shards(self, shards: "queue.Queue", pages: "queue.Queue") -> None:
+        """
+        Function run by each lister thread to list shards until none are left.
+        """
+        while True:
+            try:
+                shard = shards.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                paginator = self.get_s3_client().get_paginator("list_objects_v2")
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix=shard):
+                    pages.put(page.get("Contents", []))
+
+            except Exception as e:
+                self.errors += 1
+                log.error(
+                    f"Error listing prefix ({shard}) of bucket ({self.bucket_name}): {e}"
+                )
+
+        # None tells the consumer this thread is done
+        pages.put(None)
+
+    def iter_pages(self) -> Iterator[List[dict]]:
+        """
+        Function to iterate over pages of objects from every shard as they are listed.
+        """
+        shard_list, objects = self.discover_shards()
+        if objects:
+            yield objects
+
+        log.info(
+            f"Listing bucket ({self.bucket_name}) prefix ({self.prefix}) as {len(shard_list)} shards"
+        )
+
+        shards = queue.Queue()
+        for shard in shard_list:
+            shards.put(shard)
+
+        # Bounded so listing cannot run far ahead of the consumer
+        pages = queue.Queue(maxsize=self.max_workers * 2)
+        workers = min(self.max_workers, len(shard_list))
+        for i in range(workers):
+            threading.Thread(
+                target=self._list_shards,
+                args=(shards, pages),
+                name=f"s3watcher-lister-{i}",
+                daemon=True,
+            ).start()
+
+        finished = 0
+        while finished < workers:
+            page = pages.get()
+            if page is None:
+                finished += 1
+            else:
+                yield page
@@ -0,0 +1,184 @@
+"""
+Priority Scheduler Module
+"""
+
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict
+from s3watcher.RateLimiter import BACKFILL, LIVE
+
+
+class PriorityScheduler:
+    """
+    Class to order download work by priority level with aging, so lower priority work is never starved.
+    Level 0 is the most urgent. Tasks of the same level are taken in turns from each fairness group, such as
+    the watch they belong to.
+    """
+
+    max_level = 5
+
+    # Base level of each traffic class
+    base_levels = {LIVE: 1, BACKFILL: 3}
+
+    def __init__(
+        self,
+        prefix_levels: Dict[str, int] = None,
+        large_object_size: int = 0,
+        aging_interval: float = 60,
+        max_backfill_pending: int = 100,
+        fair_key: Callable[[Any], str] = None,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        # Longest prefixes are matched first
+        self.prefix_levels = sorted(
+            (prefix_levels or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self.large_object_size = large_object_size
+        self.aging_interval = aging_interval
+        self.max_backfill_pending = max_backfill_pending
+        self.fair_key = fair_key
+
+        # Waiting tasks per level and fairness group as heaps of (waiting since, sequence, task), oldest first
+        self.levels = [{} for _ in range(self.max_level + 1)]
+
+        # Fairness groups of each level in the order they take their turns
+        self.turns = [deque() for _ in range(self.max_level + 1)]
+        self._sequence = itertools.count()
+        self.closed = False
+        self.size = 0
+        self.backfill_pending = 0
+        self.scheduled = [0] * (self.max_level + 1)
+        self._condition = threading.Condition()
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def live_size(self) -> int:
+        """
+        Number of waiting tasks that are not backfill
+        """
+        return self.size - self.backfill_pending
+
+    def classify(self, task: Any) -> int:
+        """
+        Function to get the priority level of a task from its traffic class, key prefix and size.
+        """
+        traffic_class = getattr(task, "traffic_class", LIVE)
+        level = self.base_levels[traffic_class]
+
+        file_key = task.file_key or ""
+        for prefix, prefix_level in self.prefix_levels:
+            if file_key.startswith(prefix):
+                level = prefix_level + (level - self.base_levels[LIVE])
+                break
+
+        # Large objects make way for small ones
+        size = getattr(task, "size", None)
+        if self.large_object_size and size and size > self.large_object_size:
+            level += 1
+
+        return min(self.max_level, max(0, level))
+
+    def put(self, task: Any) -> None:
+        """
+        Function to add a task. Backfill tasks block while too many are already waiting. None closes the
+        scheduler, after which every caller of get is handed None and new tasks are dropped.
+        """
+        with self._condition:
+            if task is None:
+                self.closed = True
+                self._condition.notify_all()
+                return
+
+            traffic_class = getattr(task, "traffic_class", LIVE)
+            if traffic_class == BACKFILL:
+                while (
+                    self.backfill_pending >= self.max_backfill_pending
+                    and not self.closed
+                ):
+                    self._condition.wait()
+                if not self.closed:
+                    self.backfill_pending += 1
+
+            if self.closed:
+                return
+
+            # Live events have been waiting since they were sent to the queue
+            waiting_since = getattr(task, "sent_timestamp", None) or time.time()
+
+            level = self.classify(task)
+            group = self.fair_key(task) if self.fair_key else None
+            if group not in self.levels[level]:
+                self.levels[level][group] = []
+                self.turns[level].append(group)
+
+            heapq.heappush(
+                self.levels[level][group],
+                (waiting_since, next(self._sequence), task),
+            )
+            self.size += 1
+            self._condition.notify_all()
+
+    def get(self, timeout: float = None) -> Any:
+        """
+        Function to take the task with the best aged priority, blocking until one is available or raising
+        queue.Empty once the timeout passes. Returns None once the scheduler is closed, leaving the tasks still
+        waiting.
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self.size or self.closed, timeout=timeout
+            ):
+                raise queue.Empty
+
+            if self.closed:
+                return None
+
+            # Every aging interval a task waits moves it up one level
+            now = time.time()
+            best_level = None
+            best_score = None
+            for level, groups in enumerate(self.levels):
+                heads = [tasks[0][0] for tasks in groups.values() if tasks]
+                if heads:
+                    waited = now - min(heads)
+                    score = level - (
+                        waited / self.aging_interval if self.aging_interval else 0
+                    )
+                    if best_score is None or score < best_score:
+                        best_level, best_score = level, score
+
+            # Take the next group in turn that has a task waiting at the level
+            groups, turns = self.levels[best_level], self.turns[best_level]
+            while not groups[turns[0]]:
+                turns.rotate(-1)
+            _, _, task = heapq.heappop(groups[turns[0]])
+            turns.rotate(-1)
+            self.size -= 1
+            self.scheduled[best_level] += 1
+
+            if getattr(task, "traffic_class", LIVE) == BACKFILL:
+                self.backfill_pending -= 1
+                self._condition.notify_all()
+
+            return task
+
+    def stats(self) -> dict:
+        """
+        Function to return the number of waiting and scheduled tasks per level.
+        """
+        with self._condition:
+            return {
+                "waiting": [
+                    sum(len(tasks) for tasks in groups.values())
+                    for groups in self.levels
+                ],
+                "scheduled": list(self.scheduled),
+            }
@@ -0,0 +1,93 @@
+"""
+Rate Limiter Module
+"""
+
+import threading
+import time
+from typing import Callable
+
+LIVE = "live"
+BACKFILL = "backfill"
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket, a rate of 0 disables the limit
+    """
+
+    def __init__(self, rate: float, capacity: float = None) -> None:
+        """
+        Class Constructor
+        """
+        self.rate = rate or 0
+        # Allow a burst of one second worth of tokens by default
+        self.capacity = capacity or self.rate
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> None:
+        """
+        Function to take tokens from the bucket, sleeping until they are available. Amounts larger than the
+        bucket put it into debt that later callers wait out, so large requests are never starved.
+        """
+        if not self.rate:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.last_refill) * self.rate
+            )
+            self.last_refill = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+            self.waited += wait
+
+        if wait:
+            time.sleep(wait)
+
+
+class TransferLimiter:
+    """
+    Class to hold the process-wide bandwidth and request rate budgets of live and backfill downloads
+    """
+
+    def __init__(
+        self,
+        live_bandwidth: float = 0,
+        live_request_rate: float = 0,
+        backfill_bandwidth: float = 0,
+        backfill_request_rate: float = 0,
+    ) -> None:
+        """
+        Class Constructor, bandwidths are in bytes per second and request rates in requests per second
+        """
+        self.bandwidth = {
+            LIVE: TokenBucket(live_bandwidth),
+            BACKFILL: TokenBucket(backfill_bandwidth),
+        }
+        self.requests = {
+            LIVE: TokenBucket(live_request_rate),
+            BACKFILL: TokenBucket(backfill_request_rate),
+        }
+
+    def acquire_requests(self, traffic_class: str, amount: int = 1) -> None:
+        """
+        Function to wait until a number of requests may be sent.
+        """
+        self.requests[traffic_class].acquire(amount)
+
+    def acquire_bytes(self, traffic_class: str, amount: int) -> None:
+        """
+        Function to wait until a number of bytes may be transferred.
+        """
+        self.bandwidth[traffic_class].acquire(amount)
+
+    def bytes_callback(self, traffic_class: str) -> Callable[[int], None]:
+        """
+        Function to get a transfer progress callback that throttles to the bandwidth budget.
+        """
+        bucket = self.bandwidth[traffic_class]
+        return bucket.acquire if bucket.rate else None
@@ -0,0 +1,98 @@
+"""
+Receive Scheduler Module
+"""
+
+import math
+import threading
+import time
+from typing import Callable
+from s3watcher import log
+
+
+class ReceiveScheduler:
+    """
+    Class to decide how many concurrent SQS receives to issue and how long to wait between rounds. Receives
+    follow the queue depth, within the number of events the consumer has room for.
+    """
+
+    def __init__(
+        self,
+        get_queue_depth: Callable[[], int],
+        get_free_capacity: Callable[[], int] = None,
+        max_receivers: int = 4,
+        batch_size: int = 10,
+        wait_time_seconds: int = 20,
+        depth_refresh_interval: float = 10,
+        min_backoff: float = 0.25,
+        max_backoff: float = 20,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.get_queue_depth = get_queue_depth
+        self.get_free_capacity = get_free_capacity
+        self.max_receivers = max(1, int(max_receivers or 1))
+        self.batch_size = batch_size
+        self.wait_time_seconds = wait_time_seconds
+        self.depth_refresh_interval = depth_refresh_interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+
+        self.queue_depth = 0
+        self.last_depth_refresh = 0.0
+        self.empty_rounds = 0
+        self.current_receivers = 1
+        self._lock = threading.Lock()
+
+    def receivers(self) -> int:
+        """
+        Function to get the number of concurrent receives for the next round, 0 while the consumer has no
+        room for more events.
+        """
+        with self._lock:
+            if time.time() - self.last_depth_refresh >= self.depth_refresh_interval:
+                self.last_depth_refresh = time.time()
+                self.queue_depth = self.get_queue_depth()
+                target = math.ceil(self.queue_depth / self.batch_size)
+                target = min(self.max_receivers, max(1, target))
+                if target != self.current_receivers:
+                    log.info(
+                        f"Queue depth is {self.queue_depth}, using {target} concurrent receives"
+                    )
+                self.current_receivers = target
+
+            if self.get_free_capacity is None:
+                return self.current_receivers
+
+        # Receiving more than the downloads keep up with only lets messages wait out their visibility
+        free = max(0, self.get_free_capacity())
+        return min(self.current_receivers, math.ceil(free / self.batch_size))
+
+    def next_delay(self, received: int) -> float:
+        """
+        Function to record how many messages the last round received and return the seconds to wait
+        before the next round.
+        """
+        with self._lock:
+            if received > 0:
+                self.empty_rounds = 0
+
+                # Every receive came back full, the queue is likely deeper than last measured
+                if received >= self.current_receivers * self.batch_size:
+                    self.current_receivers = min(
+                        self.max_receivers, self.current_receivers * 2
+                    )
+                return 0
+
+            self.empty_rounds += 1
+
+            # Fall back to a single receiver while the queue is empty
+            self.current_receivers = 1
+
+            # Long polling already waited on the server side
+            if self.wait_time_seconds > 0:
+                return 0
+
+            return min(
+                self.max_backoff, self.min_backoff * 2 ** (self.empty_rounds - 1)
+            )
@@ -0,0 +1,34 @@
+"""
+Reloading Credential Provider Module
+"""
+
+from typing import Callable
+from botocore.credentials import CredentialProvider, RefreshableCredentials
+
+
+class ReloadingCredentialProvider(CredentialProvider):
+    """
+    Class to provide credentials that botocore refreshes in place by calling a loader, registered on a
+    session through its credential resolver instead of replacing the session's credentials.
+    """
+
+    METHOD = "custom-reloading"
+    CANONICAL_NAME = "custom-reloading"
+
+    def __init__(self, load_credentials: Callable[[], dict], method: str) -> None:
+        """
+        Class Constructor
+        """
+        super().__init__()
+        self.load_credentials = load_credentials
+        self.method = method
+
+    def load(self) -> RefreshableCredentials:
+        """
+        Function to load the credentials, reloaded by botocore shortly before the expiry the loader returns.
+        """
+        return RefreshableCredentials.create_from_metadata(
+            metadata=self.load_credentials(),
+            refresh_using=self.load_credentials,
+            method=self.method,
+        )
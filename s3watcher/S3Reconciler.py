@@ -0,0 +1,329 @@
+"""
+S3 Reconciliation Module
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Set
+from s3watcher import log
+from s3watcher.AtomicDownloader import AtomicDownloader
+from s3watcher.DownloadClaims import DownloadClaims
+from s3watcher.ParallelBucketLister import ParallelBucketLister
+from s3watcher.RateLimiter import BACKFILL
+
+
+class BackfillTask:
+    """
+    Class to hold a key found missing by reconciliation, downloaded by the same workers as live events
+    """
+
+    traffic_class = BACKFILL
+
+    def __init__(
+        self,
+        s3_object: dict,
+        callback: Callable[[Any, bool], None] = None,
+        watch: str = None,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.file_key = s3_object["Key"]
+        self.size = s3_object["Size"]
+        self.etag = s3_object["ETag"].strip('"')
+        self.last_modified = s3_object["LastModified"]
+        self.callback = callback
+        self.watch = watch
+
+    def __repr__(self) -> str:
+        return f"BackfillTask({self.file_key}, {self.size}, {self.etag})"
+
+    def done(self, success: bool) -> None:
+        """
+        Function to report the result of the download.
+        """
+        if self.callback:
+            self.callback(self, success)
+
+
+class S3Reconciler:
+    """
+    Class to stream the bucket listing against the download path and schedule downloads of missing or outdated keys
+    """
+
+    def __init__(
+        self,
+        queue_handler: Any,
+        list_concurrency: int = 8,
+        shard_prefixes: List[str] = None,
+        progress_interval: float = 30,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.queue_handler = queue_handler
+        self.list_concurrency = list_concurrency
+        self.shard_prefixes = shard_prefixes
+        self.progress_interval = progress_interval
+
+        self.listed = 0
+        self.filtered = 0
+        self.local = 0
+        self.submitted = 0
+        self.downloaded = 0
+        self.failed = 0
+        self.removed = 0
+        self.lister = None
+
+        # Prefixes under the watched folder the listing is narrowed to, None for the whole folder
+        self.list_prefixes = self.queue_handler.key_filter.list_prefixes(
+            shard_prefixes
+        )
+        self._condition = threading.Condition()
+
+    @property
+    def prefix(self) -> str:
+        """
+        Prefix of the watched folder in the bucket
+        """
+        folder = self.queue_handler.folder
+        return f"{folder}/" if folder not in [None, ""] else ""
+
+    def other_download_paths(self) -> Set[str]:
+        """
+        Function to get the download paths of the other watches of the process, which may be nested in this
+        watch's download path.
+        """
+        handlers = (self.queue_handler.shared or self.queue_handler).watch_handlers
+        return {
+            os.path.normpath(handler.download_path)
+            for handler in handlers.values()
+            if handler.download_path != self.queue_handler.download_path
+        }
+
+    def scan_local(self) -> Set[str]:
+        """
+        Function to get the path of every file in the download path relative to it, leaving out the download
+        paths of other watches.
+        """
+        local_keys = set()
+        other_paths = self.other_download_paths()
+        directories = [(self.queue_handler.download_path, "")]
+
+        while directories:
+            directory, relative = directories.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if DownloadClaims.is_claim_path(relative + entry.name):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            if os.path.normpath(entry.path) in other_paths:
+                                continue
+                            directories.append(
+                                (entry.path, f"{relative}{entry.name}/")
+                            )
+                        elif entry.is_file() and not AtomicDownloader.is_part_file(
+                            entry.name
+                        ):
+                            local_keys.add(relative + entry.name)
+
+            except OSError as e:
+                log.error(f"Error scanning directory ({directory}): {e}")
+
+        return local_keys
+
+    def iter_pages(self) -> Iterator[List[dict]]:
+        """
+        Function to iterate over the pages of the bucket listing under the watched folder.
+        """
+        key_filter = self.queue_handler.key_filter
+        prefix_length = len(self.prefix)
+        self.lister = ParallelBucketLister(
+            self.queue_handler.get_s3_client,
+            self.queue_handler.bucket_name,
+            prefix=self.prefix,
+            shard_prefixes=self.list_prefixes,
+            max_workers=self.list_concurrency,
+            skip_prefix=lambda prefix: key_filter.excludes_prefix(
+                prefix[prefix_length:]
+            ),
+            split_prefix=lambda prefix: key_filter.splits_prefix(
+                prefix[prefix_length:]
+            ),
+        )
+
+        # The key filter rules out every shard
+        if self.list_prefixes == []:
+            log.info(
+                f"No keys of bucket ({self.queue_handler.bucket_name}) are selected by the key filter"
+            )
+            return
+
+        yield from self.lister.iter_pages()
+
+    def needs_download(self, key: str, s3_object: dict, local_keys: Set[str]) -> bool:
+        """
+        Function to check whether a listed object is missing locally or outdated.
+        """
+        if key not in local_keys:
+            return True
+
+        # Re-download local copies of an older version than the bucket's
+        manifest = self.queue_handler.manifest
+        if manifest:
+            entry = manifest.get(
+                self.queue_handler.download_path,
+                self.queue_handler.bucket_name,
+                s3_object["Key"],
+            )
+            if entry and entry["etag"] != s3_object["ETag"].strip('"'):
+                return True
+
+        return False
+
+    def _download_done(self, task: BackfillTask, success: bool) -> None:
+        """
+        Function to count the result of a finished download.
+        """
+        with self._condition:
+            if success:
+                self.downloaded += 1
+            else:
+                self.failed += 1
+            self._condition.notify_all()
+
+    def was_downloaded(self, key: str) -> bool:
+        """
+        Function to check whether a local file was downloaded by this watch, as recorded in its manifest.
+        """
+        entry = self.queue_handler.manifest.get(
+            self.queue_handler.download_path,
+            self.queue_handler.bucket_name,
+            self.prefix + key,
+        )
+        return (
+            entry is not None
+            and entry["local_path"] == self.queue_handler.download_path + key
+        )
+
+    def remove_local_only(self, local_keys: Set[str], start_time: float) -> None:
+        """
+        Function to remove local files whose objects are no longer in the bucket. Only files this watch
+        downloaded are removed, other files in the download path are left alone.
+        """
+        key_filter = self.queue_handler.key_filter
+        for key in local_keys:
+            # Only the listed prefixes are known to be complete
+            if self.list_prefixes is not None and not any(
+                key.startswith(shard) for shard in self.list_prefixes
+            ):
+                continue
+
+            # Files the key filter excludes are not mirrored, so they are left alone
+            if not key_filter.matches_key(key):
+                continue
+
+            if not self.was_downloaded(key):
+                continue
+
+            # Files downloaded after the scan started are kept by the remover
+            self.removed += 1
+            self.queue_handler.remove_local_file(
+                self.prefix + key, queued_time=start_time
+            )
+
+    def log_progress(self, start_time: float) -> None:
+        """
+        Function to log the reconciliation progress.
+        """
+        elapsed = max(time.time() - start_time, 1e-9)
+        log.info(
+            f"Reconciling bucket ({self.queue_handler.bucket_name}): listed {self.listed} keys "
+            f"({self.listed / elapsed:.0f}/s), {self.filtered} filtered, {self.local} local files, {self.submitted} to download, "
+            f"{self.downloaded} downloaded, {self.failed} failed, {self.removed} to remove"
+        )
+
+    def run(self) -> None:
+        """
+        Function to download every key in the bucket that is missing from the download path, and to remove
+        local files no longer in the bucket when deletes are allowed.
+        """
+        log.info(
+            f"Checking with S3 bucket ({self.queue_handler.bucket_name}) against ({self.queue_handler.download_path})"
+        )
+        start_time = time.time()
+        local_keys = self.scan_local()
+        self.local = len(local_keys)
+        log.info(
+            f"Keys in download path ({self.queue_handler.download_path}): {self.local}"
+        )
+
+        prefix_length = len(self.prefix)
+        last_progress = time.time()
+        listed = False
+        try:
+            for page in self.iter_pages():
+                for s3_object in page:
+                    key = s3_object["Key"][prefix_length:]
+                    if key == "" or key.endswith("/"):
+                        continue
+
+                    self.listed += 1
+                    if not self.queue_handler.key_filter.matches(
+                        s3_object["Key"], s3_object["Size"]
+                    ):
+                        # Local copies of excluded keys are kept
+                        self.filtered += 1
+                        local_keys.discard(key)
+                        continue
+
+                    if self.needs_download(key, s3_object, local_keys):
+                        # Blocks while enough backfill downloads are already waiting
+                        self.submitted += 1
+                        self.queue_handler.submit_task(
+                            BackfillTask(
+                                s3_object,
+                                self._download_done,
+                                watch=self.queue_handler.watch_name,
+                            )
+                        )
+
+                    # Whatever is left in local_keys is not in the bucket
+                    local_keys.discard(key)
+
+                if time.time() - last_progress >= self.progress_interval:
+                    last_progress = time.time()
+                    self.log_progress(start_time)
+
+            listed = not self.lister.errors
+
+        except Exception as e:
+            log.error(
+                f"Error getting keys from bucket ({self.queue_handler.bucket_name}): {e}"
+            )
+
+        # Propagate deletes only after a complete listing, to files the manifest shows this watch downloaded
+        if self.queue_handler.remover and local_keys:
+            if not self.queue_handler.manifest:
+                log.info(
+                    f"Not removing {len(local_keys)} local files, there is no download manifest recording which ones were downloaded"
+                )
+            elif listed:
+                self.remove_local_only(local_keys, start_time)
+            else:
+                log.error(
+                    f"Not removing {len(local_keys)} local files, the bucket listing was incomplete"
+                )
+
+        # Wait for the scheduled downloads to finish
+        with self._condition:
+            while self.downloaded + self.failed < self.submitted:
+                if not self._condition.wait(self.progress_interval):
+                    self.log_progress(start_time)
+
+        self.log_progress(start_time)
+        log.info(
+            f"Finished checking with S3 bucket ({self.queue_handler.bucket_name}) in {time.time() - start_time:.1f}s"
+        )
@@ -1,28 +1,93 @@
 import json
-from typing import Any
+from typing import Any, Iterator, List
 from urllib.parse import unquote_plus
 from s3watcher import log
 
 
-class SQSHandlerEvent:
-    def __init__(self, sqs_client: Any, sqs_message: dict, queue_url: str) -> None:
+class SQSMessage:
+    """
+    Class to hold a received SQS message shared by the events parsed from its records
+    """
+
+    def __init__(self, sqs_message: dict, queue_url: str) -> None:
         """
         Class Constructor
         """
         self.message_id = sqs_message.get("MessageId")
         self.receipt_handle = sqs_message.get("ReceiptHandle")
-        message_body = json.loads(sqs_message.get("Body"))
         self.queue_url = queue_url
-        self.file_key = self.get_file_key(sqs_client, message_body)
-        self.event_type = self.get_event_type(sqs_client, message_body)
+        self.sent_timestamp = self.get_sent_timestamp(sqs_message)
+        self.receive_count = self.get_receive_count(sqs_message)
+
+        # Events of this message not yet acknowledged, the message is deleted once it reaches 0
+        self.pending = 0
 
     def __repr__(self) -> str:
-        return f"SQSHandlerEvent({self.message_id}, {self.receipt_handle}, {self.file_key}, {self.event_type})"
+        return f"SQSMessage({self.message_id}, {self.pending} pending)"
+
+    @staticmethod
+    def get_sent_timestamp(sqs_message: dict) -> float:
+        # Parse the time the message was sent to the queue, in seconds since the epoch
+        try:
+            return int(sqs_message.get("Attributes", {}).get("SentTimestamp")) / 1000
+        except Exception:
+            return None
+
+    @staticmethod
+    def get_receive_count(sqs_message: dict) -> int:
+        # Parse how many times the message has been received, including this time
+        try:
+            return int(sqs_message.get("Attributes", {}).get("ApproximateReceiveCount"))
+        except Exception:
+            return 1
+
+
+class SQSHandlerEvent:
+    """
+    Class to hold a single S3 object event parsed from an SQS message. A message can carry several events.
+    """
+
+    __slots__ = (
+        "message",
+        "record_index",
+        "event_type",
+        "file_key",
+        "bucket_name",
+        "size",
+        "etag",
+        "sequencer",
+    )
+
+    def __init__(
+        self,
+        message: SQSMessage,
+        record_index: int = 0,
+        event_type: str = None,
+        file_key: str = None,
+        bucket_name: str = None,
+        size: int = None,
+        etag: str = None,
+        sequencer: str = None,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.message = message
+        self.record_index = record_index
+        self.event_type = event_type
+        self.file_key = file_key
+        self.bucket_name = bucket_name
+        self.size = size
+        self.etag = etag.strip('"') if etag else None
+        self.sequencer = sequencer
+
+    def __repr__(self) -> str:
+        return f"SQSHandlerEvent({self.event_id}, {self.receipt_handle}, {self.file_key}, {self.event_type})"
 
     def __eq__(self, __o: object) -> bool:
         if isinstance(__o, SQSHandlerEvent):
             return (
-                self.message_id == __o.message_id
+                self.event_id == __o.event_id
                 and self.receipt_handle == __o.receipt_handle
                 and self.file_key == __o.file_key
                 and self.event_type == __o.event_type
@@ -30,48 +95,163 @@ class SQSHandlerEvent:
         else:
             return False
 
-    def get_file_key(self, sqs_client: Any, message_body: str) -> str:
-        # Parse S3 Object Key from Body
+    @classmethod
+    def from_sqs_message(cls, sqs_message: dict, queue_url: str) -> List[Any]:
+        """
+        Function to parse an SQS message into one event per S3 record. Messages without S3 records, such as
+        S3 test events, or that cannot be parsed give a single event with no event type, so they are still
+        acknowledged by the consumer.
+        """
+        message = SQSMessage(sqs_message, queue_url)
         try:
-            file_key = message_body.get("Records")[0].get("s3").get("object").get("key")
-            file_key = unquote_plus(file_key)  # URL decode
+            records = list(cls.iter_records(json.loads(sqs_message.get("Body"))))
+        except Exception as e:
+            log.error(f"Error parsing SQS message ({message.message_id}): {e}")
+            records = []
 
-        except Exception:
-            file_key = None
+        events = [
+            cls(message, record_index, **record)
+            for record_index, record in enumerate(records)
+        ]
+        if not events:
+            events = [cls(message)]
 
-        # Check if file_key is not None
-        if not file_key:
-            self.delete_message(sqs_client)
-            raise ValueError(
-                "Error Parsing S3 Object Key from SQS Message Body - Removed Event"
-            )
+        message.pending = len(events)
+        return events
 
-        return file_key
+    @classmethod
+    def iter_records(cls, body: dict) -> Iterator[dict]:
+        """
+        Function to get the S3 records of a message body, unwrapping SNS notifications and EventBridge events.
+        """
+        # SNS notification without raw message delivery
+        if body.get("Type") == "Notification" and "Message" in body:
+            yield from cls.iter_records(json.loads(body["Message"]))
+            return
 
-    def get_event_type(self, sqs_client: Any, message_body: str) -> str:
-        # Parse S3 Event Type from Body
-        try:
-            event_type = message_body.get("Records")[0].get("eventName")
-        except Exception:
-            event_type = None
+        # EventBridge event from S3
+        if body.get("source") == "aws.s3" and "detail" in body:
+            record = cls.parse_eventbridge(body)
+            if record:
+                yield record
+            return
 
-        # Check if event_type is not None
-        if not event_type:
-            self.delete_message(sqs_client)
-            raise ValueError(
-                "Error Parsing S3 Event Type from SQS Message Body - Removed Event"
-            )
+        # S3 event notification, a test event has no records
+        for record in body.get("Records") or []:
+            record = cls.parse_record(record)
+            if record:
+                yield record
 
+    @staticmethod
+    def get_event_type(event_name: str) -> str:
         # Check if it is a Object Created/Updated/Deleted Event
-        if "ObjectCreated" in event_type:
+        if "ObjectCreated" in event_name or event_name == "Object Created":
             return "CREATE"
-        elif "ObjectRemoved" in event_type:
+        elif "ObjectRemoved" in event_name or event_name == "Object Deleted":
             return "DELETE"
         else:
-            self.delete_message(sqs_client)
-            raise ValueError(
-                "Error Parsing S3 Event Type from SQS Message Body - Removed Event"
-            )
+            return None
+
+    @classmethod
+    def parse_record(cls, record: dict) -> dict:
+        # Parse the S3 event type, object key and optional bucket name, size, ETag and sequencer of a record
+        try:
+            event_type = cls.get_event_type(record.get("eventName") or "")
+            s3 = record.get("s3") or {}
+            s3_object = s3.get("object") or {}
+            file_key = unquote_plus(s3_object.get("key") or "")  # URL decode
+        except Exception:
+            return None
+
+        if not event_type or not file_key:
+            log.error(f"Error parsing S3 record from SQS message body: {record}")
+            return None
+
+        return {
+            "event_type": event_type,
+            "file_key": file_key,
+            "bucket_name": (s3.get("bucket") or {}).get("name"),
+            "size": s3_object.get("size"),
+            "etag": s3_object.get("eTag"),
+            "sequencer": s3_object.get("sequencer"),
+        }
+
+    @classmethod
+    def parse_eventbridge(cls, body: dict) -> dict:
+        # Parse an EventBridge S3 event, whose object key is not URL encoded
+        try:
+            event_type = cls.get_event_type(body.get("detail-type") or "")
+            detail = body.get("detail") or {}
+            s3_object = detail.get("object") or {}
+            file_key = s3_object.get("key")
+        except Exception:
+            return None
+
+        if not event_type or not file_key:
+            log.error(f"Error parsing EventBridge event from SQS message body: {body}")
+            return None
+
+        return {
+            "event_type": event_type,
+            "file_key": file_key,
+            "bucket_name": (detail.get("bucket") or {}).get("name"),
+            "size": s3_object.get("size"),
+            "etag": s3_object.get("etag"),
+            "sequencer": s3_object.get("sequencer"),
+        }
+
+    @property
+    def message_id(self) -> str:
+        """
+        Id of the SQS message the event was parsed from
+        """
+        return self.message.message_id
+
+    @property
+    def receipt_handle(self) -> str:
+        """
+        Receipt handle of the SQS message the event was parsed from
+        """
+        return self.message.receipt_handle
+
+    @property
+    def queue_url(self) -> str:
+        """
+        Url of the queue the event was received from
+        """
+        return self.message.queue_url
+
+    @property
+    def sent_timestamp(self) -> float:
+        """
+        Time the SQS message was sent to the queue
+        """
+        return self.message.sent_timestamp
+
+    @property
+    def receive_count(self) -> int:
+        """
+        Number of times the SQS message has been received
+        """
+        return self.message.receive_count
+
+    @property
+    def event_id(self) -> str:
+        """
+        Identity of this record within its SQS message
+        """
+        return f"{self.message.message_id}:{self.record_index}"
+
+    @property
+    def object_identity(self) -> str:
+        """
+        Identity of the object change this event refers to, None if the event does not carry one. The S3
+        sequencer tells apart overwrites with identical content, the ETag is only used without one.
+        """
+        version = self.sequencer or self.etag
+        if not version or not self.file_key:
+            return None
+        return f"{self.bucket_name}/{self.file_key}@{version}"
 
     def delete_message(self, sqs_client: Any):
         try:
@@ -0,0 +1,157 @@
+"""
+SQS Message Acknowledgement Module
+"""
+
+import threading
+import time
+from typing import Any, Callable, List
+from s3watcher import log
+
+
+class SQSMessageAcker:
+    """
+    Class to collect processed messages and delete them from the queue in batches
+    """
+
+    # DeleteMessageBatch accepts at most 10 entries per call
+    max_batch_size = 10
+
+    def __init__(
+        self,
+        get_sqs_client: Callable[[], Any],
+        queue_url: str,
+        flush_interval: float = 1.0,
+        max_retries: int = 3,
+        metrics: Any = None,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.get_sqs_client = get_sqs_client
+        self.queue_url = queue_url
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.metrics = metrics
+
+        # Pending entries as [receipt_handle, attempts]
+        self.pending = []
+        self.deleted = 0
+        self.failed = 0
+        self.requests = 0
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Function to start the background flush thread.
+        """
+        self._thread = threading.Thread(
+            target=self._run, name="sqs-acker", daemon=True
+        )
+        self._thread.start()
+
+    def ack(self, sqs_event: Any) -> None:
+        """
+        Function to queue a processed event for deletion.
+        """
+        with self._condition:
+            self.pending.append([sqs_event.receipt_handle, 0])
+            if len(self.pending) >= self.max_batch_size:
+                self._condition.notify()
+
+    def _run(self) -> None:
+        """
+        Function run by the flush thread, flushing when a batch fills up or the interval elapses.
+        """
+        while True:
+            with self._condition:
+                if not self._stopped and len(self.pending) < self.max_batch_size:
+                    self._condition.wait(self.flush_interval)
+                if self._stopped:
+                    return
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Function to delete every pending message in batches of up to 10.
+        """
+        with self._condition:
+            pending, self.pending = self.pending, []
+
+        # Drop duplicate receipt handles, an event may be acknowledged twice
+        entries = list({entry[0]: entry for entry in pending}.values())
+
+        retry = []
+        for i in range(0, len(entries), self.max_batch_size):
+            retry.extend(self._delete_batch(entries[i : i + self.max_batch_size]))
+
+        if retry:
+            with self._condition:
+                self.pending.extend(retry)
+
+    def _delete_batch(self, batch: List[list]) -> List[list]:
+        """
+        Function to delete a single batch, returning the entries that should be retried.
+        """
+        retry = []
+        try:
+            self.requests += 1
+            start_time = time.perf_counter()
+            response = self.get_sqs_client().delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[
+                    {"Id": str(i), "ReceiptHandle": entry[0]}
+                    for i, entry in enumerate(batch)
+                ],
+            )
+            self.deleted += len(response.get("Successful", []))
+            if self.metrics:
+                self.metrics.stage_duration.observe(
+                    time.perf_counter() - start_time, "delete"
+                )
+                self.metrics.messages_deleted.inc(len(response.get("Successful", [])))
+            failures = [
+                (batch[int(failure["Id"])], failure)
+                for failure in response.get("Failed", [])
+            ]
+
+        except Exception as e:
+            log.error(f"Error deleting message batch from queue ({self.queue_url}): {e}")
+            failures = [(entry, {"SenderFault": False, "Message": str(e)}) for entry in batch]
+
+        for entry, failure in failures:
+            entry[1] += 1
+            # Sender faults such as an expired receipt handle will not succeed on retry
+            if failure.get("SenderFault") or entry[1] > self.max_retries:
+                self.failed += 1
+                if self.metrics:
+                    self.metrics.failures.inc(label_value="delete")
+                log.error(
+                    f"Error deleting message from queue ({self.queue_url}): {failure.get('Message', failure.get('Code'))}"
+                )
+            else:
+                retry.append(entry)
+                if self.metrics:
+                    self.metrics.retries.inc(label_value="delete")
+
+        return retry
+
+    def stop(self) -> None:
+        """
+        Function to stop the flush thread and delete anything still pending.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+
+        for _ in range(self.max_retries + 1):
+            self.flush()
+            if not self.pending:
+                break
+
+        log.info(
+            f"Deleted {self.deleted} messages in {self.requests} requests, {self.failed} failed"
+        )
@@ -1,17 +1,40 @@
 import os
 import time
-import polling
 import json
-import boto3
-from boto3.s3.transfer import TransferConfig, S3Transfer
+import signal
 import botocore
+import threading
 from multiprocessing import Process, Queue
 import concurrent.futures
+from typing import Any, Callable, Optional, Union
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from s3watcher import log
+from s3watcher.AtomicDownloader import AtomicDownloader
+from s3watcher.ClientProvider import ClientProvider
+from s3watcher.DeduplicationCache import DeduplicationCache
+from s3watcher.DownloadClaims import CLAIMED, COMPLETED, PENDING, DownloadClaims
+from s3watcher.DownloadManifest import DownloadManifest
+from s3watcher.DownloadWorkerPool import DownloadWorkerPool
+from s3watcher.EventCoalescer import EventCoalescer
+from s3watcher.KeyFilter import KeyFilter
+from s3watcher.KeySequencer import KeySequencer
+from s3watcher.LocalFileRemover import LocalFileRemover
+from s3watcher.Metrics import PipelineMetrics
+from s3watcher.SamplingProfiler import SamplingProfiler
+from s3watcher.Tracer import Tracer
+from s3watcher.PriorityScheduler import PriorityScheduler
+from s3watcher.RateLimiter import BACKFILL, LIVE, TransferLimiter
+from s3watcher.ReceiveScheduler import ReceiveScheduler
+from s3watcher.S3Reconciler import BackfillTask, S3Reconciler
+from s3watcher.SlackNotifier import SlackNotifier
+from s3watcher.SQSMessageAcker import SQSMessageAcker
+from s3watcher.VisibilityLeaseManager import VisibilityLeaseManager
 from s3watcher.SQSHandlerEvent import SQSHandlerEvent
 from s3watcher.SQSQueueHandlerConfig import SQSQueueHandlerConfig
+from s3watcher.TimestreamBatchWriter import TimestreamBatchWriter
+from s3watcher.ThreadedEngine import ThreadedEngine
+from s3watcher.TransferPlanner import MB, TransferPlanner
 from sdc_aws_utils.aws import (
     create_timestream_client_session,
     log_to_timestream,
@@ -25,15 +48,16 @@ Utility functions for s3watcher.
 
 class SQSQueueHandler:
     event_queue = Queue()
-    event_history = []
-    event_history_limit = 100000
 
-    def __init__(self, config: SQSQueueHandlerConfig) -> None:
+    def __init__(
+        self, config: SQSQueueHandlerConfig, shared: "SQSQueueHandler" = None
+    ) -> None:
         # Set config
         self.config = config
 
-        # Time since last refresh
-        self.last_refresh_time = time.time()
+        # Handler of the first watch, whose session, connection pool, metrics and services are shared
+        self.shared = shared
+        self.watch_name = config.watch_name
 
         # Set download path
         self.download_path = (
@@ -43,16 +67,36 @@ class SQSQueueHandler:
         # Set concurrency limit
         self.concurrency_limit = config.concurrency_limit
 
-        # Initialize Boto3 Session
-        self.session = (
-            boto3.session.Session(profile_name=self.config.profile)
-            if config.profile != ""
-            else boto3.session.Session(region=os.getenv("AWS_REGION"))
-        )
+        if shared:
+            self.metrics = shared.metrics
+            self.tracer = shared.tracer
+            self.profiler = shared.profiler
+            self.clients = shared.clients
+            self.stopping = shared.stopping
+        else:
+            # Set on shutdown, in each process
+            self.stopping = threading.Event()
+
+            # Metrics in shared memory, created before the poll and download processes start
+            self.metrics = PipelineMetrics(
+                watches=[
+                    watch_config.watch_name
+                    for watch_config in config.get_watch_configs()
+                ]
+            )
 
-        self.sqs = self.session.client("sqs")
+            # Per-stage timing spans and an on-demand sampling profiler, no-ops unless enabled
+            self.tracer = Tracer(
+                span_path=config.trace_path,
+                summary_interval=config.trace_summary_interval,
+            )
+            self.profiler = SamplingProfiler(output_path=config.profile_path)
 
-        self.sqs_resource = self.session.resource("sqs")
+            # Boto3 Session and clients shared by every thread, with credentials refreshed in place
+            self.clients = ClientProvider(
+                profile=config.profile,
+                region_name=None if config.profile else os.getenv("AWS_REGION"),
+            )
 
         # Set queue name
         self.queue_name = config.queue_name
@@ -70,25 +114,24 @@ class SQSQueueHandler:
 
         # Check if bucket exists
         try:
-            # Create S3 client
-            self.s3 = self.session.client("s3")
-
             self.bucket_name, self.folder = self.extract_folder_from_bucket_name(
                 config.bucket_name
             )
             # Check if bucket exists
-            self.s3.head_bucket(Bucket=self.bucket_name)
-
-            # Initialize S3 Transfer Manager with concurrency limit
-            botocore_config = botocore.config.Config(max_pool_connections=10)
-            s3client = self.session.client("s3", config=botocore_config)
-            transfer_config = TransferConfig(
-                use_threads=True,
-                max_concurrency=10,
-            )
-            self.s3t = S3Transfer(s3client, transfer_config)
+            self.get_s3_client().head_bucket(Bucket=self.bucket_name)
+
+            # Initialize S3 Transfer Planner sharing the connection budget between transfers
+            if shared:
+                self.transfer_planner = shared.transfer_planner
+            else:
+                self.transfer_planner = TransferPlanner(
+                    connection_budget=self.config.connection_budget,
+                    multipart_threshold=int(self.config.multipart_threshold * MB),
+                    multipart_chunksize=int(self.config.multipart_chunksize * MB),
+                )
+                self.transfer_planner.set_client(self.get_transfer_client())
 
-        except self.s3.exceptions.ClientError:
+        except botocore.exceptions.ClientError:
             log.error(f"Error getting bucket ({self.bucket_name})")
             raise ValueError(f"Error getting bucket ({self.bucket_name})")
 
@@ -96,14 +139,80 @@ class SQSQueueHandler:
         self.timestream_table = self.config.timestream_table
         self.allow_delete = config.allow_delete
 
-        try: # Create Timestream session
-            self.timestream_client = create_timestream_client_session(
-                boto3_session=self.session
-            )
-        except Exception as e:
-            log.error(f"Error creating Timestream session: {e}")
-            self.timestream_client = None
-            
+        # Batched message acknowledgements, visibility leases, the download priority
+        # scheduler, batched Timestream writes and Slack digests, started with the consumer
+        self.acker = None
+        self.lease_manager = None
+        self.scheduler = None
+        self.coalescer = None
+        self.timestream_writer = None
+        self.notifier = None
+        self.remover = None
+
+        # Recently completed message ids and object versions, checked by the consumer
+        self.dedupe_cache = DeduplicationCache(
+            capacity=self.config.dedupe_capacity, ttl=self.config.dedupe_ttl
+        )
+        self.in_flight_messages = set()
+        self._in_flight_lock = threading.Lock()
+
+        # Selects the keys under the watched folder to mirror, from events and listings
+        self.key_filter = KeyFilter(
+            include=self.config.include_rules,
+            exclude=self.config.exclude_rules,
+            min_size=self.config.min_size,
+            max_size=self.config.max_size,
+            prefix=f"{self.folder}/" if self.folder not in [None, ""] else "",
+        )
+
+        # Orders events of the same key by their S3 sequencer
+        self.key_sequencer = KeySequencer(capacity=self.config.dedupe_capacity)
+
+        # Verified downloads through part files, resumed after failures
+        self.atomic_downloader = (
+            AtomicDownloader(self.get_transfer_client)
+            if self.config.atomic_downloads
+            else None
+        )
+
+        # Claims coordinating downloads with other instances sharing the download path
+        self.claims = (
+            DownloadClaims(self.download_path, stale_after=self.config.claim_timeout)
+            if self.config.coordinate
+            else None
+        )
+
+        # Handlers of every watch by name, and the names of their queues
+        self.watch_handlers = {self.watch_name: self}
+        self.watch_queue_urls = {self.queue_url: self.watch_name}
+
+        if shared:
+            self.transfer_limiter = shared.transfer_limiter
+            self.manifest = shared.manifest
+            self.timestream_client = shared.timestream_client
+            self.slack_client = shared.slack_client
+            self.slack_channel = shared.slack_channel
+            log.info(f"Watch ({self.watch_name}) initialized successfully")
+            return
+
+        # Bandwidth and request rate budgets shared by every download
+        self.transfer_limiter = TransferLimiter(
+            live_bandwidth=self.config.live_bandwidth_limit * MB,
+            live_request_rate=self.config.live_request_rate,
+            backfill_bandwidth=self.config.backfill_bandwidth_limit * MB,
+            backfill_request_rate=self.config.backfill_request_rate,
+        )
+
+        # Index of completed downloads used to skip identical objects
+        self.manifest = (
+            DownloadManifest(self.config.manifest_path)
+            if self.config.manifest_path
+            else None
+        )
+
+        # Created by start_services in the process using it, clients must not be shared across a fork
+        self.timestream_client = None
+
         try:
             # Initialize the slack client
             if self.config.slack_token:
@@ -123,233 +232,962 @@ class SQSQueueHandler:
                     }
                 )
 
+        # Additional watches share this handler's session, connection pool and download workers
+        for watch_config in config.get_watch_configs()[1:]:
+            handler = SQSQueueHandler(watch_config, shared=self)
+            self.watch_handlers[handler.watch_name] = handler
+            self.watch_queue_urls[handler.queue_url] = handler.watch_name
+
         log.info("S3Watcher initialized successfully")
 
-    def get_messages(self, max_batch_size: int = 10) -> None:
+    def get_messages(self, max_batch_size: int = 10, event_queue: Any = None) -> None:
         try:
             # Receive message from SQS queue
-            if time.time() - self.last_refresh_time >= 900:  # 900 seconds = 15 minutes
-                self._refresh_boto_session()
-            response = self.sqs.receive_message(
-                QueueUrl=self.queue_url,
-                AttributeNames=["SentTimestamp"],
-                MaxNumberOfMessages=max_batch_size,
-                MessageAttributeNames=["All"],
-                VisibilityTimeout=5,
-                WaitTimeSeconds=0,
-            )
+            with self.metrics.stage_duration.time("receive"), self.tracer.span(
+                "receive"
+            ):
+                response = self.get_sqs_client().receive_message(
+                    QueueUrl=self.queue_url,
+                    AttributeNames=["SentTimestamp", "ApproximateReceiveCount"],
+                    MaxNumberOfMessages=max_batch_size,
+                    MessageAttributeNames=["All"],
+                    VisibilityTimeout=self.config.visibility_timeout,
+                    WaitTimeSeconds=self.config.wait_time_seconds,
+                )
 
             messages = response.get("Messages")
 
             if messages is not None:
+                self.metrics.messages_received.inc(len(messages))
+                self.metrics.watch_messages_received.inc(
+                    len(messages), self.watch_name
+                )
+
                 # Queue messages
-                sqs_events = self.queue_messages(messages)
+                self.queue_messages(messages, event_queue)
 
-                return sqs_events
+                return messages
 
             return None
 
         except Exception as e:
+            self.metrics.failures.inc(label_value="receive")
             log.error(f"Error getting messages from queue ({self.queue_url}): {e}")
 
-    def queue_messages(self, messages: list):
+    def get_queue_depth(self) -> int:
         """
-        Function to queue messages.
+        Function to get the approximate number of messages waiting in the queue.
         """
-        # Initialize SQSHandlerEvent objects
-        if time.time() - self.last_refresh_time >= 900:  # 900 seconds = 15 minutes
-            self._refresh_boto_session()
-        sqs_events = [
-            SQSHandlerEvent(self.sqs, message, self.queue_url) for message in messages
-        ]
+        try:
+            response = self.get_sqs_client().get_queue_attributes(
+                QueueUrl=self.queue_url,
+                AttributeNames=["ApproximateNumberOfMessages"],
+            )
+            depth = int(response["Attributes"]["ApproximateNumberOfMessages"])
+            self.metrics.watch_queue_depth.set(depth, self.watch_name)
+            self.metrics.queue_depth.set(
+                sum(
+                    self.metrics.watch_queue_depth.get(watch_name)
+                    for watch_name in self.metrics.watches
+                )
+            )
+            return depth
 
-        # Concatenate message batch to event array if events don't already exist in it
-        for event in sqs_events:
-            if event.message_id not in self.event_history:
-                self.event_history.append(event.message_id)
-                self.event_queue.put(event)
+        except Exception as e:
+            log.error(f"Error getting queue depth ({self.queue_url}): {e}")
+            return 0
 
-        # Clear event history if limit is reached
-        self.clean_event_history()
+    def get_free_capacity(self) -> int:
+        """
+        Function to get how many more received events the download workers have room for, twice the
+        concurrency limit less the events already waiting.
+        """
+        return self.concurrency_limit * 2 - int(self.metrics.events_waiting.get())
 
-        return sqs_events
+    def create_receive_scheduler(self) -> ReceiveScheduler:
+        """
+        Function to create the scheduler that sizes and paces receive calls.
+        """
+        return ReceiveScheduler(
+            self.get_queue_depth,
+            get_free_capacity=self.get_free_capacity,
+            max_receivers=self.config.receive_concurrency,
+            wait_time_seconds=self.config.wait_time_seconds,
+        )
 
-    def clean_event_history(self) -> None:
+    def queue_messages(self, messages: list, event_queue: Any = None):
         """
-        Function to clean event history.
+        Function to queue messages. The events parsed from each message are put on the handler's event queue
+        together, unless another queue is given.
         """
-        if len(self.event_history) > self.event_history_limit:
-            self.event_history = self.event_history[int(self.event_history_limit / 2) :]
+        if event_queue is None:
+            event_queue = self.event_queue
+
+        # Parse one SQSHandlerEvent per S3 record of each message
+        sqs_events = []
+        for message in messages:
+            with self.metrics.stage_duration.time("parse"), self.tracer.span("parse"):
+                message_events = SQSHandlerEvent.from_sqs_message(
+                    message, self.queue_url
+                )
+            sqs_events.extend(message_events)
+
+            # Duplicates are filtered by the consumer, which knows what has completed
+            event_queue.put(message_events)
+
+        return sqs_events
 
-    def process_message(self, sqs_event: SQSHandlerEvent):
+    def process_message(self, sqs_event: SQSHandlerEvent) -> bool:
         """
-        Function to process sqs event messages.
+        Function to process sqs event messages. Returns False if processing failed.
         """
-        try:
-            if sqs_event.event_type == "CREATE":
+        # Root span of the event, the stages below are its children
+        with self.tracer.span(
+            "event", file_key=sqs_event.file_key, event_type=sqs_event.event_type
+        ):
+            if not self.begin_event(sqs_event):
+                return True
+
+            try:
                 file_key = sqs_event.file_key
 
-                if file_key:
-                    # Download file from S3
-                    self.download_file_from_s3(file_key)
-
-                    # Send Slack Notification about the event
-                    if self.slack_client:
-                        # Send Slack Notification
-                        send_pipeline_notification(
-                            slack_client=self.slack_client,
-                            slack_channel=self.slack_channel,
-                            path=file_key,
-                            alert_type="download",
-                        )
+                if sqs_event.event_type == "CREATE":
+                    # Download file from S3, on failure let another worker retry it
+                    applied = self.apply_event(sqs_event)
+                    if applied == PENDING:
+                        # Not a failure, another instance is downloading a different version
+                        self.defer_event(sqs_event)
+                        return True
+
+                    if applied is False:
+                        self.send_failure_notification(file_key, "download failed")
+                        self.release_event(sqs_event)
+                        return False
+
+                    if applied:
+                        # Send Slack Notification about the event
+                        self.send_download_notification(file_key, size=sqs_event.size)
 
                     # Delete messages from AWS SQS queue
-                    if (
-                        time.time() - self.last_refresh_time >= 900
-                    ):  # 900 seconds = 15 minutes
-                        self._refresh_boto_session()
-                    sqs_event.delete_message(self.sqs)
+                    self.delete_event(sqs_event)
 
-                    if self.timestream_client:
+                    if applied:
                         # Write file to Timestream
-                        log_to_timestream(
-                            timestream_client=self.timestream_client,
-                            file_key=file_key,
-                            new_file_key=file_key,
-                            source_bucket=self.bucket_name,
-                            action_type="PUT",
-                            destination_bucket="External Server",
-                            environment="PRODUCTION",
-                        )
+                        self.log_download_to_timestream(file_key)
 
-        except Exception as e:
-            log.error(f"Error getting file key from message: {e}")
+                elif sqs_event.event_type == "DELETE" and self.allow_delete:
+                    # Remove the local file, the event is acknowledged once it is removed
+                    applied = self.apply_event(sqs_event)
+                    if applied is False:
+                        self.release_event(sqs_event)
+                        return False
 
-    def process_messages(self):
+                    if applied is None:
+                        self.delete_event(sqs_event)
+
+                else:
+                    # Nothing to download, acknowledge the event
+                    log.info(f"Ignoring event ({sqs_event})")
+                    self.delete_event(sqs_event)
+
+                return True
+
+            except Exception as e:
+                log.error(f"Error getting file key from message: {e}")
+                self.send_failure_notification(sqs_event.file_key, str(e))
+                self.release_event(sqs_event)
+                return False
+
+            finally:
+                self.complete_event(sqs_event)
+
+    def process_task(self, task: Any) -> bool:
         """
-        Function to process batch of sqs events.
+        Function to process a task taken from the priority scheduler, either an sqs event or a backfill download.
         """
-        if os.getenv("CHECK_S3") == "true":
-            check_s3 = True
-        else:
-            check_s3 = False
-        while True:
-            if check_s3:
-                # Get all keys in bucket
-                log.info("Checking with S3... This might take awhile depending on how manys items in the bucket...")
-                log.info(self.__dict__)
-                keys = []
-                try:
-                    # with pagination with folder prefix
-                    if (
-                        time.time() - self.last_refresh_time >= 900
-                    ):  # 900 seconds = 15 minutes
-                        self._refresh_boto_session()
-                    paginator = self.s3.get_paginator("list_objects_v2")
-                    if self.folder not in [None, ""]:
-                        prefix = f"{self.folder}/"
-                    else:
-                        prefix = ""
-                    page_iterator = paginator.paginate(
-                        Bucket=self.bucket_name, Prefix=prefix
-                    )
-                    for page in page_iterator:
-                        if "Contents" in page:
-                            for key in page["Contents"]:
-                                # remove the first /folder/ from the key
-                                if self.folder not in [None, ""]:
-                                    key["Key"] = key["Key"].replace(
-                                        f"{self.folder}/", "", 1
-                                    )
-
-                                if key["Key"] != "":
-                                    keys.append(key["Key"])
+        # Tasks of the other watches are processed by their own handlers
+        handler = self.watch_handlers[self.get_task_watch(task)]
+        if handler is not self:
+            return handler.process_task(task)
+
+        if not self.shared:
+            self.update_events_waiting()
+
+        if isinstance(task, BackfillTask):
+            success = self.download_backfill(task)
+            if success:
+                self.send_download_notification(task.file_key, size=task.size)
+            elif success is False:
+                self.send_failure_notification(task.file_key, "download failed")
+            task.done(success is not False)
+            return success is not False
+
+        return self.process_message(task)
+
+    def download_backfill(self, task: BackfillTask) -> Optional[bool]:
+        """
+        Function to download a key found missing by reconciliation. Returns False if the download failed, None if
+        another instance downloads it.
+        """
+        with self.tracer.span("backfill", file_key=task.file_key):
+            with self.key_sequencer.lock(task.file_key):
+                success = self.download_file_from_s3(
+                    task.file_key,
+                    size=task.size,
+                    etag=task.etag,
+                    last_modified=task.last_modified,
+                    traffic_class=BACKFILL,
+                )
 
-                except Exception as e:
-                    log.error(
-                        f"Error getting keys from bucket ({self.bucket_name}): {e}"
-                    )
+            # The next reconciliation checks the version the other instance downloaded
+            return None if success == PENDING else success
 
-                # Get all keys in download path
-                downloaded_keys = []
-                for root, _, files in os.walk(self.download_path):
-                    for file in files:
-                        downloaded_keys.append(os.path.join(root, file))
-                        # remove the first /download/ from the path
-                        downloaded_keys = [
-                            key.replace(self.download_path, "", 1)
-                            for key in downloaded_keys
-                        ]
-
-                # Get all keys in the s3 bucket that are not in the download path
-                keys_to_download = list(set(keys) - set(downloaded_keys))
-
-                # log all keys
-                log.info(f"Keys in bucket ({self.bucket_name}): {len(keys)}")
-                # log first 10 keys
-                log.info(f"First 10 keys in bucket ({self.bucket_name}): {keys[:10]}")
-                log.info(
-                    f"Keys in download path ({self.download_path}): {len(downloaded_keys)}"
+    def apply_event(self, sqs_event: SQSHandlerEvent) -> Optional[Union[bool, str]]:
+        """
+        Function to download or remove the object of an event, in S3 sequencer order with other events of the
+        same key. Returns None if a later event of the key was already applied or another instance downloads it,
+        PENDING if another instance downloads a different version, otherwise whether it succeeded.
+        """
+        file_key = sqs_event.file_key
+        with self.key_sequencer.lock(file_key):
+            if self.key_sequencer.is_stale(file_key, sqs_event.sequencer):
+                log.info(f"Skipping event ({sqs_event}) older than one already applied")
+                return None
+
+            if sqs_event.event_type == "DELETE":
+                # Before the removal is queued, so a re-created object is not skipped as already downloaded
+                self.forget_object(sqs_event)
+                self.remove_local_file(
+                    file_key,
+                    callback=lambda file_key, removed: self.delete_event(sqs_event),
                 )
-                # log first 10 keys
-                log.info(
-                    f"First 10 keys in download path ({self.download_path}): {downloaded_keys[:10]}"
+                success = True
+            else:
+                success = self.download_file_from_s3(
+                    file_key,
+                    size=sqs_event.size,
+                    etag=sqs_event.etag,
+                    sequencer=sqs_event.sequencer,
                 )
 
-                log.info(
-                    f"Keys to download ({self.bucket_name}): {len(keys_to_download)}"
+            if success is True:
+                self.key_sequencer.record(file_key, sqs_event.sequencer)
+            return success
+
+    def remove_local_file(
+        self,
+        file_key: str,
+        callback: Callable[[str, bool], None] = None,
+        queued_time: float = None,
+    ):
+        """
+        Function to queue the removal of the local copy of a deleted object.
+        """
+        self.remover.remove(
+            file_key,
+            self.get_local_path(file_key),
+            callback=callback,
+            queued_time=queued_time,
+        )
+
+    def forget_object(self, sqs_event: SQSHandlerEvent):
+        """
+        Function to drop what is remembered about a deleted object: the identities of its events, its manifest
+        entry and its completion marker.
+        """
+        self.dedupe_cache.discard_group((sqs_event.bucket_name, sqs_event.file_key))
+        self.forget_download(sqs_event.file_key)
+        if self.claims:
+            self.claims.forget(self.bucket_name, sqs_event.file_key)
+
+    def forget_download(self, file_key: str):
+        """
+        Function to drop a removed file from the download manifest.
+        """
+        if self.manifest:
+            self.manifest.remove(self.download_path, self.bucket_name, file_key)
+
+    def get_local_path(self, file_key: str) -> str:
+        """
+        Function to get the local path an object key is downloaded to.
+        """
+        # Replace first /{folder}/ from file_key
+        if self.folder not in [None, ""]:
+            file_key = file_key.replace(f"{self.folder}/", "", 1)
+        return self.download_path + file_key
+
+    def get_task_watch(self, task: Any) -> str:
+        """
+        Function to get the name of the watch a task belongs to, from the watch of a backfill download or the
+        queue of an sqs event.
+        """
+        watch_name = getattr(task, "watch", None)
+        if watch_name is None:
+            watch_name = self.watch_queue_urls.get(
+                getattr(task, "queue_url", None), self.watch_name
+            )
+        return watch_name
+
+    def submit_task(self, task: Any):
+        """
+        Function to schedule a task for the download workers. Blocks while too many backfill tasks are waiting.
+        """
+        self.scheduler.put(task)
+        (self.shared or self).update_events_waiting()
+
+    def update_events_waiting(self):
+        """
+        Function to publish the number of received events waiting for a download worker, in the scheduler or
+        held by the coalescer. The poller reads it from the shared metrics to hold off receiving.
+        """
+        waiting = self.scheduler.live_size if self.scheduler is not None else 0
+        if self.coalescer:
+            waiting += len(self.coalescer.pending)
+        self.metrics.events_waiting.set(waiting)
+
+    def schedule_event(self, sqs_event: SQSHandlerEvent):
+        """
+        Function to schedule a received event, held by the coalescer first when a coalescing window is set.
+        Events of keys the watch's key filter excludes are acknowledged without processing. The message of
+        a scheduled event is kept invisible on the queue from now until the event is done.
+        """
+        handler = self.watch_handlers[self.get_task_watch(sqs_event)]
+        if (
+            handler.key_filter.enabled
+            and sqs_event.file_key
+            and not handler.key_filter.matches(sqs_event.file_key, sqs_event.size)
+        ):
+            log.info(f"Skipping event ({sqs_event}) excluded by the key filter")
+            self.metrics.events_filtered.inc()
+            handler.delete_event(sqs_event)
+            return
+
+        # Events may wait longer than the visibility timeout before a worker takes them
+        handler.track_event(sqs_event)
+
+        # Ignored deletes are acknowledged without waiting, each watch's settings decide for its events
+        if (
+            self.coalescer
+            and handler.config.coalesce_window > 0
+            and (
+                sqs_event.event_type == "CREATE"
+                or (sqs_event.event_type == "DELETE" and handler.allow_delete)
+            )
+        ):
+            self.coalescer.add(sqs_event)
+            self.update_events_waiting()
+        else:
+            self.submit_task(sqs_event)
+
+    def supersede_event(self, sqs_event: SQSHandlerEvent):
+        """
+        Function to acknowledge an event replaced by a newer event of the same key before it was processed.
+        """
+        # Events of the other watches are acknowledged on their own queues
+        handler = self.watch_handlers[self.get_task_watch(sqs_event)]
+        log.info(f"Coalesced event ({sqs_event}) into a newer event of the same key")
+        self.metrics.events_coalesced.inc()
+        handler.untrack_event(sqs_event)
+        handler.delete_event(sqs_event, superseded=True)
+
+    def begin_event(self, sqs_event: SQSHandlerEvent) -> bool:
+        """
+        Function to mark an event as in flight. Returns False if the event is a duplicate that should be skipped,
+        duplicates of completed events are deleted from the queue and in-flight duplicates are left to lapse.
+        """
+        with self._in_flight_lock:
+            if sqs_event.event_id in self.in_flight_messages:
+                # Redelivered while still being processed, it will be seen again once the lease lapses
+                log.info(f"Skipping in-flight duplicate event ({sqs_event.file_key})")
+                duplicate = None
+            elif self.dedupe_cache.seen(sqs_event.event_id) or self.dedupe_cache.seen(
+                sqs_event.object_identity
+            ):
+                duplicate = True
+            else:
+                duplicate = False
+                self.in_flight_messages.add(sqs_event.event_id)
+
+        if duplicate is False:
+            return True
+
+        self.untrack_event(sqs_event)
+        if duplicate:
+            log.info(f"Skipping duplicate event ({sqs_event.file_key})")
+            self.delete_event(sqs_event)
+        return False
+
+    def track_event(self, sqs_event: SQSHandlerEvent):
+        """
+        Function to start extending the visibility of a received event.
+        """
+        if self.lease_manager:
+            self.lease_manager.track(sqs_event)
+
+    def untrack_event(self, sqs_event: SQSHandlerEvent):
+        """
+        Function to stop extending the visibility of an event that will not be processed.
+        """
+        if self.lease_manager:
+            self.lease_manager.complete(sqs_event)
+
+    def complete_event(self, sqs_event: SQSHandlerEvent):
+        """
+        Function to stop extending the visibility of an event that finished processing.
+        """
+        with self._in_flight_lock:
+            self.in_flight_messages.discard(sqs_event.event_id)
+
+        if self.lease_manager:
+            self.lease_manager.complete(sqs_event)
+
+    def release_event(self, sqs_event: SQSHandlerEvent):
+        """
+        Function to make a failed event visible on the queue again so it can be retried.
+        """
+        self.metrics.retries.inc(label_value="download")
+        if self.lease_manager:
+            self.lease_manager.release(sqs_event)
+
+    def defer_event(self, sqs_event: SQSHandlerEvent):
+        """
+        Function to put an event back on the queue while another instance downloads a different version of its
+        key. The delay doubles with every receive of the message, up to the claim timeout after which a stalled
+        claim is recovered.
+        """
+        delay = min(
+            self.config.claim_timeout,
+            self.config.visibility_timeout * 2 ** min(sqs_event.receive_count - 1, 10),
+            43200,
+        )
+        log.info(
+            f"Retrying event ({sqs_event}) in {delay:.0f}s, another instance is downloading a different version"
+        )
+        self.metrics.events_deferred.inc()
+        if self.lease_manager:
+            self.lease_manager.release(sqs_event, visibility_timeout=int(delay))
+
+    def send_download_notification(self, file_key: str, size: int = None):
+        """
+        Function to send a Slack notification about a downloaded file. Downloads are aggregated into digests
+        by the notifier when it is running.
+        """
+        with self.tracer.span("notification"):
+            if self.notifier:
+                self.notifier.record_download(file_key, size)
+            elif self.slack_client:
+                # Send Slack Notification
+                send_pipeline_notification(
+                    slack_client=self.slack_client,
+                    slack_channel=self.slack_channel,
+                    path=file_key,
+                    alert_type="download",
                 )
-                log.info(
-                    f"First 10 keys to download ({self.bucket_name}): {keys_to_download[:10]}"
+
+    def send_failure_notification(self, file_key: str, error: str):
+        """
+        Function to send a Slack alert about a file that could not be processed.
+        """
+        if self.notifier:
+            self.notifier.record_failure(
+                file_key, error, bucket_name=self.bucket_name
+            )
+
+    def delete_event(self, sqs_event: SQSHandlerEvent, superseded: bool = False):
+        """
+        Function to acknowledge a processed event. Its SQS message is deleted from the queue once every event
+        parsed from it has been acknowledged.
+        """
+        # Time from the event being sent to the queue until it is done
+        if sqs_event.sent_timestamp:
+            self.metrics.event_lag.observe(time.time() - sqs_event.sent_timestamp)
+
+        # Remember the event so redeliveries of it are skipped
+        self.dedupe_cache.add(sqs_event.event_id)
+
+        # A superseded event may share its object version with the event replacing it
+        if sqs_event.object_identity and not superseded:
+            self.dedupe_cache.add(
+                sqs_event.object_identity,
+                group=(sqs_event.bucket_name, sqs_event.file_key),
+            )
+
+        with self._in_flight_lock:
+            sqs_event.message.pending -= 1
+            if sqs_event.message.pending > 0:
+                return
+
+        with self.tracer.span("delete"):
+            if self.acker:
+                # Deleted in batches by the acker
+                self.acker.ack(sqs_event)
+            else:
+                sqs_event.delete_message(self.get_sqs_client())
+
+    def get_sqs_client(self) -> Any:
+        """
+        Function to get the shared SQS client.
+        """
+        return self.clients.client("sqs")
+
+    def get_s3_client(self) -> Any:
+        """
+        Function to get the shared S3 client.
+        """
+        return self.clients.client("s3")
+
+    def get_transfer_client(self) -> Any:
+        """
+        Function to get the S3 client used for transfers, with a connection pool as large as the budget.
+        """
+        return self.clients.client(
+            "s3",
+            name="s3_transfer",
+            max_pool_connections=max(
+                self.config.connection_budget, self.concurrency_limit
+            ),
+        )
+
+    def create_timestream_client(self) -> Any:
+        """
+        Function to create the Timestream client of the current process from its session, None if it fails.
+        """
+        try:
+            return create_timestream_client_session(boto3_session=self.clients.session)
+        except Exception as e:
+            log.error(f"Error creating Timestream session: {e}")
+            return None
+
+    def start_services(self):
+        """
+        Function to start the background services used while processing events. The services of additional
+        watches share the download scheduler, Timestream writer and Slack notifier of the first watch.
+        """
+        if not self.shared:
+            if self.config.metrics_port:
+                self.metrics.start_server(self.config.metrics_port)
+
+            self.tracer.start()
+            self.profiler.install()
+
+            # Clients are created again in the consumer process, publishing their pool statistics
+            self.clients.start(self.metrics)
+            self.transfer_planner.set_client(self.get_transfer_client())
+            if self.timestream_client is None:
+                self.timestream_client = self.create_timestream_client()
+
+        self.acker = SQSMessageAcker(
+            self.get_sqs_client,
+            self.queue_url,
+            flush_interval=self.config.ack_flush_interval,
+            metrics=self.metrics,
+        )
+        self.acker.start()
+
+        self.lease_manager = VisibilityLeaseManager(
+            self.get_sqs_client,
+            self.queue_url,
+            visibility_timeout=self.config.visibility_timeout,
+        )
+        self.lease_manager.start()
+
+        if self.claims:
+            self.claims.start()
+
+        if self.allow_delete:
+            self.remover = LocalFileRemover(
+                self.download_path,
+                on_removed=self.forget_download,
+                flush_interval=self.config.ack_flush_interval,
+            )
+            self.remover.start()
+
+        if self.shared:
+            self.scheduler = self.shared.scheduler
+            self.timestream_client = self.shared.timestream_client
+            self.timestream_writer = self.shared.timestream_writer
+            self.notifier = self.shared.notifier
+            return
+
+        # Watches take turns within each priority level
+        self.scheduler = PriorityScheduler(
+            prefix_levels=self.config.priority_prefixes,
+            large_object_size=int(self.config.large_object_size * MB),
+            aging_interval=self.config.priority_aging,
+            max_backfill_pending=self.concurrency_limit * 4,
+            fair_key=self.get_task_watch if len(self.watch_handlers) > 1 else None,
+        )
+
+        # Collapses bursts of events of the same key before they are scheduled
+        if self.config.coalesce_window > 0:
+            self.coalescer = EventCoalescer(
+                self.submit_task,
+                self.supersede_event,
+                window=self.config.coalesce_window,
+            )
+            self.coalescer.start()
+
+        if self.timestream_client:
+            self.timestream_writer = TimestreamBatchWriter(
+                lambda: self.timestream_client,
+                batch_size=self.config.timestream_batch_size,
+                flush_interval=self.config.timestream_flush_interval,
+                metrics=self.metrics,
+            )
+            self.timestream_writer.start()
+
+        if self.slack_client:
+            self.notifier = SlackNotifier(
+                self.slack_client,
+                self.slack_channel,
+                bucket_name=", ".join(
+                    sorted(
+                        {
+                            handler.bucket_name
+                            for handler in self.watch_handlers.values()
+                        }
+                    )
+                ),
+                digest_interval=self.config.slack_digest_interval,
+                rate=self.config.slack_rate,
+                metrics=self.metrics,
+            )
+            self.notifier.start()
+
+        for handler in self.watch_handlers.values():
+            if handler is not self:
+                handler.start_services()
+
+    def stop_services(self):
+        """
+        Function to stop the background services, flushing any pending work.
+        """
+        # Additional watches write through the shared services, so stop them first
+        for handler in self.watch_handlers.values():
+            if handler is not self:
+                handler.stop_services()
+
+        # Removals acknowledge their events, so stop the remover before the acker
+        if self.remover:
+            self.remover.stop()
+            self.remover = None
+
+        if self.lease_manager:
+            self.lease_manager.stop()
+            self.lease_manager = None
+
+        if self.acker:
+            self.acker.stop()
+            self.acker = None
+
+        if self.claims:
+            self.claims.stop()
+
+        if self.key_filter.enabled:
+            log.info(f"Key filter ({self.watch_name}): {self.key_filter.stats()}")
+
+        if self.shared:
+            self.scheduler = None
+            self.timestream_writer = None
+            self.notifier = None
+            log.info(
+                f"Deduplication cache ({self.watch_name}): {self.dedupe_cache.stats()}"
+            )
+            return
+
+        if self.timestream_writer:
+            self.timestream_writer.stop()
+            self.timestream_writer = None
+
+        if self.notifier:
+            self.notifier.stop()
+            self.notifier = None
+
+        if self.coalescer:
+            self.coalescer.stop()
+            self.coalescer = None
+
+        if self.scheduler is not None:
+            log.info(f"Priority scheduler: {self.scheduler.stats()}")
+        self.clients.stop(self.metrics)
+        self.metrics.stop_server()
+        self.tracer.stop()
+        self.profiler.stop()
+        log.info(f"Deduplication cache: {self.dedupe_cache.stats()}")
+        if self.manifest:
+            log.info(f"Download manifest: {self.manifest.stats()}")
+
+    def log_download_to_timestream(self, file_key: str):
+        """
+        Function to log a downloaded file to Timestream. Records are buffered and written in batches by the
+        Timestream writer when it is running.
+        """
+        if self.timestream_client:
+            with self.tracer.span("timestream"):
+                log_to_timestream(
+                    timestream_client=self.timestream_writer or self.timestream_client,
+                    file_key=file_key,
+                    new_file_key=file_key,
+                    source_bucket=self.bucket_name,
+                    action_type="PUT",
+                    destination_bucket="External Server",
+                    environment="PRODUCTION",
                 )
-                for key in keys_to_download:
-                    # Download file from S3 Async
-                    with concurrent.futures.ThreadPoolExecutor() as executor:
-                        if self.folder not in [None, ""]:
-                            key = f"{self.folder}/" + key
-                        executor.submit(self.download_file_from_s3, key)
 
-                check_s3 = False
-            event = self.event_queue.get()
-            self.process_message(event)
+    def process_messages(self):
+        """
+        Function to process batch of sqs events.
+        """
+        # Stop taking new work on SIGTERM or SIGINT
+        self.handle_signals(self.shutdown)
+
+        # Process queued events on a pool of download workers
+        self.start_services()
+
+        # Move received events into the priority scheduler the workers take from
+        threading.Thread(
+            target=self.feed_scheduler, name="event-feeder", daemon=True
+        ).start()
+
+        # Reconcile every watch with S3 in the background so live events are not held up
+        if os.getenv("CHECK_S3") == "true":
+            for handler in self.watch_handlers.values():
+                threading.Thread(
+                    target=handler.check_s3,
+                    name=f"s3-reconcile-{handler.watch_name}",
+                    daemon=True,
+                ).start()
+
+        self.worker_pool = DownloadWorkerPool(
+            self.scheduler,
+            self.process_task,
+            concurrency_limit=self.concurrency_limit,
+        )
+        try:
+            self.worker_pool.start()
+
+            # Shutdown may have been requested before the scheduler existed
+            if self.stopping.is_set():
+                self.scheduler.put(None)
+            self.worker_pool.join()
+        finally:
+            self.stop_services()
+
+    def shutdown(self):
+        """
+        Function to stop taking new work. The download workers exit once their current download is done, after
+        which process_messages stops the background services, flushing acknowledgements, Timestream records and
+        notifications. Events still waiting are left on the queue and received again.
+        """
+        if self.stopping.is_set():
+            return
+        self.stopping.set()
+        log.info("Shutting down, finishing the downloads in progress")
+
+        # Every worker taking from a closed scheduler gets the shutdown sentinel
+        if self.scheduler is not None:
+            self.scheduler.put(None)
+
+    def handle_signals(self, callback: Callable[[], None]):
+        """
+        Function to call a shutdown function on SIGTERM or SIGINT. It runs on its own thread, so it may take
+        locks held by the interrupted thread.
+        """
+
+        def on_signal(signum, frame):
+            log.info(f"Received signal {signal.Signals(signum).name}")
+            threading.Thread(target=callback, name="shutdown", daemon=True).start()
 
-    def download_file_from_s3(self, file_key: str):
+        try:
+            for signum in [signal.SIGTERM, signal.SIGINT]:
+                signal.signal(signum, on_signal)
+        except ValueError:
+            # Only the main thread can handle signals, such as when the pipeline runs in threads
+            pass
+
+    def feed_scheduler(self):
+        """
+        Function to move events from the event queue into the priority scheduler.
         """
-        Function to download file from S3.
+        while True:
+            message_events = self.event_queue.get()
+
+            # The shutdown sentinel stops the workers
+            if message_events is None:
+                self.shutdown()
+                break
+
+            for sqs_event in message_events:
+                self.schedule_event(sqs_event)
+
+    def check_s3(self):
         """
+        Function to schedule downloads of keys in the bucket that are missing from the download path.
+        """
+        S3Reconciler(
+            self,
+            list_concurrency=self.config.list_concurrency,
+            shard_prefixes=self.config.list_shards,
+        ).run()
+
+    def download_file_from_s3(
+        self,
+        file_key: str,
+        size: int = None,
+        etag: str = None,
+        last_modified: Any = None,
+        traffic_class: str = LIVE,
+        sequencer: str = None,
+    ) -> Optional[Union[bool, str]]:
+        """
+        Function to download file from S3. Returns False if the download failed, PENDING if another instance
+        sharing the download path is transferring a different version, None if another instance claimed or
+        completed the same version. Objects already in the manifest with the same size and ETag
+        are not downloaded again. The download draws from the bandwidth and request rate budgets of its traffic
+        class, live or backfill.
+        """
+        claimed = False
         try:
             # Loop through file_key and create directory if it does not exist
             download_file_key = file_key
             # Replace first /{folder}/ from file_key
             if self.folder not in [None, ""]:
                 file_key = file_key.replace(f"{self.folder}/", "", 1)
-            file_key_split = file_key.split("/")
-            for i in range(len(file_key_split) - 1):
-                self.create_directory(
-                    self.download_path + "/".join(file_key_split[: i + 1])
-                )
-
-            # Download file from S3
-            if time.time() - self.last_refresh_time >= 900:  # 900 seconds = 15 minutes
-                self._refresh_boto_session()
-            self.s3t.download_file(
+            # Skip objects whose identical version was already downloaded
+            if self.manifest and self.manifest.is_current(
+                self.download_path,
                 self.bucket_name,
                 download_file_key,
                 self.download_path + file_key,
+                size=size,
+                etag=etag,
+            ):
+                log.info(
+                    f"File ({file_key}) is already downloaded from S3 bucket ({self.bucket_name})"
+                )
+                return True
+
+            # Only one instance sharing the download path transfers the object
+            if self.claims:
+                claim = self.claims.claim(
+                    self.bucket_name, download_file_key, etag, sequencer
+                )
+                if claim == COMPLETED:
+                    log.info(
+                        f"File ({file_key}) was already downloaded by another instance"
+                    )
+                    return None
+                if claim == PENDING:
+                    # Retried later, so this version is not lost
+                    log.info(
+                        f"File ({file_key}) is being downloaded by another instance at another version"
+                    )
+                    return PENDING
+                if claim != CLAIMED:
+                    log.info(
+                        f"File ({file_key}) is being downloaded by another instance"
+                    )
+                    return None
+                claimed = True
+
+            file_key_split = file_key.split("/")
+            with self.tracer.span("create_directory"):
+                for i in range(len(file_key_split) - 1):
+                    self.create_directory(
+                        self.download_path + "/".join(file_key_split[: i + 1])
+                    )
+
+            # Download file from S3
+            start_time = time.perf_counter()
+            with self.tracer.span(
+                "download", file_key=download_file_key, traffic_class=traffic_class
+            ):
+                if self.atomic_downloader:
+                    # Written to a part file, verified and renamed into place over a single connection
+                    plan = self.transfer_planner.acquire(size, max_concurrency=1)
+                    try:
+                        self.transfer_limiter.acquire_requests(traffic_class, 2)
+                        downloaded = self.atomic_downloader.download(
+                            self.bucket_name,
+                            download_file_key,
+                            self.download_path + file_key,
+                            callback=self.transfer_limiter.bytes_callback(traffic_class),
+                        )
+                    finally:
+                        self.transfer_planner.release(plan)
+                    if downloaded["etag"] != etag:
+                        # A newer version was transferred, which the event's sequencer does not identify
+                        sequencer = None
+                    size = downloaded["size"]
+                    etag = downloaded["etag"]
+                    last_modified = downloaded["last_modified"]
+                else:
+                    # Pick transfer settings from the object size
+                    plan = self.transfer_planner.acquire(size)
+                    try:
+                        log.info(f"Downloading file ({file_key}) with {plan}")
+                        self.transfer_limiter.acquire_requests(traffic_class, plan.requests)
+                        self.transfer_planner.get_transfer(plan).download_file(
+                            self.bucket_name,
+                            download_file_key,
+                            self.download_path + file_key,
+                            callback=self.transfer_limiter.bytes_callback(traffic_class),
+                        )
+                    finally:
+                        self.transfer_planner.release(plan)
+
+            self.metrics.stage_duration.observe(
+                time.perf_counter() - start_time, "download"
             )
+            self.metrics.downloads.inc(label_value=traffic_class)
+            if size is None:
+                size = os.path.getsize(self.download_path + file_key)
+            self.metrics.download_bytes.inc(size, traffic_class)
+            self.metrics.watch_downloads.inc(label_value=self.watch_name)
+            self.metrics.watch_download_bytes.inc(size, self.watch_name)
 
             # Change file permissions
             if os.getenv("SDC_AWS_USER"):
-                os.chown(self.download_path + file_key, self.user[0], self.user[1])
+                with self.tracer.span("chown"):
+                    os.chown(self.download_path + file_key, self.user[0], self.user[1])
+
+            # Record the download in the manifest
+            if self.manifest:
+                with self.tracer.span("manifest"):
+                    self.manifest.record(
+                        self.download_path,
+                        self.bucket_name,
+                        download_file_key,
+                        self.download_path + file_key,
+                        size=size,
+                        etag=etag,
+                        last_modified=last_modified,
+                    )
+
+            if claimed:
+                self.claims.release(
+                    self.bucket_name,
+                    download_file_key,
+                    True,
+                    etag=etag,
+                    sequencer=sequencer,
+                )
 
             log.info(
                 f"Downloaded file ({file_key}) from S3 bucket ({self.bucket_name})"
             )
+            return True
 
         except Exception as e:
+            # Let another instance retry it
+            if claimed:
+                self.claims.release(self.bucket_name, download_file_key, False)
+
+            self.metrics.failures.inc(label_value="download")
             log.error(
                 f"Error downloading file ({file_key}) from S3 bucket ({self.bucket_name}): {e}"
             )
+            return False
 
     def create_directory(self, directory: str):
         """
@@ -359,6 +1197,9 @@ class SQSQueueHandler:
             if not os.path.exists(directory):
                 os.makedirs(directory)
                 log.info(f"Created directory ({directory})")
+        except FileExistsError:
+            # Created by another worker since the check
+            pass
         except Exception as e:
             log.error(f"Error creating directory ({directory}): {e}")
 
@@ -366,27 +1207,105 @@ class SQSQueueHandler:
         """
         Function to start polling for messages.
         """
-        # Poll on 10 threads
+        if self.config.engine == "thread":
+            # Poll on a thread of the download process
+            ThreadedEngine(self).run()
+            return
 
         p1 = Process(target=self.process_messages)
         p1.start()
         p2 = Process(target=self.poll)
         p2.start()
 
+        # Pass SIGTERM and SIGINT on to both processes and wait for them to shut down
+        processes = [p1, p2]
+
+        def forward_signal(signum, frame):
+            for process in processes:
+                if process.is_alive():
+                    os.kill(process.pid, signal.SIGTERM)
+
+        for signum in [signal.SIGTERM, signal.SIGINT]:
+            signal.signal(signum, forward_signal)
+
+        # Toggle the profilers of both processes, so the signal can be sent to the container
+        def forward_profile_signal(signum, frame):
+            for process in processes:
+                if process.is_alive():
+                    os.kill(process.pid, signum)
+
+        signal.signal(signal.SIGUSR2, forward_profile_signal)
+
+        for process in processes:
+            process.join()
+
     def poll(self):
+        # Stop receiving on SIGTERM or SIGINT
+        self.handle_signals(self.stop_polling)
+
+        self.tracer.start()
+        self.profiler.install()
+        self.clients.start(self.metrics)
+
+        # Every watch issues its receives on the same threads
+        handlers = list(self.watch_handlers.values())
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.config.receive_concurrency * len(handlers)
+        ) as executor:
+            threads = []
+            for handler in handlers[1:]:
+                thread = threading.Thread(
+                    target=handler.poll_queue,
+                    args=(executor,),
+                    name=f"poll-{handler.watch_name}",
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+            self.poll_queue(executor)
+
+            for thread in threads:
+                thread.join()
+
+        self.profiler.stop()
+        self.clients.stop(self.metrics)
+        self.tracer.stop()
+
+    def stop_polling(self):
+        """
+        Function to stop issuing receives. Receives already waiting on the queue finish first.
+        """
+        log.info("Stopping polling for messages")
+        self.stopping.set()
+
+    def poll_queue(self, executor: concurrent.futures.Executor):
+        """
+        Function to poll the watch's queue, paced by its own queue depth so a quiet queue backing off does not
+        hold up a busy one.
+        """
         log.info(f"Polling for messages on queue ({self.queue_name})")
+        scheduler = self.create_receive_scheduler()
+        while not self.stopping.is_set():
+            # Wait for the download workers to catch up before receiving more
+            receivers = scheduler.receivers()
+            if not receivers:
+                self.stopping.wait(0.1)
+                continue
+
+            # Issue as many concurrent receives as the queue depth and free capacity call for
+            futures = [executor.submit(self.get_messages) for _ in range(receivers)]
+
+            received = 0
+            for future in futures:
+                try:
+                    received += len(future.result() or [])
+                except Exception as e:
+                    log.error(
+                        f"Error polling for messages on queue ({self.queue_name}): {e}"
+                    )
 
-        while True:
-            # Poll for messages
-            polling.poll(
-                lambda: self.get_messages(),
-                poll_forever=True,
-                step=0.25,
-                check_success=lambda x: x is not None,
-                exception_handler=lambda x: log.error(
-                    f"Error polling for messages on queue ({self.queue_name}): {x}"
-                ),
-            )
+            # Back off when the queue is empty
+            self.stopping.wait(scheduler.next_delay(received))
 
     def setup(self):
         self.add_permissions_to_sqs(self.queue, self.bucket_name)
@@ -396,20 +1315,18 @@ class SQSQueueHandler:
             f"SQS queue '{self.queue_name}' is now configured to receive events from S3 bucket '{self.bucket_name}' with prefix '{self.folder}'."
         )
 
+        for handler in self.watch_handlers.values():
+            if handler is not self:
+                handler.setup()
+
     def create_or_get_sqs_queue(self, queue_name):
         try:
-            if time.time() - self.last_refresh_time >= 900:  # 900 seconds = 15 minutes
-                self._refresh_boto_session()
-            queue = self.sqs_resource.get_queue_by_name(QueueName=queue_name)
+            queue = self.clients.resource("sqs").get_queue_by_name(QueueName=queue_name)
             log.info(f"Queue ({queue_name}) already exists")
             return queue
         except Exception:
             if os.getenv("SDC_AWS_SETUP") == "true":
-                if (
-                    time.time() - self.last_refresh_time >= 900
-                ):  # 900 seconds = 15 minutes
-                    self._refresh_boto_session()
-                queue = self.sqs_resource.create_queue(QueueName=queue_name)
+                queue = self.clients.resource("sqs").create_queue(QueueName=queue_name)
                 log.info(f"Creating SQS Queue ({queue_name})")
                 return queue
             else:
@@ -441,19 +1358,19 @@ class SQSQueueHandler:
         if folder.endswith("/"):
             folder = folder[:-1]
 
+        # Deletes are only sent when they are propagated to the download path
+        events = ["s3:ObjectCreated:*"]
+        if self.allow_delete:
+            events.append("s3:ObjectRemoved:*")
+
         new_config = {
             "Id": f"{bucket_name}-{folder}-events",
             "QueueArn": queue.attributes["QueueArn"],
-            "Events": [
-                "s3:ObjectCreated:*",
-            ],
+            "Events": events,
             "Filter": {"Key": {"FilterRules": [{"Name": "prefix", "Value": folder}]}},
         }
 
-        if time.time() - self.last_refresh_time >= 900:  # 900 seconds = 15 minutes
-            self._refresh_boto_session()
-
-        current_config = self.s3.get_bucket_notification_configuration(Bucket=bucket_name)
+        current_config = self.get_s3_client().get_bucket_notification_configuration(Bucket=bucket_name)
 
         # Remove any invalid keys (like 'ResponseMetadata') from the current configuration
         valid_keys = ['TopicConfigurations', 'QueueConfigurations', 'LambdaFunctionConfigurations', 'EventBridgeConfiguration']
@@ -466,7 +1383,7 @@ class SQSQueueHandler:
         current_config['QueueConfigurations'] = queue_configurations
 
         # Update the bucket notification configuration
-        self.s3.put_bucket_notification_configuration(
+        self.get_s3_client().put_bucket_notification_configuration(
             Bucket=bucket_name, 
             NotificationConfiguration=current_config
         )
@@ -478,28 +1395,3 @@ class SQSQueueHandler:
             return split_bucket_name[0], split_bucket_name[1]
         else:
             return split_bucket_name[0], ""
-
-    def _refresh_boto_session(self):
-        """
-        Function to Refresh Boto3 Session
-        """
-        # Initialize Boto3 Session
-        self.session = (
-            boto3.session.Session(profile_name=self.config.profile)
-            if self.config.profile != ""
-            else boto3.session.Session(region=os.getenv("AWS_REGION"))
-        )
-
-        self.sqs = self.session.client("sqs")
-        self.sqs_resource = self.session.resource("sqs")
-        self.s3 = self.session.client("s3")
-
-        # Initialize S3 Transfer Manager with concurrency limit
-        botocore_config = botocore.config.Config(max_pool_connections=10)
-        s3client = self.session.client("s3", config=botocore_config)
-        transfer_config = TransferConfig(
-            use_threads=True,
-            max_concurrency=10,
-        )
-        self.s3t = S3Transfer(s3client, transfer_config)
-        self.last_refresh_time = time.time()
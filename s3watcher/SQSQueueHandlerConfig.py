@@ -3,7 +3,9 @@ File System Handler Configuration Module
 """
 
 from argparse import ArgumentParser
+import copy
 import os
+import yaml
 from s3watcher import log
 
 
@@ -24,6 +26,44 @@ class SQSQueueHandlerConfig:
         allow_delete: bool = False,
         slack_token: str = "",
         slack_channel: str = "",
+        engine: str = "process",
+        wait_time_seconds: int = 20,
+        receive_concurrency: int = 4,
+        ack_flush_interval: float = 1.0,
+        visibility_timeout: int = 30,
+        dedupe_capacity: int = 100000,
+        dedupe_ttl: float = 0,
+        coalesce_window: float = 0,
+        manifest_path: str = "",
+        list_concurrency: int = 8,
+        list_shards: list = None,
+        include_rules: list = None,
+        exclude_rules: list = None,
+        min_size: float = 0,
+        max_size: float = 0,
+        atomic_downloads: bool = False,
+        connection_budget: int = 50,
+        multipart_threshold: float = 8,
+        multipart_chunksize: float = 8,
+        live_bandwidth_limit: float = 0,
+        live_request_rate: float = 0,
+        backfill_bandwidth_limit: float = 0,
+        backfill_request_rate: float = 0,
+        priority_prefixes: dict = None,
+        large_object_size: float = 100,
+        priority_aging: float = 60,
+        timestream_batch_size: int = 100,
+        timestream_flush_interval: float = 5.0,
+        slack_digest_interval: float = 60,
+        slack_rate: float = 1.0,
+        metrics_port: int = 0,
+        trace_path: str = "",
+        trace_summary_interval: float = 0,
+        profile_path: str = "",
+        coordinate: bool = False,
+        claim_timeout: float = 300,
+        watch_name: str = "",
+        watches: list = None,
     ) -> None:
         """
         Class Constructor
@@ -39,6 +79,126 @@ class SQSQueueHandlerConfig:
         self.allow_delete = allow_delete
         self.slack_token = slack_token
         self.slack_channel = slack_channel
+        self.engine = engine
+        self.wait_time_seconds = wait_time_seconds
+        self.receive_concurrency = receive_concurrency
+        self.ack_flush_interval = ack_flush_interval
+        self.visibility_timeout = visibility_timeout
+        self.dedupe_capacity = dedupe_capacity
+        self.dedupe_ttl = dedupe_ttl
+        self.coalesce_window = coalesce_window
+        self.manifest_path = manifest_path
+        self.list_concurrency = list_concurrency
+        self.list_shards = list_shards or []
+        self.include_rules = include_rules or []
+        self.exclude_rules = exclude_rules or []
+        self.min_size = min_size
+        self.max_size = max_size
+        self.atomic_downloads = atomic_downloads
+        self.connection_budget = connection_budget
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunksize = multipart_chunksize
+        self.live_bandwidth_limit = live_bandwidth_limit
+        self.live_request_rate = live_request_rate
+        self.backfill_bandwidth_limit = backfill_bandwidth_limit
+        self.backfill_request_rate = backfill_request_rate
+        self.priority_prefixes = priority_prefixes or {}
+        self.large_object_size = large_object_size
+        self.priority_aging = priority_aging
+        self.timestream_batch_size = timestream_batch_size
+        self.timestream_flush_interval = timestream_flush_interval
+        self.slack_digest_interval = slack_digest_interval
+        self.slack_rate = slack_rate
+        self.metrics_port = metrics_port
+        self.trace_path = trace_path
+        self.trace_summary_interval = trace_summary_interval
+        self.profile_path = profile_path
+        self.coordinate = coordinate
+        self.claim_timeout = claim_timeout
+        self.watch_name = watch_name or queue_name
+        self.watches = watches or []
+
+    def get_watch_configs(self) -> list:
+        """
+        Function to get a configuration for every watch, this configuration's queue, bucket and path first,
+        followed by the additional watches. They differ only in the queue, bucket, folder, download path and
+        key filter rules.
+        """
+        watch_configs = [self]
+        for watch in self.watches:
+            watch_config = copy.copy(self)
+            watch_config.queue_name = watch["queue_name"]
+            watch_config.bucket_name = watch["bucket_name"]
+            watch_config.path = watch["path"]
+            watch_config.watch_name = watch.get("name") or watch["queue_name"]
+            watch_config.include_rules = watch.get("include", self.include_rules)
+            watch_config.exclude_rules = watch.get("exclude", self.exclude_rules)
+            watch_config.watches = []
+            watch_configs.append(watch_config)
+
+        return watch_configs
+
+
+def load_watches(path: str) -> list:
+    """
+    Function to load the watch definitions from a YAML file, each with a queue name, a bucket name with an
+    optional folder, a download path, an optional name and optional include and exclude rules
+
+    :param path: Path of the YAML file
+    :type path: str
+    :return: List of watch definitions
+    :rtype: list
+    """
+    with open(path) as watch_file:
+        watches = (yaml.safe_load(watch_file) or {}).get("watches") or []
+
+    for watch in watches:
+        missing = [
+            field
+            for field in ["queue_name", "bucket_name", "path"]
+            if not watch.get(field)
+        ]
+        if missing:
+            raise ValueError(f"Watch {watch} in ({path}) is missing {missing}")
+
+        # A single rule may be given without a list
+        for field in ["include", "exclude"]:
+            if isinstance(watch.get(field), str):
+                watch[field] = [watch[field]]
+
+    validate_watches(watches)
+
+    return watches
+
+
+def validate_watches(watches: list) -> None:
+    """
+    Function to check that watches can run side by side, each with its own queue, name and download path,
+    and no download path inside another one. Raises ValueError otherwise
+
+    :param watches: List of watch definitions
+    :type watches: list
+    """
+    # Events are routed to their watch by queue, and metrics and tasks by name
+    queue_names = [watch["queue_name"] for watch in watches]
+    if len(set(queue_names)) != len(queue_names):
+        raise ValueError("Watches must each use a different queue")
+
+    names = [watch.get("name") or watch["queue_name"] for watch in watches]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(
+            f"Watches must each have a different name, {duplicates} is used more than once"
+        )
+
+    # A watch checking with S3 would see the files of a watch nested in its download path as its own
+    paths = [os.path.abspath(watch["path"]) for watch in watches]
+    for index, path in enumerate(paths):
+        for other in paths[index + 1 :]:
+            if os.path.commonpath([path, other]) in [path, other]:
+                raise ValueError(
+                    f"Watch download paths ({path}) and ({other}) must not be the same or nested"
+                )
 
 
 def create_argparse() -> ArgumentParser:
@@ -76,7 +236,8 @@ def create_argparse() -> ArgumentParser:
         "-c",
         "--concurrency_limit_limit",
         type=int,
-        help="Concurrency Limit for the File System Watcher",
+        default=20,
+        help="Number of download workers processing events concurrently",
     )
 
     # Add Argument to parse the allow delete flag
@@ -101,6 +262,337 @@ def create_argparse() -> ArgumentParser:
         help="Channel for Slack to send notifications",
     )
 
+    # The arguments below default to their SDC_AWS_* environment variable, booleans to whether it is "true"
+
+    # Add Argument to parse the runtime engine
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=["process", "thread"],
+        default=os.getenv("SDC_AWS_ENGINE", "process"),
+        help="Runtime engine, separate poll/download processes or a single process polling on a thread",
+    )
+
+    # Add Argument to parse the SQS long polling wait time
+    parser.add_argument(
+        "-w",
+        "--wait_time_seconds",
+        type=int,
+        choices=range(0, 21),
+        default=os.getenv("SDC_AWS_WAIT_TIME_SECONDS", 20),
+        metavar="[0-20]",
+        help="Seconds each receive waits for messages (SQS long polling), 0 disables long polling",
+    )
+
+    # Add Argument to parse the maximum number of concurrent receives
+    parser.add_argument(
+        "-rc",
+        "--receive_concurrency",
+        type=int,
+        default=os.getenv("SDC_AWS_RECEIVE_CONCURRENCY", 4),
+        help="Maximum number of concurrent receives issued when the queue is deep",
+    )
+
+    # Add Argument to parse the acknowledgement flush interval
+    parser.add_argument(
+        "-af",
+        "--ack_flush_interval",
+        type=float,
+        default=os.getenv("SDC_AWS_ACK_FLUSH_INTERVAL", 1.0),
+        help="Maximum seconds processed messages wait before being deleted from the queue in a batch",
+    )
+
+    # Add Argument to parse the message visibility timeout
+    parser.add_argument(
+        "-vt",
+        "--visibility_timeout",
+        type=int,
+        default=os.getenv("SDC_AWS_VISIBILITY_TIMEOUT", 30),
+        help="Seconds a received message stays invisible, extended while its download is in progress",
+    )
+
+    # Add Argument to parse the deduplication cache capacity
+    parser.add_argument(
+        "-dc",
+        "--dedupe_capacity",
+        type=int,
+        default=os.getenv("SDC_AWS_DEDUPE_CAPACITY", 100000),
+        help="Number of recently processed messages and object versions remembered to skip duplicates",
+    )
+
+    # Add Argument to parse the deduplication cache time window
+    parser.add_argument(
+        "-dt",
+        "--dedupe_ttl",
+        type=float,
+        default=os.getenv("SDC_AWS_DEDUPE_TTL", 0),
+        help="Seconds a processed message is remembered for duplicate detection, 0 keeps it until evicted",
+    )
+
+    # Add Argument to parse the event coalescing window
+    parser.add_argument(
+        "-cw",
+        "--coalesce_window",
+        type=float,
+        default=os.getenv("SDC_AWS_COALESCE_WINDOW", 0),
+        help="Seconds events are held to collapse repeated events of the same key into the newest, 0 disables it",
+    )
+
+    # Add Argument to parse the download manifest path
+    parser.add_argument(
+        "-m",
+        "--manifest_path",
+        default=os.getenv("SDC_AWS_MANIFEST_PATH", ""),
+        help="Path of the SQLite manifest recording downloaded objects, disabled if not set",
+    )
+
+    # Add Argument to parse the number of concurrent bucket listings
+    parser.add_argument(
+        "-lc",
+        "--list_concurrency",
+        type=int,
+        default=os.getenv("SDC_AWS_LIST_CONCURRENCY", 8),
+        help="Number of bucket prefixes listed concurrently when checking with S3",
+    )
+
+    # Add Argument to parse the prefixes to shard the bucket listing by
+    parser.add_argument(
+        "-ls",
+        "--list_shards",
+        default=os.getenv("SDC_AWS_LIST_SHARDS", ""),
+        help="Comma separated prefixes under the watched folder to list when checking with S3, discovered from the bucket if not set",
+    )
+
+    # Add Argument to parse the key include rules
+    parser.add_argument(
+        "-in",
+        "--include",
+        default=os.getenv("SDC_AWS_INCLUDE", ""),
+        help="Comma separated prefixes, globs or re: regular expressions of keys under the watched folder to mirror, all keys if not set",
+    )
+
+    # Add Argument to parse the key exclude rules
+    parser.add_argument(
+        "-ex",
+        "--exclude",
+        default=os.getenv("SDC_AWS_EXCLUDE", ""),
+        help="Comma separated prefixes, globs or re: regular expressions of keys under the watched folder to skip",
+    )
+
+    # Add Argument to parse the minimum object size
+    parser.add_argument(
+        "-ns",
+        "--min_size",
+        type=float,
+        default=os.getenv("SDC_AWS_MIN_SIZE", 0),
+        help="Size in MB below which objects are skipped, 0 to disable",
+    )
+
+    # Add Argument to parse the maximum object size
+    parser.add_argument(
+        "-xs",
+        "--max_size",
+        type=float,
+        default=os.getenv("SDC_AWS_MAX_SIZE", 0),
+        help="Size in MB above which objects are skipped, 0 to disable",
+    )
+
+    # Add Argument to parse the atomic downloads flag
+    parser.add_argument(
+        "-ad",
+        "--atomic_downloads",
+        action="store_true",
+        default=os.getenv("SDC_AWS_ATOMIC_DOWNLOADS", "").lower() == "true",
+        help="Download to a part file that is verified, resumed after failures and renamed into place",
+    )
+
+    # Add Argument to parse the S3 connection budget
+    parser.add_argument(
+        "-cb",
+        "--connection_budget",
+        type=int,
+        default=os.getenv("SDC_AWS_CONNECTION_BUDGET", 50),
+        help="Number of S3 connections shared by all transfers, a single object uses at most half of them",
+    )
+
+    # Add Argument to parse the multipart threshold
+    parser.add_argument(
+        "-mt",
+        "--multipart_threshold",
+        type=float,
+        default=os.getenv("SDC_AWS_MULTIPART_THRESHOLD", 8),
+        help="Size in MB from which objects are downloaded in parallel parts",
+    )
+
+    # Add Argument to parse the multipart chunk size
+    parser.add_argument(
+        "-mc",
+        "--multipart_chunksize",
+        type=float,
+        default=os.getenv("SDC_AWS_MULTIPART_CHUNKSIZE", 8),
+        help="Size in MB of the parts objects are downloaded in, raised for very large objects",
+    )
+
+    # Add Argument to parse the live download bandwidth limit
+    parser.add_argument(
+        "-lb",
+        "--live_bandwidth_limit",
+        type=float,
+        default=os.getenv("SDC_AWS_LIVE_BANDWIDTH_LIMIT", 0),
+        help="Bandwidth in MB/s shared by downloads of live events, 0 for unlimited",
+    )
+
+    # Add Argument to parse the live download request rate
+    parser.add_argument(
+        "-lr",
+        "--live_request_rate",
+        type=float,
+        default=os.getenv("SDC_AWS_LIVE_REQUEST_RATE", 0),
+        help="S3 requests per second shared by downloads of live events, 0 for unlimited",
+    )
+
+    # Add Argument to parse the backfill download bandwidth limit
+    parser.add_argument(
+        "-bb",
+        "--backfill_bandwidth_limit",
+        type=float,
+        default=os.getenv("SDC_AWS_BACKFILL_BANDWIDTH_LIMIT", 0),
+        help="Bandwidth in MB/s shared by downloads when checking with S3, 0 for unlimited",
+    )
+
+    # Add Argument to parse the backfill download request rate
+    parser.add_argument(
+        "-br",
+        "--backfill_request_rate",
+        type=float,
+        default=os.getenv("SDC_AWS_BACKFILL_REQUEST_RATE", 0),
+        help="S3 requests per second shared by downloads when checking with S3, 0 for unlimited",
+    )
+
+    # Add Argument to parse the priority prefixes
+    parser.add_argument(
+        "-pp",
+        "--priority_prefixes",
+        default=os.getenv("SDC_AWS_PRIORITY_PREFIXES", ""),
+        help="Comma separated prefix=level rules (0 is the most urgent, 5 the least) for downloads of matching keys",
+    )
+
+    # Add Argument to parse the large object size
+    parser.add_argument(
+        "-lo",
+        "--large_object_size",
+        type=float,
+        default=os.getenv("SDC_AWS_LARGE_OBJECT_SIZE", 100),
+        help="Size in MB above which objects are downloaded at a lower priority, 0 to disable",
+    )
+
+    # Add Argument to parse the priority aging interval
+    parser.add_argument(
+        "-pa",
+        "--priority_aging",
+        type=float,
+        default=os.getenv("SDC_AWS_PRIORITY_AGING", 60),
+        help="Seconds a download waits before it moves up one priority level",
+    )
+
+    # Add Argument to parse the Timestream batch size
+    parser.add_argument(
+        "-tb",
+        "--timestream_batch_size",
+        type=int,
+        choices=range(1, 101),
+        default=os.getenv("SDC_AWS_TIMESTREAM_BATCH_SIZE", 100),
+        metavar="[1-100]",
+        help="Number of Timestream records written per request",
+    )
+
+    # Add Argument to parse the Timestream flush interval
+    parser.add_argument(
+        "-tf",
+        "--timestream_flush_interval",
+        type=float,
+        default=os.getenv("SDC_AWS_TIMESTREAM_FLUSH_INTERVAL", 5.0),
+        help="Maximum seconds Timestream records are buffered before being written in a batch",
+    )
+
+    # Add Argument to parse the Slack digest interval
+    parser.add_argument(
+        "-sd",
+        "--slack_digest_interval",
+        type=float,
+        default=os.getenv("SDC_AWS_SLACK_DIGEST_INTERVAL", 60),
+        help="Seconds between Slack digests of downloaded files, failures are sent right away",
+    )
+
+    # Add Argument to parse the Slack message rate
+    parser.add_argument(
+        "-sr",
+        "--slack_rate",
+        type=float,
+        default=os.getenv("SDC_AWS_SLACK_RATE", 1.0),
+        help="Maximum Slack messages sent per second",
+    )
+
+    # Add Argument to parse the metrics port
+    parser.add_argument(
+        "-mp",
+        "--metrics_port",
+        type=int,
+        default=os.getenv("SDC_AWS_METRICS_PORT", 0),
+        help="Port to serve Prometheus metrics on at /metrics, 0 disables the endpoint",
+    )
+
+    # Add Argument to parse the trace path
+    parser.add_argument(
+        "-tp",
+        "--trace_path",
+        default=os.getenv("SDC_AWS_TRACE_PATH", ""),
+        help="File to append per-stage timing spans to as JSON lines, tracing is disabled if not set",
+    )
+
+    # Add Argument to parse the trace summary interval
+    parser.add_argument(
+        "-ts",
+        "--trace_summary_interval",
+        type=float,
+        default=os.getenv("SDC_AWS_TRACE_SUMMARY_INTERVAL", 0),
+        help="Seconds between logged summaries of per-stage timings, 0 disables the summary",
+    )
+
+    # Add Argument to parse the profile path
+    parser.add_argument(
+        "-pf",
+        "--profile_path",
+        default=os.getenv("SDC_AWS_PROFILE_PATH", ""),
+        help="Directory sampling profiles are written to when toggled with SIGUSR2, defaults to the temp directory",
+    )
+
+    # Add Argument to parse the coordination flag
+    parser.add_argument(
+        "-co",
+        "--coordinate",
+        action="store_true",
+        default=os.getenv("SDC_AWS_COORDINATE", "").lower() == "true",
+        help="Claim keys through lock files in the download path so instances sharing it never download the same object twice",
+    )
+
+    # Add Argument to parse the claim timeout
+    parser.add_argument(
+        "-ct",
+        "--claim_timeout",
+        type=float,
+        default=os.getenv("SDC_AWS_CLAIM_TIMEOUT", 300),
+        help="Seconds without a heartbeat after which another instance's claim on a key is recovered",
+    )
+
+    # Add Argument to parse the watch file
+    parser.add_argument(
+        "-wf",
+        "--watch_file",
+        default=os.getenv("SDC_AWS_WATCH_FILE", ""),
+        help="YAML file listing additional queues, buckets and download paths watched by the same process",
+    )
+
     # Return the Argument Parser
     return parser
 
@@ -131,6 +623,53 @@ def get_args(args: ArgumentParser) -> dict:
     args_dict["SDC_AWS_ALLOW_DELETE"] = args.allow_delete
     args_dict["SDC_AWS_SLACK_TOKEN"] = args.slack_token
     args_dict["SDC_AWS_SLACK_CHANNEL"] = args.slack_channel
+    args_dict["SDC_AWS_ENGINE"] = args.engine
+    args_dict["SDC_AWS_WAIT_TIME_SECONDS"] = args.wait_time_seconds
+    args_dict["SDC_AWS_RECEIVE_CONCURRENCY"] = args.receive_concurrency
+    args_dict["SDC_AWS_ACK_FLUSH_INTERVAL"] = args.ack_flush_interval
+    args_dict["SDC_AWS_VISIBILITY_TIMEOUT"] = args.visibility_timeout
+    args_dict["SDC_AWS_DEDUPE_CAPACITY"] = args.dedupe_capacity
+    args_dict["SDC_AWS_DEDUPE_TTL"] = args.dedupe_ttl
+    args_dict["SDC_AWS_COALESCE_WINDOW"] = args.coalesce_window
+    args_dict["SDC_AWS_MANIFEST_PATH"] = args.manifest_path
+    args_dict["SDC_AWS_LIST_CONCURRENCY"] = args.list_concurrency
+    args_dict["SDC_AWS_ATOMIC_DOWNLOADS"] = args.atomic_downloads
+    args_dict["SDC_AWS_CONNECTION_BUDGET"] = args.connection_budget
+    args_dict["SDC_AWS_MULTIPART_THRESHOLD"] = args.multipart_threshold
+    args_dict["SDC_AWS_MULTIPART_CHUNKSIZE"] = args.multipart_chunksize
+    args_dict["SDC_AWS_LIVE_BANDWIDTH_LIMIT"] = args.live_bandwidth_limit
+    args_dict["SDC_AWS_LIVE_REQUEST_RATE"] = args.live_request_rate
+    args_dict["SDC_AWS_BACKFILL_BANDWIDTH_LIMIT"] = args.backfill_bandwidth_limit
+    args_dict["SDC_AWS_BACKFILL_REQUEST_RATE"] = args.backfill_request_rate
+    args_dict["SDC_AWS_LIST_SHARDS"] = [
+        shard.strip() for shard in args.list_shards.split(",") if shard.strip()
+    ]
+    args_dict["SDC_AWS_INCLUDE"] = [
+        rule.strip() for rule in args.include.split(",") if rule.strip()
+    ]
+    args_dict["SDC_AWS_EXCLUDE"] = [
+        rule.strip() for rule in args.exclude.split(",") if rule.strip()
+    ]
+    args_dict["SDC_AWS_MIN_SIZE"] = args.min_size
+    args_dict["SDC_AWS_MAX_SIZE"] = args.max_size
+    args_dict["SDC_AWS_PRIORITY_PREFIXES"] = {
+        rule.split("=", 1)[0].strip(): int(rule.split("=", 1)[1])
+        for rule in args.priority_prefixes.split(",")
+        if "=" in rule
+    }
+    args_dict["SDC_AWS_LARGE_OBJECT_SIZE"] = args.large_object_size
+    args_dict["SDC_AWS_PRIORITY_AGING"] = args.priority_aging
+    args_dict["SDC_AWS_TIMESTREAM_BATCH_SIZE"] = args.timestream_batch_size
+    args_dict["SDC_AWS_TIMESTREAM_FLUSH_INTERVAL"] = args.timestream_flush_interval
+    args_dict["SDC_AWS_SLACK_DIGEST_INTERVAL"] = args.slack_digest_interval
+    args_dict["SDC_AWS_SLACK_RATE"] = args.slack_rate
+    args_dict["SDC_AWS_METRICS_PORT"] = args.metrics_port
+    args_dict["SDC_AWS_TRACE_PATH"] = args.trace_path
+    args_dict["SDC_AWS_TRACE_SUMMARY_INTERVAL"] = args.trace_summary_interval
+    args_dict["SDC_AWS_PROFILE_PATH"] = args.profile_path
+    args_dict["SDC_AWS_COORDINATE"] = args.coordinate
+    args_dict["SDC_AWS_CLAIM_TIMEOUT"] = args.claim_timeout
+    args_dict["SDC_AWS_WATCH_FILE"] = args.watch_file
 
     # Return the arguments dictionary
     return args_dict
@@ -167,6 +706,46 @@ def get_config() -> SQSQueueHandlerConfig:
 
     # Get the arguments and environment variables
     args = get_args(create_argparse())
+
+    # Load the additional watches, the first one is used if no queue, bucket and path are given
+    watches = []
+    if args.get("SDC_AWS_WATCH_FILE"):
+        try:
+            watches = load_watches(args.get("SDC_AWS_WATCH_FILE"))
+        except Exception as e:
+            log.error(f"Error loading watches ({args.get('SDC_AWS_WATCH_FILE')}): {e}")
+            exit(1)
+
+        if watches and not validate_config_dict(args):
+            watch = watches.pop(0)
+            args["SDC_AWS_WATCH_PATH"] = watch["path"]
+            args["SDC_AWS_S3_BUCKET"] = watch["bucket_name"]
+            args["SDC_AWS_SQS_QUEUE_NAME"] = watch["queue_name"]
+            args["SDC_AWS_WATCH_NAME"] = watch.get("name")
+
+        # The watch given by the arguments runs alongside the watches of the file
+        try:
+            if validate_config_dict(args):
+                validate_watches(
+                    [
+                        {
+                            "queue_name": args.get("SDC_AWS_SQS_QUEUE_NAME"),
+                            "name": args.get("SDC_AWS_WATCH_NAME"),
+                            "path": args.get("SDC_AWS_WATCH_PATH"),
+                        }
+                    ]
+                    + watches
+                )
+        except ValueError as e:
+            log.error(f"Invalid watches ({args.get('SDC_AWS_WATCH_FILE')}): {e}")
+            exit(1)
+
+        if watches and args.get("SDC_AWS_ENGINE") == "thread":
+            log.error(
+                "The thread engine watches a single queue, use the process engine to watch several"
+            )
+            exit(1)
+
     if validate_config_dict(args):
         config = SQSQueueHandlerConfig(
             path=args.get("SDC_AWS_WATCH_PATH"),
@@ -179,6 +758,44 @@ def get_config() -> SQSQueueHandlerConfig:
             allow_delete=args.get("SDC_AWS_ALLOW_DELETE"),
             slack_token=args.get("SDC_AWS_SLACK_TOKEN"),
             slack_channel=args.get("SDC_AWS_SLACK_CHANNEL"),
+            engine=args.get("SDC_AWS_ENGINE"),
+            wait_time_seconds=args.get("SDC_AWS_WAIT_TIME_SECONDS"),
+            receive_concurrency=args.get("SDC_AWS_RECEIVE_CONCURRENCY"),
+            ack_flush_interval=args.get("SDC_AWS_ACK_FLUSH_INTERVAL"),
+            visibility_timeout=args.get("SDC_AWS_VISIBILITY_TIMEOUT"),
+            dedupe_capacity=args.get("SDC_AWS_DEDUPE_CAPACITY"),
+            dedupe_ttl=args.get("SDC_AWS_DEDUPE_TTL"),
+            coalesce_window=args.get("SDC_AWS_COALESCE_WINDOW"),
+            manifest_path=args.get("SDC_AWS_MANIFEST_PATH"),
+            list_concurrency=args.get("SDC_AWS_LIST_CONCURRENCY"),
+            list_shards=args.get("SDC_AWS_LIST_SHARDS"),
+            include_rules=args.get("SDC_AWS_INCLUDE"),
+            exclude_rules=args.get("SDC_AWS_EXCLUDE"),
+            min_size=args.get("SDC_AWS_MIN_SIZE"),
+            max_size=args.get("SDC_AWS_MAX_SIZE"),
+            atomic_downloads=args.get("SDC_AWS_ATOMIC_DOWNLOADS"),
+            connection_budget=args.get("SDC_AWS_CONNECTION_BUDGET"),
+            multipart_threshold=args.get("SDC_AWS_MULTIPART_THRESHOLD"),
+            multipart_chunksize=args.get("SDC_AWS_MULTIPART_CHUNKSIZE"),
+            live_bandwidth_limit=args.get("SDC_AWS_LIVE_BANDWIDTH_LIMIT"),
+            live_request_rate=args.get("SDC_AWS_LIVE_REQUEST_RATE"),
+            backfill_bandwidth_limit=args.get("SDC_AWS_BACKFILL_BANDWIDTH_LIMIT"),
+            backfill_request_rate=args.get("SDC_AWS_BACKFILL_REQUEST_RATE"),
+            priority_prefixes=args.get("SDC_AWS_PRIORITY_PREFIXES"),
+            large_object_size=args.get("SDC_AWS_LARGE_OBJECT_SIZE"),
+            priority_aging=args.get("SDC_AWS_PRIORITY_AGING"),
+            timestream_batch_size=args.get("SDC_AWS_TIMESTREAM_BATCH_SIZE"),
+            timestream_flush_interval=args.get("SDC_AWS_TIMESTREAM_FLUSH_INTERVAL"),
+            slack_digest_interval=args.get("SDC_AWS_SLACK_DIGEST_INTERVAL"),
+            slack_rate=args.get("SDC_AWS_SLACK_RATE"),
+            metrics_port=args.get("SDC_AWS_METRICS_PORT"),
+            trace_path=args.get("SDC_AWS_TRACE_PATH"),
+            trace_summary_interval=args.get("SDC_AWS_TRACE_SUMMARY_INTERVAL"),
+            profile_path=args.get("SDC_AWS_PROFILE_PATH"),
+            coordinate=args.get("SDC_AWS_COORDINATE"),
+            claim_timeout=args.get("SDC_AWS_CLAIM_TIMEOUT"),
+            watch_name=args.get("SDC_AWS_WATCH_NAME"),
+            watches=watches,
         )
     else:
         log.error(
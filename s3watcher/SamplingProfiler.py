@@ -0,0 +1,142 @@
+"""
+Sampling Profiler Module
+"""
+
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Optional
+from s3watcher import log
+
+
+class SamplingProfiler:
+    """
+    Class to sample the stacks of every thread while enabled and write them as folded stacks for flame graphs.
+    It is toggled with a signal and costs nothing while off.
+    """
+
+    def __init__(
+        self, output_path: str = "", interval: float = 0.01, max_depth: int = 64
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.output_path = output_path or tempfile.gettempdir()
+        self.interval = interval
+        self.max_depth = max_depth
+
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = None
+        self._stop_event = None
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the profiler is sampling
+        """
+        return self._thread is not None
+
+    def install(self, signum: int = signal.SIGUSR2) -> None:
+        """
+        Function to toggle the profiler whenever the process receives the signal. Must be called from the
+        main thread.
+        """
+        try:
+            signal.signal(signum, lambda *args: self.toggle())
+            log.info(
+                f"Send signal {signal.Signals(signum).name} to process ({os.getpid()}) to toggle profiling"
+            )
+        except (ValueError, AttributeError, OSError) as e:
+            log.error(f"Error installing profiler signal handler: {e}")
+
+    def toggle(self) -> None:
+        """
+        Function to start the profiler if it is off, or stop it and write the profile if it is on.
+        """
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def start(self) -> None:
+        """
+        Function to start sampling from a background thread.
+        """
+        if self.running:
+            return
+
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = time.time()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(self._stop_event,),
+            name="sampling-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+        log.info(f"Started sampling profiler every {self.interval * 1000:.0f}ms")
+
+    def _run(self, stop_event: threading.Event) -> None:
+        """
+        Function run by the sampling thread, counting the stack of every other thread.
+        """
+        own_id = threading.get_ident()
+        names = {}
+        while not stop_event.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                    )
+                    frame = frame.f_back
+
+                # Group threads of the same pool together
+                thread_name = names.get(thread_id, "thread").rstrip("0123456789-_")
+                stack.append(thread_name)
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> Optional[str]:
+        """
+        Function to stop sampling and write the folded stacks. Returns the path of the profile, None if the
+        profiler was not running or the profile could not be written.
+        """
+        if not self.running:
+            return None
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+        path = os.path.join(
+            self.output_path,
+            f"s3watcher-profile-{os.getpid()}-{int(self.started)}.folded",
+        )
+        try:
+            with open(path, "w") as profile_file:
+                for stack, count in self.stacks.most_common():
+                    profile_file.write(f"{stack} {count}\n")
+            log.info(
+                f"Wrote profile of {self.samples} samples over {time.time() - self.started:.1f}s to ({path})"
+            )
+        except Exception as e:
+            log.error(f"Error writing profile to ({path}): {e}")
+            return None
+
+        return path
@@ -0,0 +1,264 @@
+"""
+Slack Notifier Module
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Any, List
+from slack_sdk.errors import SlackApiError
+from sdc_aws_utils.slack import send_pipeline_notification
+from s3watcher import log
+from s3watcher.RateLimiter import TokenBucket
+from s3watcher.TransferPlanner import MB
+
+
+class SlackNotifier:
+    """
+    Class to send Slack notifications from a background thread, aggregating downloads into periodic digests and
+    sending failure alerts right away, within a message rate limit
+    """
+
+    # Number of prefixes and failed keys listed in a digest
+    max_listed = 5
+
+    # Number of failures alerted right away per digest, later ones are only counted in the digest
+    max_alerts = 10
+
+    def __init__(
+        self,
+        slack_client: Any,
+        slack_channel: str,
+        bucket_name: str = "",
+        digest_interval: float = 60,
+        rate: float = 1.0,
+        metrics: Any = None,
+    ) -> None:
+        """
+        Class Constructor, the rate is in messages per second
+        """
+        self.slack_client = slack_client
+        self.slack_channel = slack_channel
+        self.bucket_name = bucket_name
+        self.digest_interval = digest_interval
+        self.rate_limit = TokenBucket(rate, capacity=1)
+        self.metrics = metrics
+
+        self._reset_digest()
+        self.alerts = []
+        self.sent = 0
+        self.failed = 0
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def _reset_digest(self) -> None:
+        """
+        Function to start a new digest.
+        """
+        self.digest_start = time.time()
+        self.download_count = 0
+        self.downloads = []
+        self.bytes = 0
+        self.prefixes = Counter()
+        self.failure_count = 0
+        self.failures = []
+        self.alerted = set()
+
+    def start(self) -> None:
+        """
+        Function to start the background notification thread.
+        """
+        self._thread = threading.Thread(
+            target=self._run, name="slack-notifier", daemon=True
+        )
+        self._thread.start()
+
+    def record_download(self, file_key: str, size: int = None) -> None:
+        """
+        Function to add a downloaded file to the next digest, which lists the first few.
+        """
+        with self._condition:
+            self.download_count += 1
+            if len(self.downloads) < self.max_listed:
+                self.downloads.append(file_key)
+            self.bytes += size or 0
+            prefix = file_key.rsplit("/", 1)[0] if "/" in file_key else ""
+            self.prefixes[prefix] += 1
+
+    def record_failure(
+        self, file_key: str, error: str, bucket_name: str = None
+    ) -> None:
+        """
+        Function to add a failed file to the next digest and send an alert about it right away. Repeat failures
+        of a key and failures past the alert limit of the digest are only counted in the digest.
+        """
+        with self._condition:
+            self.failure_count += 1
+            if file_key not in self.failures and len(self.failures) < self.max_listed:
+                self.failures.append(file_key)
+
+            if (
+                file_key in self.alerted
+                or len(self.alerted) >= self.max_alerts
+                or len(self.alerts) >= self.max_alerts
+            ):
+                return
+            self.alerted.add(file_key)
+            self.alerts.append(
+                f"Error processing file ({file_key}) from bucket ({bucket_name or self.bucket_name}): {error}"
+            )
+            self._condition.notify()
+
+    def _run(self) -> None:
+        """
+        Function run by the notification thread, sending alerts as they come and a digest every interval.
+        """
+        while True:
+            with self._condition:
+                remaining = self.digest_start + self.digest_interval - time.time()
+                if not self._stopped and not self.alerts and remaining > 0:
+                    self._condition.wait(remaining)
+                if self._stopped:
+                    return
+                alerts, self.alerts = self.alerts, []
+
+            for alert in alerts:
+                self._post(alert)
+
+            if time.time() - self.digest_start >= self.digest_interval:
+                self.flush()
+
+    def flush(self, deadline: float = None) -> None:
+        """
+        Function to send the current digest if anything happened since the last one.
+        """
+        with self._condition:
+            download_count, downloads = self.download_count, self.downloads
+            byte_count, prefixes = self.bytes, self.prefixes
+            failure_count, failures = self.failure_count, self.failures
+            elapsed = time.time() - self.digest_start
+            self._reset_digest()
+
+        if not download_count and not failure_count:
+            return
+
+        # A single download keeps the usual pipeline notification
+        if download_count == 1 and not failure_count:
+            self.rate_limit.acquire()
+            try:
+                send_pipeline_notification(
+                    slack_client=self.slack_client,
+                    slack_channel=self.slack_channel,
+                    path=downloads[0],
+                    alert_type="download",
+                )
+                self.sent += 1
+            except Exception as e:
+                self.failed += 1
+                log.error(f"Error sending Slack notification: {e}")
+            return
+
+        self._post(
+            self.format_digest(
+                download_count, byte_count, prefixes, failure_count, failures, elapsed
+            ),
+            deadline=deadline,
+        )
+
+    def format_digest(
+        self,
+        download_count: int,
+        byte_count: int,
+        prefixes: Counter,
+        failure_count: int,
+        failures: List[str],
+        elapsed: float,
+    ) -> str:
+        """
+        Function to format a digest message.
+        """
+        lines = [
+            f"Downloaded {download_count} files ({byte_count / MB:.1f} MB) from bucket ({self.bucket_name}) "
+            f"in the last {elapsed:.0f}s"
+        ]
+        if prefixes:
+            top = ", ".join(
+                f"{prefix or '/'} ({count})"
+                for prefix, count in prefixes.most_common(self.max_listed)
+            )
+            lines.append(f"Top prefixes: {top}")
+        if failure_count:
+            lines.append(
+                f"Failures: {failure_count}, first failed files: {', '.join(failures)}"
+            )
+        return "\n".join(lines)
+
+    def _post(self, text: str, deadline: float = None) -> None:
+        """
+        Function to post a message to the channel, waiting out Slack rate limits once unless that would run past
+        the deadline.
+        """
+        for attempt in range(2):
+            self.rate_limit.acquire()
+            try:
+                start_time = time.perf_counter()
+                self.slack_client.chat_postMessage(
+                    channel=self.slack_channel, text=text
+                )
+                if self.metrics:
+                    self.metrics.stage_duration.observe(
+                        time.perf_counter() - start_time, "notification"
+                    )
+                self.sent += 1
+                return
+
+            except SlackApiError as e:
+                retry_after = int(e.response.headers.get("Retry-After", 1))
+                if (
+                    e.response.status_code == 429
+                    and attempt == 0
+                    and (deadline is None or time.time() + retry_after < deadline)
+                ):
+                    log.info(f"Slack rate limited, retrying in {retry_after}s")
+                    if self.metrics:
+                        self.metrics.retries.inc(label_value="notification")
+                    time.sleep(retry_after)
+                    continue
+                log.error(f"Error sending Slack notification: {e}")
+                break
+
+            except Exception as e:
+                log.error(f"Error sending Slack notification: {e}")
+                break
+
+        self.failed += 1
+        if self.metrics:
+            self.metrics.failures.inc(label_value="notification")
+
+    def stop(self, timeout: float = 30) -> None:
+        """
+        Function to stop the notification thread and send any pending alerts and the last digest, giving up on
+        what is left once the timeout runs out so an unreachable Slack does not hold up shutdown.
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+            alerts, self.alerts = self.alerts, []
+        if self._thread:
+            self._thread.join(timeout)
+
+        for index, alert in enumerate(alerts):
+            if time.time() >= deadline:
+                log.error(
+                    f"Slack notifications not sent before shutdown: {len(alerts) - index} alerts"
+                )
+                break
+            self._post(alert, deadline=deadline)
+
+        if time.time() < deadline:
+            self.flush(deadline=deadline)
+        else:
+            log.error("Slack notifications not sent before shutdown: the last digest")
+        log.info(f"Slack notifications sent: {self.sent}, failed: {self.failed}")
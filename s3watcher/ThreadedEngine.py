@@ -0,0 +1,51 @@
+"""
+Threaded Engine Module
+"""
+
+import concurrent.futures
+import queue
+import threading
+from typing import Any
+from s3watcher import log
+
+
+class ThreadedEngine:
+    """
+    Runtime that polls and processes the events of a single watch from one process, polling on a thread in
+    place of the poll process. Received events reach the priority scheduler through an in-process queue, so
+    they are not pickled across a process boundary, and downloads run on the same worker pool as in the
+    process engine.
+    """
+
+    def __init__(self, queue_handler: Any) -> None:
+        """
+        Class Constructor
+        """
+        self.queue_handler = queue_handler
+
+    def run(self) -> None:
+        """
+        Function to run the engine until it is shut down by SIGTERM or SIGINT.
+        """
+        # Polling and processing share the process, so events are handed over without pickling
+        self.queue_handler.event_queue = queue.Queue()
+
+        log.info(
+            f"Threaded engine started with {self.queue_handler.concurrency_limit} concurrent downloads"
+        )
+
+        poller = threading.Thread(target=self.poll, name="poll", daemon=True)
+        poller.start()
+
+        # Runs the download workers until shutdown, which also stops polling
+        self.queue_handler.process_messages()
+        poller.join()
+
+    def poll(self) -> None:
+        """
+        Function to poll the queue on the calling thread until the handler stops.
+        """
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.queue_handler.config.receive_concurrency
+        ) as executor:
+            self.queue_handler.poll_queue(executor)
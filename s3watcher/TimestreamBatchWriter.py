@@ -0,0 +1,207 @@
+"""
+Timestream Batch Writer Module
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, List
+import botocore
+from s3watcher import log
+
+
+class TimestreamBatchWriter:
+    """
+    Class to buffer Timestream records and write them in batches from a background thread. It stands in for the
+    Timestream client, so records built by log_to_timestream are queued instead of written one at a time.
+    """
+
+    # WriteRecords accepts at most 100 records per call
+    max_batch_size = 100
+
+    # Errors that are worth retrying
+    retry_codes = ["ThrottlingException", "InternalServerException"]
+
+    def __init__(
+        self,
+        get_timestream_client: Callable[[], Any],
+        batch_size: int = 100,
+        flush_interval: float = 5.0,
+        max_pending: int = 10000,
+        max_attempts: int = 5,
+        metrics: Any = None,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.get_timestream_client = get_timestream_client
+        self.batch_size = max(1, min(int(batch_size or 1), self.max_batch_size))
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.metrics = metrics
+
+        # Pending records as (table, common attributes, record), oldest first
+        self.pending = deque()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.requests = 0
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Function to start the background flush thread.
+        """
+        self._thread = threading.Thread(
+            target=self._run, name="timestream-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write_records(
+        self,
+        DatabaseName: str,
+        TableName: str,
+        Records: List[dict],
+        CommonAttributes: dict = None,
+    ) -> dict:
+        """
+        Function with the signature of the Timestream client's write_records that queues the records.
+        """
+        table = (DatabaseName, TableName)
+        common_attributes = json.dumps(CommonAttributes or {}, sort_keys=True)
+
+        with self._condition:
+            for record in Records:
+                # Bound memory by dropping the oldest records when writes fall behind
+                if len(self.pending) >= self.max_pending:
+                    self.pending.popleft()
+                    self.dropped += 1
+                    if self.dropped % 1000 == 1:
+                        log.error(
+                            f"Timestream buffer is full, dropped {self.dropped} records"
+                        )
+                self.pending.append((table, common_attributes, record))
+
+            if len(self.pending) >= self.batch_size:
+                self._condition.notify()
+
+        return {"RecordsIngested": {"Total": len(Records)}}
+
+    def _run(self) -> None:
+        """
+        Function run by the flush thread, flushing when a batch fills up or the interval elapses.
+        """
+        while True:
+            with self._condition:
+                if not self._stopped and len(self.pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                if self._stopped:
+                    return
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Function to write every pending record in batches grouped by table and common attributes.
+        """
+        with self._condition:
+            pending, self.pending = self.pending, deque()
+
+        batches = {}
+        for table, common_attributes, record in pending:
+            batches.setdefault((table, common_attributes), []).append(record)
+
+        for (table, common_attributes), records in batches.items():
+            for i in range(0, len(records), self.batch_size):
+                self._write_batch(
+                    table, common_attributes, records[i : i + self.batch_size]
+                )
+
+    def _write_batch(
+        self, table: tuple, common_attributes: str, records: List[dict]
+    ) -> None:
+        """
+        Function to write a single batch, retrying throttled writes with exponential backoff.
+        """
+        database_name, table_name = table
+        kwargs = {
+            "DatabaseName": database_name,
+            "TableName": table_name,
+            "Records": records,
+        }
+        if common_attributes != "{}":
+            kwargs["CommonAttributes"] = json.loads(common_attributes)
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.requests += 1
+                start_time = time.perf_counter()
+                self.get_timestream_client().write_records(**kwargs)
+                if self.metrics:
+                    self.metrics.stage_duration.observe(
+                        time.perf_counter() - start_time, "timestream"
+                    )
+                self.written += len(records)
+                return
+
+            except botocore.exceptions.ClientError as e:
+                error = e.response.get("Error", {})
+                if error.get("Code") == "RejectedRecordsException":
+                    # Only the rejected records are lost, the rest were written
+                    rejected = e.response.get("RejectedRecords", [])
+                    self.failed += len(rejected)
+                    self.written += len(records) - len(rejected)
+                    log.error(
+                        f"Timestream rejected {len(rejected)} records of ({database_name}.{table_name}): {rejected}"
+                    )
+                    return
+
+                if (
+                    error.get("Code") not in self.retry_codes
+                    or attempt == self.max_attempts
+                ):
+                    log.error(f"Error writing records to Timestream: {e}")
+                    break
+
+            except Exception as e:
+                log.error(f"Error writing records to Timestream: {e}")
+                break
+
+            if self.metrics:
+                self.metrics.retries.inc(label_value="timestream")
+            time.sleep(min(0.2 * 2**attempt, 10))
+
+        self.failed += len(records)
+        if self.metrics:
+            self.metrics.failures.inc(len(records), "timestream")
+        log.error(
+            f"Error writing {len(records)} records to Timestream ({database_name}.{table_name})"
+        )
+
+    def stats(self) -> dict:
+        """
+        Function to return the number of written, failed and dropped records.
+        """
+        return {
+            "written": self.written,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "pending": len(self.pending),
+            "requests": self.requests,
+        }
+
+    def stop(self) -> None:
+        """
+        Function to stop the flush thread and write anything still pending.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+
+        self.flush()
+        log.info(f"Timestream writer: {self.stats()}")
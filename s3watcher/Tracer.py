@@ -0,0 +1,192 @@
+"""
+Tracer Module
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator
+from s3watcher import log
+
+
+class StageStats:
+    """
+    Class to hold the timing statistics of a single stage
+    """
+
+    def __init__(self) -> None:
+        """
+        Class Constructor
+        """
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, duration: float, error: bool) -> None:
+        """
+        Function to record a finished span of the stage.
+        """
+        self.count += 1
+        self.errors += error
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    def as_dict(self) -> dict:
+        """
+        Function to return the statistics as a dictionary, durations in milliseconds.
+        """
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0,
+            "max_ms": round(self.max * 1000, 3),
+            "total_s": round(self.total, 3),
+        }
+
+
+class Tracer:
+    """
+    Class to time each stage of event processing as spans, written as OpenTelemetry style JSON lines and
+    summarized periodically. When neither is enabled spans are no-ops.
+    """
+
+    # Reused when tracing is disabled so spans cost a single call
+    _disabled_span = nullcontext()
+
+    def __init__(self, span_path: str = "", summary_interval: float = 0) -> None:
+        """
+        Class Constructor
+        """
+        self.span_path = span_path
+        self.summary_interval = summary_interval
+        self.enabled = bool(span_path or summary_interval)
+
+        self.stages: Dict[str, StageStats] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        # Span files are opened per process, the poll and download processes write their own lines
+        self._file = None
+        self._file_pid = None
+        self._stop_event = threading.Event()
+
+    def start(self) -> None:
+        """
+        Function to start logging the periodic summary in the current process.
+        """
+        self._stop_event.clear()
+        if self.summary_interval:
+            threading.Thread(
+                target=self._report_summary, name="tracer-summary", daemon=True
+            ).start()
+
+    def span(self, name: str, **attributes: Any) -> Any:
+        """
+        Function to get a context manager timing a stage. Spans opened inside it in the same thread are
+        its children.
+        """
+        if not self.enabled:
+            return self._disabled_span
+        return self._span(name, attributes)
+
+    @contextmanager
+    def _span(self, name: str, attributes: dict) -> Iterator[None]:
+        """
+        Function to time a stage and record it when it ends.
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        parent = stack[-1] if stack else None
+        trace_id = parent[0] if parent else uuid.uuid4().hex
+        span_id = uuid.uuid4().hex[:16]
+        stack.append((trace_id, span_id))
+
+        start_ns = time.time_ns()
+        start_time = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - start_time
+            stack.pop()
+
+            with self._lock:
+                self.stages.setdefault(name, StageStats()).record(
+                    duration, error is not None
+                )
+
+            if self.span_path:
+                self._write(
+                    {
+                        "name": name,
+                        "trace_id": trace_id,
+                        "span_id": span_id,
+                        "parent_span_id": parent[1] if parent else None,
+                        "start_time_unix_nano": start_ns,
+                        "end_time_unix_nano": start_ns + int(duration * 1e9),
+                        "status": "ERROR" if error else "OK",
+                        "attributes": dict(attributes, pid=os.getpid()),
+                    }
+                )
+
+    def _write(self, span: dict) -> None:
+        """
+        Function to append a finished span to the span file.
+        """
+        line = json.dumps(span, default=str) + "\n"
+        with self._lock:
+            try:
+                if self._file_pid != os.getpid():
+                    self._file = open(self.span_path, "a", buffering=1)
+                    self._file_pid = os.getpid()
+                self._file.write(line)
+
+            except Exception as e:
+                log.error(f"Error writing span to ({self.span_path}): {e}")
+                self.span_path = ""
+
+    def summary(self) -> dict:
+        """
+        Function to return the timing statistics of every stage.
+        """
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self.stages.items()}
+
+    def _report_summary(self) -> None:
+        """
+        Function to periodically log the stage summary.
+        """
+        while not self._stop_event.wait(self.summary_interval):
+            self.log_summary()
+
+    def log_summary(self) -> None:
+        """
+        Function to log the stage summary, busiest stages first.
+        """
+        summary = sorted(
+            self.summary().items(), key=lambda item: item[1]["total_s"], reverse=True
+        )
+        if summary:
+            log.info(f"Stage timings: {dict(summary)}")
+
+    def stop(self) -> None:
+        """
+        Function to stop the periodic summary and close the span file.
+        """
+        self._stop_event.set()
+        if self.enabled:
+            self.log_summary()
+        with self._lock:
+            if self._file and self._file_pid == os.getpid():
+                self._file.close()
+            self._file = None
+            self._file_pid = None
@@ -0,0 +1,170 @@
+"""
+Transfer Planner Module
+"""
+
+import math
+import threading
+from typing import Any
+from boto3.s3.transfer import TransferConfig, S3Transfer
+
+MB = 1024 * 1024
+
+
+class TransferPlan:
+    """
+    Class to hold the transfer settings chosen for a single object
+    """
+
+    def __init__(
+        self,
+        size: int,
+        use_threads: bool,
+        max_concurrency: int,
+        multipart_threshold: int,
+        multipart_chunksize: int,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.size = size
+        self.use_threads = use_threads
+        self.max_concurrency = max_concurrency
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunksize = multipart_chunksize
+
+    @property
+    def key(self) -> tuple:
+        """
+        Settings that identify the S3Transfer able to run this plan
+        """
+        return (
+            self.use_threads,
+            self.max_concurrency,
+            self.multipart_threshold,
+            self.multipart_chunksize,
+        )
+
+    @property
+    def requests(self) -> int:
+        """
+        Number of requests the transfer sends, a HEAD for the size followed by one GET per part
+        """
+        if self.size is None or self.size < self.multipart_threshold:
+            return 2
+        return 1 + math.ceil(self.size / self.multipart_chunksize)
+
+    def __repr__(self) -> str:
+        return (
+            f"TransferPlan(size={self.size}, threads={self.use_threads}, concurrency={self.max_concurrency}, "
+            f"chunksize={self.multipart_chunksize // MB}MB)"
+        )
+
+
+class TransferPlanner:
+    """
+    Class to pick multipart settings and per-object concurrency from the object size within a global
+    connection budget. Transfers wait for a free connection when the budget is used up.
+    """
+
+    # Largest number of parts a single object is split into
+    max_parts = 10000
+
+    def __init__(
+        self,
+        connection_budget: int = 50,
+        multipart_threshold: int = 8 * MB,
+        multipart_chunksize: int = 8 * MB,
+        default_concurrency: int = 10,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.connection_budget = max(1, int(connection_budget or 1))
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunksize = multipart_chunksize
+        self.default_concurrency = default_concurrency
+
+        # A single object may use at most half of the budget
+        self.max_object_concurrency = max(1, self.connection_budget // 2)
+
+        self.in_use = 0
+        self.client = None
+        self.transfers = {}
+        self._lock = threading.Lock()
+        self._budget = threading.Condition()
+
+    def set_client(self, client: Any) -> None:
+        """
+        Function to set the S3 client transfers are created with, dropping transfers bound to the old one.
+        """
+        with self._lock:
+            self.client = client
+            self.transfers = {}
+
+    def acquire(self, size: int = None, max_concurrency: int = None) -> TransferPlan:
+        """
+        Function to plan the transfer of an object and reserve its connections from the budget, blocking
+        until at least one connection is free. Transfers that cannot split an object pass a max_concurrency
+        of 1.
+        """
+        chunksize = self.multipart_chunksize
+
+        if size is None:
+            # Size unknown, fall back to the default concurrency
+            desired = self.default_concurrency
+        elif size < self.multipart_threshold:
+            desired = 1
+        else:
+            # Use larger parts for huge objects to keep the request count down
+            if size / chunksize > self.max_parts:
+                chunksize = 2 ** math.ceil(math.log2(size / self.max_parts))
+            desired = math.ceil(size / chunksize)
+        if max_concurrency:
+            desired = min(desired, max_concurrency)
+
+        with self._budget:
+            while self.in_use >= self.connection_budget:
+                self._budget.wait()
+
+            free = self.connection_budget - self.in_use
+            concurrency = max(1, min(desired, self.max_object_concurrency, free))
+
+            # Round down to a power of two to bound the number of cached transfers
+            concurrency = 2 ** int(math.log2(concurrency))
+            self.in_use += concurrency
+
+        return TransferPlan(
+            size=size,
+            use_threads=concurrency > 1,
+            max_concurrency=concurrency,
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=chunksize,
+        )
+
+    def release(self, plan: TransferPlan) -> None:
+        """
+        Function to return the connections of a finished transfer to the budget.
+        """
+        with self._budget:
+            self.in_use -= plan.max_concurrency
+            self._budget.notify_all()
+
+    def get_transfer(self, plan: TransferPlan) -> S3Transfer:
+        """
+        Function to get the S3Transfer configured for a plan.
+        """
+        with self._lock:
+            transfer = self.transfers.get(plan.key)
+            if transfer is None:
+                transfer = S3Transfer(
+                    self.client,
+                    TransferConfig(
+                        use_threads=plan.use_threads,
+                        max_concurrency=plan.max_concurrency,
+                        multipart_threshold=plan.multipart_threshold,
+                        multipart_chunksize=plan.multipart_chunksize,
+                    ),
+                )
+                self.transfers[plan.key] = transfer
+
+            return transfer
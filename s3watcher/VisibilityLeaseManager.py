@@ -0,0 +1,181 @@
+"""
+Visibility Lease Manager Module
+"""
+
+import threading
+import time
+from typing import Any, Callable
+from s3watcher import log
+
+
+class VisibilityLeaseManager:
+    """
+    Class to keep in-flight messages invisible on the queue while they are being processed
+    """
+
+    # ChangeMessageVisibilityBatch accepts at most 10 entries per call
+    max_batch_size = 10
+
+    def __init__(
+        self,
+        get_sqs_client: Callable[[], Any],
+        queue_url: str,
+        visibility_timeout: int = 30,
+        heartbeat_interval: float = None,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.get_sqs_client = get_sqs_client
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+
+        # Extend well before the current timeout runs out
+        self.heartbeat_interval = heartbeat_interval or max(
+            1.0, visibility_timeout / 3
+        )
+
+        # In-flight leases as receipt_handle -> [lease start time, events in flight, visibility timeout to set
+        # once the last event is done or None to let it run out]
+        self.leases = {}
+        self.extended = 0
+        self.released = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Function to start the heartbeat thread.
+        """
+        self._thread = threading.Thread(
+            target=self._run, name="sqs-lease-heartbeat", daemon=True
+        )
+        self._thread.start()
+
+    def track(self, sqs_event: Any) -> None:
+        """
+        Function to start tracking an in-flight event. Events of the same message share its lease.
+        """
+        with self._lock:
+            lease = self.leases.setdefault(
+                sqs_event.receipt_handle, [time.time(), 0, None]
+            )
+            lease[1] += 1
+
+    def complete(self, sqs_event: Any) -> None:
+        """
+        Function to stop tracking an event that finished processing, the lease ends with the last event of
+        its message. A message with a released event is then made visible again.
+        """
+        with self._lock:
+            lease = self.leases.get(sqs_event.receipt_handle)
+            if not lease:
+                return
+            lease[1] -= 1
+            if lease[1] > 0:
+                return
+            del self.leases[sqs_event.receipt_handle]
+
+        if lease[2] is not None:
+            self._set_visibility(sqs_event, lease[2])
+
+    def release(self, sqs_event: Any, visibility_timeout: int = 0) -> None:
+        """
+        Function to make the message of a failed event visible again after a timeout, 0 right away, so it can
+        be retried. Events of the same message still in flight keep the lease until the last one completes.
+        """
+        with self._lock:
+            lease = self.leases.get(sqs_event.receipt_handle)
+            if lease:
+                lease[2] = (
+                    visibility_timeout
+                    if lease[2] is None
+                    else min(lease[2], visibility_timeout)
+                )
+                return
+
+        self._set_visibility(sqs_event, visibility_timeout)
+
+    def _set_visibility(self, sqs_event: Any, visibility_timeout: int) -> None:
+        """
+        Function to set the visibility timeout of a released message.
+        """
+        try:
+            self.get_sqs_client().change_message_visibility(
+                QueueUrl=self.queue_url,
+                ReceiptHandle=sqs_event.receipt_handle,
+                VisibilityTimeout=visibility_timeout,
+            )
+            self.released += 1
+        except Exception as e:
+            log.error(f"Error releasing message on queue ({self.queue_url}): {e}")
+
+    def _run(self) -> None:
+        """
+        Function run by the heartbeat thread to extend every tracked lease.
+        """
+        while not self._stop_event.wait(self.heartbeat_interval):
+            self.extend_leases()
+
+    def extend_leases(self) -> None:
+        """
+        Function to extend the visibility timeout of every in-flight message.
+        """
+        with self._lock:
+            receipt_handles = list(self.leases)
+
+        self.extended += self.change_visibility(receipt_handles, self.visibility_timeout)
+
+    def change_visibility(self, receipt_handles: list, visibility_timeout: int) -> int:
+        """
+        Function to set the visibility timeout of messages in batches, returning how many were changed. Leases
+        that cannot be changed are lost and no longer tracked.
+        """
+        changed = 0
+        for i in range(0, len(receipt_handles), self.max_batch_size):
+            batch = receipt_handles[i : i + self.max_batch_size]
+            try:
+                response = self.get_sqs_client().change_message_visibility_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[
+                        {
+                            "Id": str(j),
+                            "ReceiptHandle": receipt_handle,
+                            "VisibilityTimeout": visibility_timeout,
+                        }
+                        for j, receipt_handle in enumerate(batch)
+                    ],
+                )
+                changed += len(response.get("Successful", []))
+
+                # A lease that cannot be extended is lost, stop heartbeating it
+                for failure in response.get("Failed", []):
+                    log.error(
+                        f"Error changing message visibility on queue ({self.queue_url}): {failure.get('Message', failure.get('Code'))}"
+                    )
+                    with self._lock:
+                        self.leases.pop(batch[int(failure["Id"])], None)
+
+            except Exception as e:
+                log.error(
+                    f"Error changing message visibility on queue ({self.queue_url}): {e}"
+                )
+
+        return changed
+
+    def stop(self) -> None:
+        """
+        Function to stop the heartbeat thread and make the messages still tracked visible again, such as
+        events left waiting on shutdown, so they are received again right away.
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+        with self._lock:
+            receipt_handles, self.leases = list(self.leases), {}
+        self.released += self.change_visibility(receipt_handles, 0)
+        log.info(
+            f"Extended {self.extended} message leases, released {self.released}"
+        )
@@ -138,6 +138,21 @@ else
 fi
 
 
+# Pass on the optional SDC_AWS_* settings of the config file, the ones above are passed as arguments
+PASSED_SETTINGS="SDC_AWS_S3_BUCKET SDC_AWS_SQS_QUEUE_NAME SDC_AWS_CONCURRENCY_LIMIT SDC_AWS_TIMESTREAM_DB SDC_AWS_TIMESTREAM_TABLE SDC_AWS_SLACK_TOKEN SDC_AWS_SLACK_CHANNEL SDC_AWS_ALLOW_DELETE SDC_AWS_USER SDC_AWS_SETUP SDC_AWS_CHECK_S3 SDC_AWS_WATCH_FILE"
+OPTIONAL_SETTINGS=()
+for SETTING in $(compgen -v SDC_AWS_); do
+    if [[ " $PASSED_SETTINGS " != *" $SETTING "* && "${!SETTING}" != "" ]]; then
+        OPTIONAL_SETTINGS+=(-e "$SETTING=${!SETTING}")
+    fi
+done
+
+# If a watch file is set, then mount it into the container
+WATCH_FILE_MOUNT=()
+if [ "$SDC_AWS_WATCH_FILE" != "" ]; then
+    WATCH_FILE_MOUNT=(-v "$SDC_AWS_WATCH_FILE:/s3watcher/watches.yaml:ro" -e SDC_AWS_WATCH_FILE=/s3watcher/watches.yaml)
+fi
+
 # Print all the environment variables
 echo "Passed Arguments:"
 echo "SDC_AWS_S3_BUCKET: $SDC_AWS_S3_BUCKET"
@@ -155,6 +170,8 @@ echo "TEST_IAM_POLICY: $TEST_IAM_POLICY"
 echo "BACKTRACK: $BACKTRACK"
 echo "BACKTRACK_DATE: $BACKTRACK_DATE"
 echo "USE_FALLBACK: $USE_FALLBACK"
+echo "SDC_AWS_WATCH_FILE: $SDC_AWS_WATCH_FILE"
+echo "Optional settings: ${OPTIONAL_SETTINGS[*]}"
 
 
 docker run -d \
@@ -169,9 +186,12 @@ docker run -d \
     -e SDC_AWS_TIMESTREAM_TABLE="$SDC_AWS_TIMESTREAM_TABLE" \
     -e SDC_AWS_SLACK_TOKEN="$SDC_AWS_SLACK_TOKEN" \
     -e SDC_AWS_SLACK_CHANNEL="$SDC_AWS_SLACK_CHANNEL" \
+    -e SDC_AWS_ALLOW_DELETE="$SDC_AWS_ALLOW_DELETE" \
     -e SDC_AWS_USER="$SDC_AWS_USER" \
     -e SDC_AWS_SETUP="$SDC_AWS_SETUP" \
     -e CHECK_S3="$SDC_AWS_CHECK_S3" \
+    "${OPTIONAL_SETTINGS[@]}" \
+    "${WATCH_FILE_MOUNT[@]}" \
     -v /etc/passwd:/etc/passwd \
     -v $DOWNLOAD_DIR:/download \
     -v ${HOME}/.aws/credentials:/s3watcher/.aws/credentials:ro \
@@ -0,0 +1,210 @@
+"""
+Shared fixtures of the S3Watcher tests, run against in-process S3 and SQS stand-ins from moto
+"""
+
+import json
+import os
+import queue
+from typing import Any, List
+
+import pytest
+
+# Credentials and region of the stand-ins, set before boto3 is imported
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_SESSION_TOKEN", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_REGION", os.environ["AWS_DEFAULT_REGION"])
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from s3watcher.SQSHandlerEvent import SQSHandlerEvent  # noqa: E402
+from s3watcher.SQSQueueHandlerConfig import SQSQueueHandlerConfig  # noqa: E402
+
+BUCKET_NAME = "s3watcher-test"
+QUEUE_NAME = "s3watcher-test"
+
+
+def s3_event_body(
+    file_key: str,
+    size: int = None,
+    etag: str = None,
+    sequencer: str = None,
+    event_name: str = "ObjectCreated:Put",
+    bucket_name: str = BUCKET_NAME,
+) -> str:
+    """
+    Function to build the body of an S3 event notification.
+    """
+    s3_object = {"key": file_key}
+    if size is not None:
+        s3_object["size"] = size
+    if etag is not None:
+        s3_object["eTag"] = etag
+    if sequencer is not None:
+        s3_object["sequencer"] = sequencer
+
+    return json.dumps(
+        {
+            "Records": [
+                {
+                    "eventVersion": "2.1",
+                    "eventSource": "aws:s3",
+                    "eventName": event_name,
+                    "s3": {"bucket": {"name": bucket_name}, "object": s3_object},
+                }
+            ]
+        }
+    )
+
+
+def make_event(
+    file_key: str,
+    message_id: str = "message",
+    receipt_handle: str = "receipt",
+    queue_url: str = "queue",
+    **kwargs: Any,
+) -> SQSHandlerEvent:
+    """
+    Function to build an event without a queue, for the components that only look at its fields.
+    """
+    return SQSHandlerEvent.from_sqs_message(
+        {
+            "MessageId": message_id,
+            "ReceiptHandle": receipt_handle,
+            "Body": s3_event_body(file_key, **kwargs),
+        },
+        queue_url,
+    )[0]
+
+
+class StandIns:
+    """
+    Class to hold the S3 bucket and SQS queue stand-ins of a test and the helpers driving them
+    """
+
+    def __init__(self) -> None:
+        """
+        Class Constructor
+        """
+        self.s3 = boto3.client("s3")
+        self.sqs = boto3.client("sqs")
+        self.s3.create_bucket(Bucket=BUCKET_NAME)
+        self.queue_url = self.sqs.create_queue(QueueName=QUEUE_NAME)["QueueUrl"]
+
+        # S3 sequencers increase with every change of the bucket
+        self.sequence = 0
+
+    def next_sequencer(self) -> str:
+        """
+        Function to get the sequencer of the next change of the bucket.
+        """
+        self.sequence += 1
+        return f"{self.sequence:016X}"
+
+    def put_object(self, file_key: str, body: bytes, send: bool = True) -> dict:
+        """
+        Function to upload an object and send its ObjectCreated event, returning the event's fields.
+        """
+        response = self.s3.put_object(Bucket=BUCKET_NAME, Key=file_key, Body=body)
+        s3_object = {
+            "file_key": file_key,
+            "size": len(body),
+            "etag": response["ETag"].strip('"'),
+            "sequencer": self.next_sequencer(),
+        }
+        if send:
+            self.send_event(**s3_object)
+        return s3_object
+
+    def delete_object(self, file_key: str, send: bool = True) -> dict:
+        """
+        Function to delete an object and send its ObjectRemoved event, returning the event's fields.
+        """
+        self.s3.delete_object(Bucket=BUCKET_NAME, Key=file_key)
+        s3_object = {
+            "file_key": file_key,
+            "sequencer": self.next_sequencer(),
+            "event_name": "ObjectRemoved:Delete",
+        }
+        if send:
+            self.send_event(**s3_object)
+        return s3_object
+
+    def send_event(self, file_key: str, **kwargs: Any) -> None:
+        """
+        Function to send an S3 event notification to the queue.
+        """
+        self.sqs.send_message(
+            QueueUrl=self.queue_url, MessageBody=s3_event_body(file_key, **kwargs)
+        )
+
+    def receive_events(self, handler: Any, max_batch_size: int = 10) -> List[Any]:
+        """
+        Function to receive a batch of messages through a handler and return the events parsed from them.
+        """
+        event_queue = queue.Queue()
+        handler.get_messages(max_batch_size=max_batch_size, event_queue=event_queue)
+        events = []
+        while not event_queue.empty():
+            events.extend(event_queue.get())
+        return events
+
+    def queue_size(self) -> int:
+        """
+        Function to count the messages on the queue, visible or in flight.
+        """
+        attributes = self.sqs.get_queue_attributes(
+            QueueUrl=self.queue_url,
+            AttributeNames=[
+                "ApproximateNumberOfMessages",
+                "ApproximateNumberOfMessagesNotVisible",
+            ],
+        )["Attributes"]
+        return int(attributes["ApproximateNumberOfMessages"]) + int(
+            attributes["ApproximateNumberOfMessagesNotVisible"]
+        )
+
+
+@pytest.fixture
+def aws() -> StandIns:
+    """
+    S3 bucket and SQS queue stand-ins
+    """
+    with mock_aws():
+        yield StandIns()
+
+
+@pytest.fixture
+def make_handler(aws: StandIns, tmp_path: Any, monkeypatch: Any):
+    """
+    Factory of handlers watching the stand-ins with their consumer services running, stopped after the test
+    """
+    # The handler imports the SDC AWS utilities for its Timestream and Slack helpers
+    pytest.importorskip("sdc_aws_utils")
+    from s3watcher.SQSQueueHandler import SQSQueueHandler
+
+    # The poller and consumer of a test run as threads sharing a fresh queue
+    monkeypatch.setattr(SQSQueueHandler, "event_queue", queue.Queue())
+
+    handlers = []
+
+    def make(start: bool = True, **kwargs: Any) -> Any:
+        kwargs.setdefault("path", str(tmp_path / "download"))
+        kwargs.setdefault("wait_time_seconds", 0)
+        kwargs.setdefault("ack_flush_interval", 0.05)
+        config = SQSQueueHandlerConfig(
+            bucket_name=BUCKET_NAME, queue_name=QUEUE_NAME, **kwargs
+        )
+        handler = SQSQueueHandler(config)
+        if start:
+            handler.start_services()
+            handlers.append(handler)
+        return handler
+
+    yield make
+
+    for handler in handlers:
+        if handler.acker is not None:
+            handler.stop_services()
@@ -0,0 +1,123 @@
+"""
+Tests of the atomic, resumable downloads
+"""
+
+import json
+import os
+
+import pytest
+
+from conftest import BUCKET_NAME
+from s3watcher.AtomicDownloader import AtomicDownloader
+
+
+@pytest.fixture
+def downloader(aws):
+    return AtomicDownloader(lambda: aws.s3, chunk_size=4)
+
+
+def write_part(local_path, content, version=None):
+    """
+    Function to leave a part file behind as an interrupted download would.
+    """
+    part_path = local_path + AtomicDownloader.part_suffix
+    with open(part_path, "wb") as part_file:
+        part_file.write(content)
+    if version is not None:
+        with open(part_path + AtomicDownloader.version_suffix, "w") as version_file:
+            json.dump(version, version_file)
+    return part_path
+
+
+def read(path):
+    with open(path, "rb") as local_file:
+        return local_file.read()
+
+
+def test_download_is_renamed_into_place(aws, downloader, tmp_path):
+    s3_object = aws.put_object("data/file.bin", b"0123456789", send=False)
+    local_path = str(tmp_path / "file.bin")
+
+    downloaded = downloader.download(BUCKET_NAME, "data/file.bin", local_path)
+
+    assert read(local_path) == b"0123456789"
+    assert downloaded["etag"] == s3_object["etag"]
+    assert os.listdir(tmp_path) == ["file.bin"]
+
+
+def test_part_of_the_same_version_is_resumed(aws, downloader, tmp_path):
+    s3_object = aws.put_object("data/file.bin", b"0123456789", send=False)
+    local_path = str(tmp_path / "file.bin")
+    write_part(
+        local_path,
+        b"012",
+        {"etag": s3_object["etag"], "size": 10, "version_id": None},
+    )
+    written = []
+
+    downloader.download(BUCKET_NAME, "data/file.bin", local_path, callback=written.append)
+
+    assert read(local_path) == b"0123456789"
+    assert sum(written) == 7
+
+
+def test_part_of_another_version_is_discarded(aws, downloader, tmp_path):
+    # The part file holds the start of version A, the object is now version B
+    version_a = aws.put_object("data/file.bin", b"AAAAAAAAAA", send=False)
+    aws.put_object("data/file.bin", b"BBBBBBBBBB", send=False)
+    local_path = str(tmp_path / "file.bin")
+    write_part(local_path, b"AAA", {"etag": version_a["etag"], "size": 10, "version_id": None})
+
+    downloader.download(BUCKET_NAME, "data/file.bin", local_path)
+
+    assert read(local_path) == b"BBBBBBBBBB"
+
+
+def test_part_without_a_version_record_is_discarded(aws, downloader, tmp_path):
+    aws.put_object("data/file.bin", b"BBBBBBBBBB", send=False)
+    local_path = str(tmp_path / "file.bin")
+    write_part(local_path, b"AAA")
+
+    downloader.download(BUCKET_NAME, "data/file.bin", local_path)
+
+    assert read(local_path) == b"BBBBBBBBBB"
+
+
+def test_corrupt_part_fails_verification(aws, downloader, tmp_path):
+    s3_object = aws.put_object("data/file.bin", b"0123456789", send=False)
+    local_path = str(tmp_path / "file.bin")
+    part_path = write_part(
+        local_path, b"0123456780", {"etag": s3_object["etag"], "size": 10, "version_id": None}
+    )
+
+    with pytest.raises(ValueError, match="Checksum"):
+        downloader.download(BUCKET_NAME, "data/file.bin", local_path)
+
+    assert not os.path.exists(local_path)
+    assert not os.path.exists(part_path)
+
+
+def test_full_object_sha256_is_checked():
+    head = {"ETag": '"abc-2"', "ContentLength": 1, "ChecksumSHA256": "c2hh"}
+    assert AtomicDownloader.is_full_object_sha256(head)
+    assert not AtomicDownloader.is_md5_etag(head)
+
+    head["ChecksumType"] = "COMPOSITE"
+    assert not AtomicDownloader.is_full_object_sha256(head)
+
+
+def test_part_files_and_their_records_are_recognized():
+    assert AtomicDownloader.is_part_file("file.bin.s3watcher-part")
+    assert AtomicDownloader.is_part_file("file.bin.s3watcher-part.json")
+    assert not AtomicDownloader.is_part_file("file.json")
+
+
+def test_sha256_checksum_is_verified(aws, downloader, tmp_path):
+    aws.s3.put_object(
+        Bucket=BUCKET_NAME, Key="data/file.bin", Body=b"0123456789", ChecksumAlgorithm="SHA256"
+    )
+    local_path = str(tmp_path / "file.bin")
+
+    downloader.download(BUCKET_NAME, "data/file.bin", local_path)
+
+    assert read(local_path) == b"0123456789"
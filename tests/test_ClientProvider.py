@@ -0,0 +1,31 @@
+"""
+Tests of the shared boto3 session and clients
+"""
+
+from botocore.credentials import RefreshableCredentials
+
+from s3watcher.ClientProvider import ClientProvider
+
+
+def test_static_credentials_are_refreshable(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "static-key")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "static-secret")
+    provider = ClientProvider(region_name="us-east-1")
+
+    credentials = provider.session.get_credentials()
+
+    assert isinstance(credentials, RefreshableCredentials)
+    assert credentials.method == "env"
+    assert credentials.get_frozen_credentials().access_key == "static-key"
+    assert provider.credential_refreshes == 1
+
+
+def test_clients_are_created_again_in_another_process():
+    provider = ClientProvider(region_name="us-east-1")
+    client = provider.client("sqs")
+    assert provider.client("sqs") is client
+
+    # As seen from a forked child
+    provider._pid = -1
+
+    assert provider.client("sqs") is not client
@@ -0,0 +1,56 @@
+"""
+Tests of the bounded deduplication cache
+"""
+
+import time
+
+from s3watcher.DeduplicationCache import DeduplicationCache
+
+
+def test_seen_counts_hits_and_misses():
+    cache = DeduplicationCache(capacity=10)
+    cache.add("a")
+
+    assert cache.seen("a")
+    assert not cache.seen("b")
+    assert not cache.seen(None)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_oldest_keys_are_evicted_at_capacity():
+    cache = DeduplicationCache(capacity=2)
+    for key in ["a", "b", "c"]:
+        cache.add(key)
+
+    assert not cache.seen("a")
+    assert cache.seen("b") and cache.seen("c")
+    assert cache.evictions == 1
+
+
+def test_keys_expire_after_the_ttl():
+    cache = DeduplicationCache(capacity=10, ttl=0.1)
+    cache.add("a")
+    time.sleep(0.2)
+
+    assert not cache.seen("a")
+
+
+def test_discard_removes_a_key():
+    cache = DeduplicationCache()
+    cache.add("a")
+    cache.discard("a")
+
+    assert not cache.seen("a")
+
+
+def test_discard_group_removes_every_key_of_the_group():
+    cache = DeduplicationCache(capacity=2)
+    cache.add("a@1", group="a")
+    cache.add("a@2", group="a")
+    cache.add("b@1", group="b")
+    cache.discard_group("a")
+
+    assert not cache.seen("a@2")
+    assert cache.seen("b@1")
+    assert "a" not in cache.groups and "a@1" not in cache.key_groups
@@ -0,0 +1,49 @@
+"""
+Tests of the download claims shared by instances
+"""
+
+from s3watcher.DownloadClaims import BUSY, CLAIMED, COMPLETED, PENDING, DownloadClaims
+
+
+def test_live_claims_of_the_same_version_are_busy(tmp_path):
+    first = DownloadClaims(str(tmp_path))
+    second = DownloadClaims(str(tmp_path))
+
+    assert first.claim("bucket", "key", "etag-x", "01") == CLAIMED
+    assert second.claim("bucket", "key", "etag-x", "01") == BUSY
+    assert second.claim("bucket", "key", "etag-x") == BUSY
+
+
+def test_live_claims_of_another_version_are_pending(tmp_path):
+    first = DownloadClaims(str(tmp_path))
+    second = DownloadClaims(str(tmp_path))
+    first.claim("bucket", "key", "etag-x", "01")
+
+    assert second.claim("bucket", "key", "etag-y", "02") == PENDING
+    assert second.claim("bucket", "key", "etag-x", "03") == PENDING
+    assert second.claim("bucket", "key") == PENDING
+    assert second.stats()["pending"] == 3
+
+
+def test_completed_versions_are_skipped_and_others_claimed(tmp_path):
+    first = DownloadClaims(str(tmp_path))
+    second = DownloadClaims(str(tmp_path))
+    first.claim("bucket", "key", "etag-x", "01")
+    first.release("bucket", "key", True, etag="etag-x", sequencer="01")
+
+    assert second.claim("bucket", "key", "etag-x", "01") == COMPLETED
+    assert second.claim("bucket", "key", "etag-y", "02") == CLAIMED
+
+
+def test_forget_removes_completion_markers_only(tmp_path):
+    first = DownloadClaims(str(tmp_path))
+    second = DownloadClaims(str(tmp_path))
+    first.claim("bucket", "done", "etag-x")
+    first.release("bucket", "done", True, etag="etag-x")
+    first.claim("bucket", "live", "etag-x")
+
+    second.forget("bucket", "done")
+    second.forget("bucket", "live")
+
+    assert second.claim("bucket", "done", "etag-x") == CLAIMED
+    assert second.claim("bucket", "live", "etag-x") == BUSY
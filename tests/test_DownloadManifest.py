@@ -0,0 +1,82 @@
+"""
+Tests of the on-disk index of downloaded objects
+"""
+
+import sqlite3
+
+from s3watcher.DownloadManifest import DownloadManifest
+
+
+def download(tmp_path, relative_path, body=b"content"):
+    """
+    Function to write a downloaded file, returning its path.
+    """
+    local_path = tmp_path / relative_path
+    local_path.parent.mkdir(parents=True, exist_ok=True)
+    local_path.write_bytes(body)
+    return str(local_path)
+
+
+def test_downloads_are_current_until_the_version_or_file_changes(tmp_path):
+    manifest = DownloadManifest(str(tmp_path / "manifest.db"))
+    download_path = str(tmp_path / "eea") + "/"
+    local_path = download(tmp_path, "eea/file.bin")
+    manifest.record(download_path, "bucket", "file.bin", local_path, etag="v1")
+
+    assert manifest.get(download_path, "bucket", "file.bin")["size"] == 7
+    assert manifest.is_current(download_path, "bucket", "file.bin", local_path, 7, "v1")
+    assert not manifest.is_current(
+        download_path, "bucket", "file.bin", local_path, 7, "v2"
+    )
+
+    (tmp_path / "eea/file.bin").unlink()
+    assert not manifest.is_current(
+        download_path, "bucket", "file.bin", local_path, 7, "v1"
+    )
+    assert manifest.stats() == {"hits": 1, "misses": 2}
+
+
+def test_watches_of_the_same_bucket_keep_their_own_entries(tmp_path):
+    manifest = DownloadManifest(str(tmp_path / "manifest.db"))
+    eea_path, merit_path = str(tmp_path / "eea") + "/", str(tmp_path / "merit") + "/"
+    eea_file = download(tmp_path, "eea/file.bin")
+    merit_file = download(tmp_path, "merit/file.bin")
+    manifest.record(eea_path, "bucket", "file.bin", eea_file, etag="v1")
+    manifest.record(merit_path, "bucket", "file.bin", merit_file, etag="v1")
+
+    # Removing the file of one watch leaves the other watch's entry
+    manifest.remove(eea_path, "bucket", "file.bin")
+
+    assert manifest.get(eea_path, "bucket", "file.bin") is None
+    assert manifest.get(merit_path, "bucket", "file.bin")["local_path"] == merit_file
+    assert list(manifest.keys(merit_path, "bucket")) == ["file.bin"]
+    assert list(manifest.keys(eea_path, "bucket")) == []
+
+
+def test_manifests_keyed_on_bucket_and_key_only_are_migrated(tmp_path):
+    path = str(tmp_path / "manifest.db")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        """
+        CREATE TABLE downloads (
+            bucket TEXT NOT NULL,
+            key TEXT NOT NULL,
+            size INTEGER,
+            etag TEXT,
+            last_modified TEXT,
+            local_path TEXT NOT NULL,
+            downloaded_at REAL NOT NULL,
+            PRIMARY KEY (bucket, key)
+        )
+        """
+    )
+    connection.execute(
+        "INSERT INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ("bucket", "eea/file.bin", 7, "v1", None, "/data/eea/file.bin", 0),
+    )
+    connection.commit()
+    connection.close()
+
+    manifest = DownloadManifest(path)
+
+    assert manifest.get("/data/", "bucket", "eea/file.bin")["etag"] == "v1"
@@ -0,0 +1,58 @@
+"""
+Tests of the download worker pool and its shutdown
+"""
+
+import threading
+
+from conftest import make_event
+from s3watcher.DownloadWorkerPool import DownloadWorkerPool
+from s3watcher.PriorityScheduler import PriorityScheduler
+
+
+def test_every_worker_exits_on_a_single_sentinel():
+    scheduler = PriorityScheduler()
+    pool = DownloadWorkerPool(
+        scheduler, lambda task: True, concurrency_limit=4, stats_interval=0
+    )
+    pool.start()
+
+    scheduler.put(None)
+    for thread in pool.threads:
+        thread.join(5)
+
+    assert not any(thread.is_alive() for thread in pool.threads)
+
+
+def test_workers_finish_their_current_task_before_exiting():
+    scheduler = PriorityScheduler()
+    started = threading.Event()
+    release = threading.Event()
+    processed = []
+
+    def process(task):
+        started.set()
+        release.wait(5)
+        processed.append(task)
+        return True
+
+    pool = DownloadWorkerPool(scheduler, process, concurrency_limit=2, stats_interval=0)
+    pool.start()
+    sqs_event = make_event("data/file.bin")
+    scheduler.put(sqs_event)
+    assert started.wait(5)
+
+    scheduler.put(None)
+    release.set()
+    pool.join()
+
+    assert processed == [sqs_event]
+
+
+def test_closed_scheduler_drops_new_tasks():
+    scheduler = PriorityScheduler()
+    scheduler.put(None)
+    scheduler.put(make_event("data/file.bin"))
+
+    assert len(scheduler) == 0
+    assert scheduler.get() is None
+    assert scheduler.get() is None
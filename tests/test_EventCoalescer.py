@@ -0,0 +1,79 @@
+"""
+Tests of the coalescing of events of the same key
+"""
+
+import threading
+
+from conftest import make_event
+from s3watcher.EventCoalescer import EventCoalescer
+
+
+class Recorder:
+    """
+    Class to collect submitted and superseded events
+    """
+
+    def __init__(self) -> None:
+        """
+        Class Constructor
+        """
+        self.submitted = []
+        self.superseded = []
+        self.submitted_event = threading.Event()
+
+    def submit(self, sqs_event):
+        self.submitted.append(sqs_event)
+        self.submitted_event.set()
+
+    def supersede(self, sqs_event):
+        self.superseded.append(sqs_event)
+
+
+def test_burst_of_a_key_is_submitted_once():
+    recorder = Recorder()
+    coalescer = EventCoalescer(recorder.submit, recorder.supersede, window=0.2)
+    coalescer.start()
+    events = [
+        make_event("data/file.bin", message_id=str(index), sequencer=f"{index:016X}")
+        for index in range(1, 6)
+    ]
+    for sqs_event in events:
+        coalescer.add(sqs_event)
+
+    assert recorder.submitted_event.wait(2)
+    coalescer.stop()
+
+    assert recorder.submitted == [events[-1]]
+    assert recorder.superseded == events[:-1]
+    assert coalescer.stats()["coalesced"] == 4
+
+
+def test_late_older_event_is_superseded():
+    recorder = Recorder()
+    coalescer = EventCoalescer(recorder.submit, recorder.supersede, window=60)
+    newer = make_event("data/file.bin", message_id="2", sequencer="0000000000000002")
+    older = make_event("data/file.bin", message_id="1", sequencer="0000000000000001")
+
+    coalescer.add(newer)
+    coalescer.add(older)
+
+    assert recorder.superseded == [older]
+    assert list(coalescer.pending.values())[0][1] is newer
+
+
+def test_stop_submits_held_events():
+    recorder = Recorder()
+    coalescer = EventCoalescer(recorder.submit, recorder.supersede, window=60)
+    coalescer.start()
+    events = [make_event(f"data/file-{index}.bin") for index in range(3)]
+    for sqs_event in events:
+        coalescer.add(sqs_event)
+
+    coalescer.stop()
+
+    assert recorder.submitted == events
+
+    # Events added after stopping go straight through
+    late = make_event("data/late.bin")
+    coalescer.add(late)
+    assert recorder.submitted[-1] is late
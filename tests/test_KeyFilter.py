@@ -0,0 +1,62 @@
+"""
+Tests of the include and exclude rules and size bounds of mirrored keys
+"""
+
+from s3watcher.KeyFilter import KeyFilter
+from s3watcher.TransferPlanner import MB
+
+
+def test_no_rules_select_everything():
+    key_filter = KeyFilter()
+
+    assert not key_filter.enabled
+    assert key_filter.matches("any/key.bin", 10)
+    assert key_filter.list_prefixes() is None
+
+
+def test_prefix_glob_and_regex_rules():
+    key_filter = KeyFilter(
+        include=["eea/", "*.cdf", "re:^nemisis/l[01]/"],
+        exclude=["eea/tmp/", "*.part"],
+        prefix="hermes/",
+    )
+
+    assert key_filter.matches("hermes/eea/file.bin")
+    assert key_filter.matches("hermes/merit/file.cdf")
+    assert key_filter.matches("hermes/nemisis/l1/file.bin")
+    assert not key_filter.matches("hermes/nemisis/l2/file.bin")
+    assert not key_filter.matches("hermes/eea/tmp/file.bin")
+    assert not key_filter.matches("hermes/eea/file.part")
+    assert key_filter.stats() == {"selected": 3, "filtered": 3}
+
+
+def test_size_bounds():
+    key_filter = KeyFilter(min_size=1, max_size=2)
+
+    assert not key_filter.matches("file.bin", MB // 2)
+    assert key_filter.matches("file.bin", MB)
+    assert not key_filter.matches("file.bin", 3 * MB)
+    # Deletes carry no size
+    assert key_filter.matches("file.bin", None)
+
+
+def test_listing_is_narrowed_to_include_prefixes():
+    key_filter = KeyFilter(include=["eea/", "eea/l1/", "merit/"], exclude=["merit/"])
+
+    assert key_filter.list_prefixes() == ["eea/"]
+    assert key_filter.list_prefixes(["eea/l1/x", "spani/"]) == ["eea/l1/x"]
+
+
+def test_patterns_list_the_whole_folder():
+    key_filter = KeyFilter(include=["eea/", "*.cdf"])
+
+    assert key_filter.list_prefixes() is None
+
+
+def test_prefixes_above_an_exclude_prefix_are_split():
+    key_filter = KeyFilter(exclude=["eea/tmp/"])
+
+    assert key_filter.splits_prefix("")
+    assert key_filter.splits_prefix("eea/")
+    assert not key_filter.splits_prefix("eea/tmp/")
+    assert not key_filter.splits_prefix("merit/")
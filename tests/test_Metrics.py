@@ -0,0 +1,111 @@
+"""
+Tests of the metrics kept in shared memory and their Prometheus exposition
+"""
+
+import multiprocessing as mp
+import urllib.error
+import urllib.request
+
+import pytest
+
+from s3watcher.Metrics import Counter, Gauge, Histogram, PipelineMetrics
+
+
+def test_counters_render_a_sample_per_label_value():
+    counter = Counter(
+        "downloads_total",
+        "Files downloaded",
+        label="traffic_class",
+        label_values=["live", "backfill"],
+    )
+    counter.inc(label_value="live")
+    counter.inc(2, label_value="backfill")
+
+    assert counter.render().splitlines() == [
+        "# HELP downloads_total Files downloaded",
+        "# TYPE downloads_total counter",
+        'downloads_total{traffic_class="live"} 1.0',
+        'downloads_total{traffic_class="backfill"} 2.0',
+    ]
+
+
+def test_gauges_without_labels_render_a_single_sample():
+    gauge = Gauge("queue_depth", "Messages waiting")
+    gauge.inc(5)
+    gauge.set(3)
+
+    assert gauge.get() == 3
+    assert gauge.render().splitlines()[-1] == "queue_depth 3.0"
+
+
+def test_unknown_label_values_are_rejected():
+    counter = Counter("retries_total", "Retries", label="stage", label_values=["s3"])
+
+    with pytest.raises(ValueError):
+        counter.inc(label_value="sqs")
+
+
+def test_histograms_render_cumulative_buckets_sum_and_count():
+    histogram = Histogram(
+        "lag_seconds",
+        "Event lag",
+        label="stage",
+        label_values=["download"],
+        buckets=(1, 5),
+    )
+    for value in [0.5, 2, 2, 10]:
+        histogram.observe(value, "download")
+
+    assert histogram.samples() == [
+        'lag_seconds_bucket{stage="download",le="1"} 1.0',
+        'lag_seconds_bucket{stage="download",le="5"} 3.0',
+        'lag_seconds_bucket{stage="download",le="+Inf"} 4.0',
+        'lag_seconds_sum{stage="download"} 14.5',
+        'lag_seconds_count{stage="download"} 4.0',
+    ]
+
+
+def update_metrics(metrics):
+    """
+    Function run in a child process to update the shared metrics.
+    """
+    metrics.messages_received.inc(3)
+    metrics.downloads.inc(label_value="backfill")
+    metrics.event_lag.observe(2)
+
+
+def test_metrics_updated_in_another_process_are_shared():
+    metrics = PipelineMetrics()
+
+    process = mp.get_context("fork").Process(target=update_metrics, args=(metrics,))
+    process.start()
+    process.join(10)
+
+    assert process.exitcode == 0
+    assert metrics.messages_received.get() == 3
+    assert metrics.downloads.get("backfill") == 1
+    assert "s3watcher_event_lag_seconds_count 1.0" in metrics.render()
+
+
+def test_watch_metrics_are_only_rendered_for_several_watches():
+    single = PipelineMetrics(["eea"]).render()
+    several = PipelineMetrics(["eea", "merit"]).render()
+
+    assert "s3watcher_watch_" not in single
+    assert 's3watcher_watch_downloads_total{watch="merit"} 0.0' in several
+
+
+def test_metrics_are_served_on_the_metrics_path():
+    metrics = PipelineMetrics()
+    metrics.messages_received.inc()
+    metrics.start_server(0)
+    try:
+        url = f"http://127.0.0.1:{metrics.server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            body = response.read().decode()
+        assert "s3watcher_messages_received_total 1.0" in body
+
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other")
+    finally:
+        metrics.stop_server()
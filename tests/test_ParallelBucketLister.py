@@ -0,0 +1,118 @@
+"""
+Tests of the sharded bucket listing against the S3 stand-in
+"""
+
+from conftest import BUCKET_NAME
+from s3watcher.KeyFilter import KeyFilter
+from s3watcher.ParallelBucketLister import ParallelBucketLister
+
+
+class RecordingClient:
+    """
+    Class to pass S3 calls on to a client, recording the prefixes listed in full and by level, and failing
+    the full listings of some prefixes
+    """
+
+    def __init__(self, client, failing_prefixes=()) -> None:
+        """
+        Class Constructor
+        """
+        self.client = client
+        self.failing_prefixes = list(failing_prefixes)
+        self.listed = []
+        self.levels = []
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def get_paginator(self, operation):
+        paginator = self.client.get_paginator(operation)
+        client = self
+
+        class RecordingPaginator:
+            def paginate(self, **kwargs):
+                if "Delimiter" in kwargs:
+                    client.levels.append(kwargs["Prefix"])
+                else:
+                    client.listed.append(kwargs["Prefix"])
+                    if kwargs["Prefix"] in client.failing_prefixes:
+                        raise ConnectionError("listing failed")
+                return paginator.paginate(**kwargs)
+
+        return RecordingPaginator()
+
+
+def put_objects(aws, keys):
+    """
+    Function to upload an object for each key without sending events.
+    """
+    for key in keys:
+        aws.s3.put_object(Bucket=BUCKET_NAME, Key=key, Body=b"content")
+
+
+def list_keys(lister):
+    """
+    Function to list every key of a lister.
+    """
+    return sorted(
+        s3_object["Key"] for page in lister.iter_pages() for s3_object in page
+    )
+
+
+def test_the_prefix_is_listed_as_a_shard_per_sub_prefix(aws):
+    put_objects(aws, ["top.bin", "eea/a.bin", "eea/l1/b.bin", "merit/c.bin"])
+    client = RecordingClient(aws.s3)
+
+    lister = ParallelBucketLister(lambda: client, BUCKET_NAME, max_workers=4)
+
+    # Objects directly under the prefix come from discovering the shards
+    assert list_keys(lister) == ["eea/a.bin", "eea/l1/b.bin", "merit/c.bin", "top.bin"]
+    assert client.levels == [""]
+    assert sorted(client.listed) == ["eea/", "merit/"]
+    assert lister.errors == 0
+
+
+def test_given_shard_prefixes_are_listed_as_is(aws):
+    put_objects(aws, ["hermes/eea/a.bin", "hermes/merit/b.bin", "hermes/nemisis/c.bin"])
+    client = RecordingClient(aws.s3)
+
+    lister = ParallelBucketLister(
+        lambda: client,
+        BUCKET_NAME,
+        prefix="hermes/",
+        shard_prefixes=["eea/", "merit/"],
+    )
+
+    assert list_keys(lister) == ["hermes/eea/a.bin", "hermes/merit/b.bin"]
+    assert client.levels == []
+
+
+def test_failed_shards_are_counted_and_the_others_still_listed(aws):
+    put_objects(aws, ["eea/a.bin", "merit/b.bin"])
+    client = RecordingClient(aws.s3, failing_prefixes=["eea/"])
+
+    lister = ParallelBucketLister(lambda: client, BUCKET_NAME)
+
+    assert list_keys(lister) == ["merit/b.bin"]
+    assert lister.errors == 1
+
+
+def test_excluded_prefixes_below_the_shards_are_never_listed(aws):
+    put_objects(
+        aws, ["eea/file.bin", "eea/tmp/part.bin", "eea/l1/file.bin", "merit/file.bin"]
+    )
+    client = RecordingClient(aws.s3)
+    key_filter = KeyFilter(exclude=["eea/tmp/"])
+
+    lister = ParallelBucketLister(
+        lambda: client,
+        BUCKET_NAME,
+        skip_prefix=key_filter.excludes_prefix,
+        split_prefix=key_filter.splits_prefix,
+    )
+
+    assert list_keys(lister) == ["eea/file.bin", "eea/l1/file.bin", "merit/file.bin"]
+    assert not any(
+        prefix.startswith("eea/tmp/") for prefix in client.listed + client.levels
+    )
+    assert sorted(client.listed) == ["eea/l1/", "merit/"]
@@ -0,0 +1,132 @@
+"""
+Tests of the priority scheduler
+"""
+
+import queue
+import threading
+import time
+
+import pytest
+
+from s3watcher.PriorityScheduler import PriorityScheduler
+from s3watcher.RateLimiter import BACKFILL, LIVE
+
+
+def test_get_times_out_while_empty_and_returns_none_once_closed():
+    scheduler = PriorityScheduler()
+
+    with pytest.raises(queue.Empty):
+        scheduler.get(timeout=0.1)
+
+    scheduler.put(None)
+    assert scheduler.get(timeout=0.1) is None
+
+
+class Task:
+    """
+    Class to stand in for a scheduled event or backfill download
+    """
+
+    def __init__(
+        self,
+        file_key,
+        size=None,
+        traffic_class=LIVE,
+        sent_timestamp=None,
+        watch=None,
+    ) -> None:
+        """
+        Class Constructor
+        """
+        self.file_key = file_key
+        self.size = size
+        self.traffic_class = traffic_class
+        self.sent_timestamp = sent_timestamp
+        self.watch = watch
+
+
+def take_all(scheduler):
+    """
+    Function to take every waiting task, returning their keys in order.
+    """
+    keys = []
+    while len(scheduler):
+        keys.append(scheduler.get(timeout=0).file_key)
+    return keys
+
+
+def test_live_tasks_go_before_backfill_in_arrival_order():
+    scheduler = PriorityScheduler(aging_interval=0)
+    scheduler.put(Task("backfill.bin", traffic_class=BACKFILL))
+    scheduler.put(Task("live-1.bin"))
+    scheduler.put(Task("live-2.bin"))
+
+    assert take_all(scheduler) == ["live-1.bin", "live-2.bin", "backfill.bin"]
+    assert scheduler.stats()["scheduled"] == [0, 2, 0, 1, 0, 0]
+
+
+def test_waiting_tasks_age_into_higher_priority():
+    scheduler = PriorityScheduler(aging_interval=10)
+    now = time.time()
+    # Two levels below, but waiting for three aging intervals
+    scheduler.put(
+        Task("backfill.bin", traffic_class=BACKFILL, sent_timestamp=now - 30)
+    )
+    scheduler.put(Task("live.bin", sent_timestamp=now))
+
+    assert take_all(scheduler) == ["backfill.bin", "live.bin"]
+
+
+def test_prefix_levels_take_the_longest_matching_prefix():
+    scheduler = PriorityScheduler(
+        prefix_levels={"eea/": 0, "eea/l0/": 4}, aging_interval=0
+    )
+    scheduler.put(Task("eea/l0/file.bin"))
+    scheduler.put(Task("merit/file.bin"))
+    scheduler.put(Task("eea/file.bin"))
+
+    assert take_all(scheduler) == [
+        "eea/file.bin",
+        "merit/file.bin",
+        "eea/l0/file.bin",
+    ]
+
+
+def test_large_objects_make_way_for_small_ones():
+    scheduler = PriorityScheduler(large_object_size=1000, aging_interval=0)
+    scheduler.put(Task("large.bin", size=2000))
+    scheduler.put(Task("small.bin", size=10))
+    scheduler.put(Task("unknown.bin"))
+
+    assert take_all(scheduler) == ["small.bin", "unknown.bin", "large.bin"]
+
+
+def test_watches_take_turns_within_a_level():
+    scheduler = PriorityScheduler(aging_interval=0, fair_key=lambda task: task.watch)
+    for index in range(3):
+        scheduler.put(Task(f"busy-{index}.bin", watch="busy"))
+    scheduler.put(Task("quiet.bin", watch="quiet"))
+
+    assert take_all(scheduler) == [
+        "busy-0.bin",
+        "quiet.bin",
+        "busy-1.bin",
+        "busy-2.bin",
+    ]
+
+
+def test_backfill_put_blocks_while_too_many_are_waiting():
+    scheduler = PriorityScheduler(max_backfill_pending=1, aging_interval=0)
+    scheduler.put(Task("first.bin", traffic_class=BACKFILL))
+
+    putter = threading.Thread(
+        target=scheduler.put, args=(Task("second.bin", traffic_class=BACKFILL),)
+    )
+    putter.start()
+    putter.join(0.2)
+    assert putter.is_alive()
+
+    assert scheduler.get(timeout=1).file_key == "first.bin"
+    putter.join(1)
+    assert not putter.is_alive()
+    assert scheduler.get(timeout=1).file_key == "second.bin"
@@ -0,0 +1,111 @@
+"""
+Tests of the token buckets holding the download bandwidth and request rate budgets
+"""
+
+import pytest
+
+from s3watcher import RateLimiter
+from s3watcher.RateLimiter import BACKFILL, LIVE, TokenBucket, TransferLimiter
+
+
+class FakeClock:
+    """
+    Class to stand in for the time module, advancing only when slept on
+    """
+
+    def __init__(self) -> None:
+        """
+        Class Constructor
+        """
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Fake clock of the rate limiter
+    """
+    fake_clock = FakeClock()
+    monkeypatch.setattr(RateLimiter, "time", fake_clock)
+    return fake_clock
+
+
+def test_a_burst_up_to_the_capacity_does_not_wait(clock):
+    bucket = TokenBucket(10)
+
+    for _ in range(10):
+        bucket.acquire()
+    assert clock.slept == []
+
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(0.1)]
+
+
+def test_tokens_refill_at_the_rate_up_to_the_capacity(clock):
+    bucket = TokenBucket(10, capacity=5)
+    bucket.acquire(5)
+
+    # An idle minute refills the bucket to its capacity only
+    clock.now += 60
+    bucket.acquire(5)
+    assert clock.slept == []
+
+    bucket.acquire(5)
+    assert clock.slept == [pytest.approx(0.5)]
+
+
+def test_large_amounts_go_into_debt_instead_of_starving(clock):
+    bucket = TokenBucket(100)
+
+    bucket.acquire(300)
+    assert clock.slept == [pytest.approx(2.0)]
+
+    # The debt is paid off by the wait, so the next caller starts from an empty bucket
+    bucket.acquire(50)
+    assert clock.slept[-1] == pytest.approx(0.5)
+    assert bucket.waited == pytest.approx(2.5)
+
+
+def test_a_rate_of_zero_disables_the_limit(clock):
+    bucket = TokenBucket(0)
+
+    bucket.acquire(10**9)
+
+    assert clock.slept == []
+
+
+def test_live_and_backfill_draw_on_separate_budgets(clock):
+    limiter = TransferLimiter(
+        live_bandwidth=100,
+        live_request_rate=1,
+        backfill_bandwidth=10,
+        backfill_request_rate=1,
+    )
+
+    # Backfill using up its budget does not hold up live downloads
+    limiter.acquire_bytes(BACKFILL, 10)
+    limiter.acquire_requests(BACKFILL)
+    limiter.acquire_bytes(LIVE, 100)
+    limiter.acquire_requests(LIVE)
+    assert clock.slept == []
+
+    limiter.acquire_bytes(BACKFILL, 10)
+    assert clock.slept == [pytest.approx(1.0)]
+
+
+def test_bytes_callback_is_only_set_with_a_bandwidth_limit(clock):
+    limiter = TransferLimiter(backfill_bandwidth=10)
+
+    assert limiter.bytes_callback(LIVE) is None
+
+    callback = limiter.bytes_callback(BACKFILL)
+    callback(20)
+    assert clock.slept == [pytest.approx(1.0)]
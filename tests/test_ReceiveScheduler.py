@@ -0,0 +1,40 @@
+"""
+Tests of the sizing and pacing of receives
+"""
+
+from s3watcher.ReceiveScheduler import ReceiveScheduler
+
+
+def test_receivers_follow_the_queue_depth():
+    scheduler = ReceiveScheduler(lambda: 25, max_receivers=4)
+
+    assert scheduler.receivers() == 3
+
+
+def test_receivers_are_capped_by_free_capacity():
+    free = [40]
+    scheduler = ReceiveScheduler(
+        lambda: 1000, get_free_capacity=lambda: free[0], max_receivers=8
+    )
+    assert scheduler.receivers() == 4
+
+    free[0] = 5
+    assert scheduler.receivers() == 1
+
+    # No receives while the consumer is full
+    free[0] = -3
+    assert scheduler.receivers() == 0
+
+
+def test_full_rounds_add_receivers_and_empty_rounds_back_off():
+    scheduler = ReceiveScheduler(
+        lambda: 0, max_receivers=4, wait_time_seconds=0, min_backoff=0.25
+    )
+    assert scheduler.receivers() == 1
+
+    assert scheduler.next_delay(10) == 0
+    assert scheduler.current_receivers == 2
+
+    assert scheduler.next_delay(0) == 0.25
+    assert scheduler.next_delay(0) == 0.5
+    assert scheduler.current_receivers == 1
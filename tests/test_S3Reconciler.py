@@ -0,0 +1,83 @@
+"""
+Tests of checking the download path against the bucket with the S3 stand-in
+"""
+
+import os
+
+from s3watcher.S3Reconciler import S3Reconciler
+from test_ParallelBucketLister import RecordingClient
+from test_SQSQueueHandler import drain, wait_for
+
+
+def capture_downloads(handler):
+    """
+    Function to record the keys the reconciler schedules for download instead of downloading them.
+    """
+    submitted = []
+
+    def submit_task(task):
+        submitted.append(task.file_key)
+        task.done(True)
+
+    handler.submit_task = submit_task
+    return submitted
+
+
+def test_missing_and_outdated_keys_are_downloaded(aws, make_handler, tmp_path):
+    handler = make_handler(manifest_path=str(tmp_path / "manifest.db"))
+    aws.put_object("data/current.bin", b"content")
+    aws.put_object("data/outdated.bin", b"version 1")
+    drain(handler, aws, 2)
+
+    aws.put_object("data/outdated.bin", b"version 2", send=False)
+    aws.put_object("data/missing.bin", b"content", send=False)
+    submitted = capture_downloads(handler)
+
+    reconciler = S3Reconciler(handler, list_concurrency=2)
+    reconciler.run()
+
+    assert sorted(submitted) == ["data/missing.bin", "data/outdated.bin"]
+    assert reconciler.listed == 3
+    assert reconciler.local == 2
+    assert reconciler.downloaded == 2
+
+
+def test_excluded_keys_are_not_downloaded(aws, make_handler):
+    handler = make_handler(exclude_rules=["data/tmp/"])
+    aws.put_object("data/file.bin", b"content", send=False)
+    aws.put_object("data/tmp/file.bin", b"content", send=False)
+    submitted = capture_downloads(handler)
+
+    S3Reconciler(handler).run()
+
+    assert submitted == ["data/file.bin"]
+
+
+def test_an_incomplete_listing_does_not_remove_local_files(
+    aws, make_handler, tmp_path
+):
+    handler = make_handler(
+        allow_delete=True,
+        manifest_path=str(tmp_path / "manifest.db"),
+    )
+    local_path = os.path.join(handler.download_path, "data/file.bin")
+    aws.put_object("data/file.bin", b"content")
+    aws.put_object("logs/file.bin", b"content")
+    drain(handler, aws, 2)
+    aws.delete_object("data/file.bin", send=False)
+
+    # Listing a shard other than the one the removed object was in fails
+    client = RecordingClient(handler.get_s3_client(), failing_prefixes=["logs/"])
+    handler.get_s3_client = lambda: client
+    reconciler = S3Reconciler(handler)
+    reconciler.run()
+
+    assert reconciler.lister.errors == 1
+    assert reconciler.removed == 0
+    assert not wait_for(lambda: not os.path.exists(local_path), timeout=0.5)
+
+    # A complete listing removes it
+    client.failing_prefixes = []
+    S3Reconciler(handler).run()
+
+    assert wait_for(lambda: not os.path.exists(local_path))
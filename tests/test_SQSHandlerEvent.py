@@ -0,0 +1,57 @@
+"""
+Tests of the parsing and identity of S3 events
+"""
+
+import json
+
+from conftest import make_event
+from s3watcher.SQSHandlerEvent import SQSHandlerEvent
+
+
+def test_records_of_a_message_share_it():
+    body = {
+        "Records": [
+            {
+                "eventName": "ObjectCreated:Put",
+                "s3": {"bucket": {"name": "b"}, "object": {"key": "a+b.bin", "size": 1}},
+            },
+            {
+                "eventName": "ObjectRemoved:Delete",
+                "s3": {"bucket": {"name": "b"}, "object": {"key": "c.bin"}},
+            },
+        ]
+    }
+    events = SQSHandlerEvent.from_sqs_message(
+        {"MessageId": "m", "ReceiptHandle": "r", "Body": json.dumps(body)}, "queue"
+    )
+
+    assert [(e.event_type, e.file_key) for e in events] == [
+        ("CREATE", "a b.bin"),
+        ("DELETE", "c.bin"),
+    ]
+    assert events[0].message is events[1].message
+    assert events[0].message.pending == 2
+    assert [e.event_id for e in events] == ["m:0", "m:1"]
+
+
+def test_unparsable_message_gives_an_empty_event():
+    events = SQSHandlerEvent.from_sqs_message(
+        {"MessageId": "m", "ReceiptHandle": "r", "Body": "not json"}, "queue"
+    )
+
+    assert len(events) == 1
+    assert events[0].event_type is None
+
+
+def test_identity_prefers_the_sequencer():
+    first = make_event("data/file.bin", etag="abc", sequencer="0000000000000001")
+    rewrite = make_event("data/file.bin", etag="abc", sequencer="0000000000000003")
+
+    # Identical content written again is a different change of the object
+    assert first.object_identity != rewrite.object_identity
+    assert first.object_identity.endswith("@0000000000000001")
+
+
+def test_identity_falls_back_to_the_etag():
+    assert make_event("data/file.bin", etag='"abc"').object_identity.endswith("@abc")
+    assert make_event("data/file.bin").object_identity is None
@@ -0,0 +1,70 @@
+"""
+Tests of the batched message acknowledgements
+"""
+
+from s3watcher.SQSMessageAcker import SQSMessageAcker
+from s3watcher.SQSHandlerEvent import SQSHandlerEvent
+
+
+def receive(aws, count):
+    """
+    Function to send and receive messages, returning their events.
+    """
+    for index in range(count):
+        aws.send_event(f"data/file-{index}.bin")
+
+    events = []
+    while len(events) < count:
+        messages = aws.sqs.receive_message(
+            QueueUrl=aws.queue_url, MaxNumberOfMessages=10
+        ).get("Messages", [])
+        for message in messages:
+            events.extend(SQSHandlerEvent.from_sqs_message(message, aws.queue_url))
+    return events
+
+
+def test_acks_are_deleted_in_batches(aws):
+    acker = SQSMessageAcker(lambda: aws.sqs, aws.queue_url, flush_interval=60)
+    for sqs_event in receive(aws, 25):
+        acker.ack(sqs_event)
+
+    acker.flush()
+
+    assert acker.deleted == 25
+    assert acker.requests == 3
+    assert aws.queue_size() == 0
+
+
+def test_duplicate_acks_are_deleted_once(aws):
+    acker = SQSMessageAcker(lambda: aws.sqs, aws.queue_url, flush_interval=60)
+    sqs_event = receive(aws, 1)[0]
+    acker.ack(sqs_event)
+    acker.ack(sqs_event)
+
+    acker.flush()
+
+    assert acker.deleted == 1
+    assert acker.requests == 1
+
+
+def test_stop_flushes_pending_acks(aws):
+    # The interval never elapses, only stopping deletes the messages
+    acker = SQSMessageAcker(lambda: aws.sqs, aws.queue_url, flush_interval=60)
+    acker.start()
+    for sqs_event in receive(aws, 3):
+        acker.ack(sqs_event)
+
+    acker.stop()
+
+    assert acker.deleted == 3
+    assert aws.queue_size() == 0
+
+
+def test_invalid_receipt_handles_are_not_retried(aws):
+    acker = SQSMessageAcker(lambda: aws.sqs, aws.queue_url, flush_interval=60)
+    acker.pending.append(["not-a-receipt-handle", 0])
+
+    acker.stop()
+
+    assert acker.failed == 1
+    assert acker.pending == []
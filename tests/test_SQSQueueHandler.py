@@ -0,0 +1,293 @@
+"""
+Tests of the event handling of SQSQueueHandler against the stand-ins
+"""
+
+import concurrent.futures
+import os
+import signal
+import threading
+import time
+
+
+def wait_for(condition, timeout=5):
+    """
+    Function to wait until a condition holds, returning whether it did.
+    """
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def drain(handler, aws, expected):
+    """
+    Function to receive events and process them in order on the calling thread, as a single worker would.
+    """
+    processed = []
+    while len(processed) < expected:
+        events = aws.receive_events(handler)
+        assert events, f"Received {len(processed)} of {expected} events"
+        for sqs_event in events:
+            handler.process_message(sqs_event)
+            processed.append(sqs_event)
+    return processed
+
+
+def run_consumer(handler):
+    """
+    Function to run the consumer of a handler on a thread, returning it once the workers are running.
+    """
+    consumer = threading.Thread(target=handler.process_messages, daemon=True)
+    consumer.start()
+    assert wait_for(lambda: getattr(handler, "worker_pool", None) is not None)
+    return consumer
+
+
+def test_created_objects_are_downloaded_and_acknowledged(aws, make_handler):
+    handler = make_handler()
+    aws.put_object("data/file.bin", b"content")
+
+    drain(handler, aws, 1)
+
+    with open(os.path.join(handler.download_path, "data/file.bin"), "rb") as local_file:
+        assert local_file.read() == b"content"
+    assert wait_for(lambda: aws.queue_size() == 0)
+
+
+def test_bursts_of_a_key_are_coalesced(aws, make_handler):
+    handler = make_handler(coalesce_window=0.3)
+    processed = []
+    handler.coalescer.submit = processed.append
+    for index in range(5):
+        aws.put_object("data/file.bin", f"version {index}".encode())
+
+    for sqs_event in aws.receive_events(handler):
+        handler.schedule_event(sqs_event)
+    assert wait_for(lambda: processed)
+
+    for sqs_event in processed:
+        handler.process_message(sqs_event)
+
+    assert len(processed) == 1
+    assert handler.metrics.events_coalesced.get() == 4
+    with open(os.path.join(handler.download_path, "data/file.bin"), "rb") as local_file:
+        assert local_file.read() == b"version 4"
+    assert wait_for(lambda: aws.queue_size() == 0)
+
+
+def test_excluded_keys_are_acknowledged_without_download(aws, make_handler):
+    handler = make_handler(include_rules=["eea/"])
+    processed = []
+    handler.submit_task = processed.append
+    aws.put_object("eea/file.bin", b"selected")
+    aws.put_object("merit/file.bin", b"excluded")
+
+    for sqs_event in aws.receive_events(handler):
+        handler.schedule_event(sqs_event)
+
+    assert [sqs_event.file_key for sqs_event in processed] == ["eea/file.bin"]
+    assert handler.metrics.events_filtered.get() == 1
+    assert wait_for(lambda: aws.queue_size() == 1)
+
+
+def test_shutdown_drains_the_workers_and_stops_the_services(aws, make_handler):
+    handler = make_handler(start=False)
+    consumer = run_consumer(handler)
+
+    handler.shutdown()
+    consumer.join(10)
+
+    assert not consumer.is_alive()
+    assert not any(thread.is_alive() for thread in handler.worker_pool.threads)
+    assert handler.acker is None and handler.lease_manager is None
+
+
+def test_signals_start_the_shutdown(make_handler):
+    handler = make_handler(start=False)
+    called = threading.Event()
+    previous = {
+        signum: signal.getsignal(signum) for signum in [signal.SIGTERM, signal.SIGINT]
+    }
+    try:
+        handler.handle_signals(called.set)
+        os.kill(os.getpid(), signal.SIGTERM)
+        assert called.wait(5)
+    finally:
+        for signum, signal_handler in previous.items():
+            signal.signal(signum, signal_handler)
+
+
+def test_shutdown_flushes_batched_acknowledgements(aws, make_handler):
+    # The flush interval never elapses, only shutting down deletes the messages
+    handler = make_handler(start=False, ack_flush_interval=60)
+    consumer = run_consumer(handler)
+    for index in range(3):
+        aws.put_object(f"data/file-{index}.bin", b"content")
+    handler.get_messages()
+    assert wait_for(lambda: handler.acker and len(handler.acker.pending) == 3)
+
+    handler.shutdown()
+    consumer.join(10)
+
+    assert aws.queue_size() == 0
+
+
+def test_shutdown_writes_buffered_timestream_records(aws, make_handler):
+    from test_TimestreamBatchWriter import FakeTimestreamClient, record
+
+    handler = make_handler(start=False, timestream_flush_interval=60)
+    handler.timestream_client = FakeTimestreamClient()
+    consumer = run_consumer(handler)
+    handler.timestream_writer.write_records(
+        DatabaseName="db", TableName="table", Records=[record(0)]
+    )
+
+    handler.shutdown()
+    consumer.join(10)
+
+    assert len(handler.timestream_client.calls) == 1
+
+
+def test_shutdown_sends_the_last_slack_digest(aws, make_handler):
+    from test_SlackNotifier import FakeSlackClient
+
+    handler = make_handler(start=False, slack_digest_interval=3600, slack_rate=1000)
+    handler.slack_client = FakeSlackClient()
+    consumer = run_consumer(handler)
+    handler.send_download_notification("data/file-1.bin", size=1)
+    handler.send_download_notification("data/file-2.bin", size=1)
+
+    handler.shutdown()
+    consumer.join(10)
+
+    assert handler.slack_client.messages[-1].startswith("Downloaded 2 files")
+
+
+def test_events_waiting_for_a_worker_keep_their_lease(aws, make_handler):
+    handler = make_handler(visibility_timeout=2)
+    for index in range(3):
+        aws.put_object(f"data/file-{index}.bin", b"content")
+
+    # No workers are running, the events wait in the scheduler past the visibility timeout
+    for sqs_event in aws.receive_events(handler):
+        handler.schedule_event(sqs_event)
+    assert handler.metrics.events_waiting.get() == 3
+    time.sleep(4)
+
+    assert aws.sqs.receive_message(QueueUrl=aws.queue_url).get("Messages") is None
+
+    # Stopping makes the events left waiting visible again right away
+    handler.stop_services()
+    messages = aws.sqs.receive_message(
+        QueueUrl=aws.queue_url, MaxNumberOfMessages=10
+    ).get("Messages", [])
+    assert len(messages) == 3
+
+
+def test_poller_holds_off_while_events_wait(aws, make_handler):
+    handler = make_handler(concurrency_limit=1)
+    aws.put_object("data/file.bin", b"content")
+    handler.metrics.events_waiting.set(2)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        poller = threading.Thread(target=handler.poll_queue, args=(executor,))
+        poller.start()
+        try:
+            time.sleep(0.5)
+            assert handler.metrics.messages_received.get() == 0
+
+            handler.metrics.events_waiting.set(0)
+            assert wait_for(lambda: handler.metrics.messages_received.get() == 1)
+        finally:
+            handler.stopping.set()
+            poller.join(5)
+
+
+def test_overwrite_with_earlier_content_is_downloaded(aws, make_handler):
+    handler = make_handler()
+    local_path = os.path.join(handler.download_path, "data/file.bin")
+
+    # X -> Y -> X, the last write has the same ETag as the first
+    for body in [b"version x", b"version y", b"version x"]:
+        aws.put_object("data/file.bin", body)
+        drain(handler, aws, 1)
+
+    with open(local_path, "rb") as local_file:
+        assert local_file.read() == b"version x"
+
+
+def test_recreated_object_with_the_same_content_is_downloaded(aws, make_handler, tmp_path):
+    handler = make_handler(
+        allow_delete=True,
+        coordinate=True,
+        manifest_path=str(tmp_path / "manifest.db"),
+    )
+    local_path = os.path.join(handler.download_path, "data/file.bin")
+
+    # Without sequencers the events are told apart by their ETag only
+    s3_object = aws.put_object("data/file.bin", b"content", send=False)
+    del s3_object["sequencer"]
+    aws.send_event(**s3_object)
+    drain(handler, aws, 1)
+    aws.delete_object("data/file.bin", send=False)
+    aws.send_event("data/file.bin", event_name="ObjectRemoved:Delete")
+    drain(handler, aws, 1)
+    assert wait_for(lambda: not os.path.exists(local_path))
+
+    aws.s3.put_object(Bucket="s3watcher-test", Key="data/file.bin", Body=b"content")
+    aws.send_event(**s3_object)
+    drain(handler, aws, 1)
+
+    assert os.path.exists(local_path)
+    assert wait_for(lambda: aws.queue_size() == 0)
+
+
+def test_events_of_another_version_than_a_live_claim_are_deferred(aws, make_handler):
+    first = make_handler(coordinate=True)
+    second = make_handler(coordinate=True, visibility_timeout=2)
+    local_path = os.path.join(second.download_path, "data/file.bin")
+
+    # The first instance is downloading an earlier version of the key
+    s3_object = aws.put_object("data/file.bin", b"content")
+    first.claims.claim("s3watcher-test", "data/file.bin", "earlier-etag", "00")
+    drain(second, aws, 1)
+
+    assert not os.path.exists(local_path)
+    assert second.metrics.events_deferred.get() == 1
+    assert second.metrics.failures.get("download") == 0
+    assert second.metrics.retries.get("download") == 0
+    assert aws.receive_events(second) == []
+
+    # Received again once the deferral runs out, after the other instance is done
+    first.claims.release("s3watcher-test", "data/file.bin", True, etag="earlier-etag")
+    time.sleep(2.5)
+    drain(second, aws, 1)
+
+    with open(local_path, "rb") as local_file:
+        assert local_file.read() == b"content"
+    assert s3_object["etag"] != "earlier-etag"
+
+
+def test_checking_with_s3_only_removes_files_the_watch_downloaded(aws, make_handler, tmp_path):
+    handler = make_handler(
+        allow_delete=True,
+        manifest_path=str(tmp_path / "manifest.db"),
+    )
+    local_path = os.path.join(handler.download_path, "data/file.bin")
+    user_path = os.path.join(handler.download_path, "data/user.txt")
+
+    aws.put_object("data/file.bin", b"content")
+    drain(handler, aws, 1)
+    assert os.path.exists(local_path)
+
+    # A file the watch never downloaded, and a removal the queue never heard of
+    with open(user_path, "w") as user_file:
+        user_file.write("notes")
+    aws.delete_object("data/file.bin", send=False)
+
+    handler.check_s3()
+
+    assert wait_for(lambda: not os.path.exists(local_path))
+    assert os.path.exists(user_path)
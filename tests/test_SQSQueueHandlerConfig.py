@@ -0,0 +1,134 @@
+"""
+Tests of the command line and environment configuration
+"""
+
+import sys
+
+import pytest
+import yaml
+
+from s3watcher.SQSQueueHandlerConfig import (
+    create_argparse,
+    get_args,
+    get_config,
+    load_watches,
+)
+
+
+def test_optional_settings_default_to_their_environment_variables(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["s3watcher", "-b", "bucket", "-q", "queue"])
+    monkeypatch.setenv("SDC_AWS_VISIBILITY_TIMEOUT", "120")
+    monkeypatch.setenv("SDC_AWS_COALESCE_WINDOW", "0.5")
+    monkeypatch.setenv("SDC_AWS_INCLUDE", "eea/,*.cdf")
+    monkeypatch.setenv("SDC_AWS_COORDINATE", "true")
+
+    args = get_args(create_argparse())
+
+    assert args["SDC_AWS_VISIBILITY_TIMEOUT"] == 120
+    assert args["SDC_AWS_COALESCE_WINDOW"] == 0.5
+    assert args["SDC_AWS_INCLUDE"] == ["eea/", "*.cdf"]
+    assert args["SDC_AWS_COORDINATE"] is True
+    assert args["SDC_AWS_ATOMIC_DOWNLOADS"] is False
+
+
+def test_flags_take_precedence_over_environment_variables(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["s3watcher", "-vt", "60"])
+    monkeypatch.setenv("SDC_AWS_VISIBILITY_TIMEOUT", "120")
+
+    assert get_args(create_argparse())["SDC_AWS_VISIBILITY_TIMEOUT"] == 60
+
+
+def write_watches(tmp_path, watches):
+    """
+    Function to write a watch file with the given watches, returning its path.
+    """
+    watch_path = tmp_path / "watches.yaml"
+    watch_path.write_text(yaml.safe_dump({"watches": watches}))
+    return str(watch_path)
+
+
+def test_watches_with_the_same_name_are_rejected(tmp_path):
+    watch_file = write_watches(
+        tmp_path,
+        [
+            {"name": "eea", "queue_name": "q1", "bucket_name": "b", "path": "/data/a"},
+            {"name": "eea", "queue_name": "q2", "bucket_name": "b", "path": "/data/b"},
+        ],
+    )
+
+    with pytest.raises(ValueError, match="different name"):
+        load_watches(watch_file)
+
+
+def test_watches_with_nested_download_paths_are_rejected(tmp_path):
+    watch_file = write_watches(
+        tmp_path,
+        [
+            {"queue_name": "q1", "bucket_name": "b", "path": "/data"},
+            {"queue_name": "q2", "bucket_name": "b", "path": "/data/eea/"},
+        ],
+    )
+
+    with pytest.raises(ValueError, match="nested"):
+        load_watches(watch_file)
+
+
+def test_watches_nested_in_the_main_watch_path_are_rejected(tmp_path, monkeypatch):
+    watch_file = write_watches(
+        tmp_path,
+        [{"queue_name": "q2", "bucket_name": "b", "path": "/data/eea"}],
+    )
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["s3watcher", "-d", "/data", "-b", "b", "-q", "q1", "-wf", watch_file],
+    )
+
+    with pytest.raises(SystemExit):
+        get_config()
+
+
+def test_watches_with_separate_download_paths_are_accepted(tmp_path, monkeypatch):
+    watch_file = write_watches(
+        tmp_path,
+        [{"queue_name": "q2", "bucket_name": "b", "path": "/data/eea-2"}],
+    )
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["s3watcher", "-d", "/data/eea", "-b", "b", "-q", "q1", "-wf", watch_file],
+    )
+
+    config = get_config()
+
+    assert [watch.path for watch in config.get_watch_configs()] == [
+        "/data/eea",
+        "/data/eea-2",
+    ]
+
+
+def test_watch_files_are_rejected_with_the_thread_engine(tmp_path, monkeypatch):
+    watch_file = write_watches(
+        tmp_path,
+        [{"queue_name": "q2", "bucket_name": "b", "path": "/data/eea-2"}],
+    )
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "s3watcher",
+            "-d",
+            "/data/eea",
+            "-b",
+            "b",
+            "-q",
+            "q1",
+            "-wf",
+            watch_file,
+            "-e",
+            "thread",
+        ],
+    )
+
+    with pytest.raises(SystemExit):
+        get_config()
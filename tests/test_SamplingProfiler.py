@@ -0,0 +1,26 @@
+"""
+Tests of the sampling profiler
+"""
+
+import os
+import signal
+import time
+
+from s3watcher.SamplingProfiler import SamplingProfiler
+
+
+def test_signal_toggles_the_profiler_and_writes_the_profile(tmp_path):
+    profiler = SamplingProfiler(output_path=str(tmp_path), interval=0.001)
+    previous = signal.getsignal(signal.SIGUSR2)
+    try:
+        profiler.install()
+        os.kill(os.getpid(), signal.SIGUSR2)
+        time.sleep(0.1)
+        assert profiler.running
+    finally:
+        signal.signal(signal.SIGUSR2, previous)
+
+    path = profiler.stop()
+
+    assert os.path.getsize(path) > 0
+    assert profiler.stop() is None
@@ -0,0 +1,111 @@
+"""
+Tests of the Slack digests and failure alerts
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("sdc_aws_utils")
+
+from s3watcher.SlackNotifier import SlackNotifier  # noqa: E402
+
+
+class FakeSlackClient:
+    """
+    Class to record the posted Slack messages
+    """
+
+    def __init__(self, delay: float = 0) -> None:
+        """
+        Class Constructor, the delay is how long each post takes
+        """
+        self.messages = []
+        self.delay = delay
+
+    def chat_postMessage(self, channel, text):
+        time.sleep(self.delay)
+        self.messages.append(text)
+        return {"ok": True}
+
+
+def test_stop_sends_pending_alerts_and_the_last_digest():
+    client = FakeSlackClient()
+    notifier = SlackNotifier(
+        client, "#channel", bucket_name="bucket", digest_interval=3600, rate=1000
+    )
+    notifier.record_download("eea/file-1.bin", 1024)
+    notifier.record_download("eea/file-2.bin", 1024)
+    notifier.record_failure("merit/file.bin", "download failed")
+
+    notifier.stop()
+
+    assert client.messages[0] == (
+        "Error processing file (merit/file.bin) from bucket (bucket): download failed"
+    )
+    assert client.messages[-1].startswith("Downloaded 2 files")
+    assert "Failures: 1, first failed files: merit/file.bin" in client.messages[-1]
+
+
+def test_alerts_are_sent_right_away():
+    client = FakeSlackClient()
+    notifier = SlackNotifier(client, "#channel", digest_interval=3600, rate=1000)
+    notifier.start()
+    try:
+        notifier.record_failure("file.bin", "error")
+        deadline = time.time() + 5
+        while not client.messages and time.time() < deadline:
+            time.sleep(0.05)
+        assert len(client.messages) == 1
+    finally:
+        notifier.stop()
+
+
+def test_empty_digest_is_not_sent():
+    client = FakeSlackClient()
+    notifier = SlackNotifier(client, "#channel", digest_interval=3600)
+
+    notifier.stop()
+
+    assert client.messages == []
+
+
+def test_repeat_failures_are_merged_into_the_digest():
+    client = FakeSlackClient()
+    notifier = SlackNotifier(client, "#channel", digest_interval=3600, rate=1000)
+    for _ in range(3):
+        notifier.record_failure("file.bin", "error")
+    for index in range(50):
+        notifier.record_failure(f"file-{index}.bin", "error")
+
+    notifier.stop()
+
+    # One alert per key up to the limit, then the digest counting every failure
+    assert len(client.messages) == SlackNotifier.max_alerts + 1
+    assert "Failures: 53, first failed files: file.bin, file-0.bin" in client.messages[-1]
+
+
+def test_digest_keeps_a_bounded_sample_of_downloads():
+    client = FakeSlackClient()
+    notifier = SlackNotifier(client, "#channel", digest_interval=3600, rate=1000)
+    for index in range(1000):
+        notifier.record_download(f"eea/file-{index}.bin", 1024)
+
+    assert len(notifier.downloads) == SlackNotifier.max_listed
+    notifier.stop()
+
+    assert client.messages[-1].startswith("Downloaded 1000 files")
+    assert "eea (1000)" in client.messages[-1]
+
+
+def test_stop_gives_up_on_a_slow_slack_after_the_timeout():
+    client = FakeSlackClient(delay=0.5)
+    notifier = SlackNotifier(client, "#channel", digest_interval=3600, rate=1000)
+    for index in range(SlackNotifier.max_alerts):
+        notifier.record_failure(f"file-{index}.bin", "error")
+
+    start_time = time.time()
+    notifier.stop(timeout=1)
+
+    assert time.time() - start_time < 2
+    assert len(client.messages) < SlackNotifier.max_alerts
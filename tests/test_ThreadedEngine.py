@@ -0,0 +1,26 @@
+"""
+Tests of the threaded engine against the stand-ins
+"""
+
+import os
+import threading
+
+from s3watcher.ThreadedEngine import ThreadedEngine
+from test_SQSQueueHandler import wait_for
+
+
+def test_events_are_processed_and_shutdown_returns(aws, make_handler):
+    handler = make_handler(start=False)
+    engine = threading.Thread(target=ThreadedEngine(handler).run, daemon=True)
+    engine.start()
+    aws.put_object("data/file.bin", b"content")
+
+    local_path = os.path.join(handler.download_path, "data/file.bin")
+    assert wait_for(lambda: os.path.exists(local_path))
+    assert wait_for(lambda: aws.queue_size() == 0)
+
+    handler.shutdown()
+    engine.join(10)
+
+    assert not engine.is_alive()
+    assert handler.acker is None
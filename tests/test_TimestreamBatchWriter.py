@@ -0,0 +1,92 @@
+"""
+Tests of the batched Timestream writes
+"""
+
+import botocore
+
+from s3watcher.TimestreamBatchWriter import TimestreamBatchWriter
+
+
+class FakeTimestreamClient:
+    """
+    Class to record the Timestream writes, failing the first ones when asked to
+    """
+
+    def __init__(self, errors: list = None) -> None:
+        """
+        Class Constructor
+        """
+        self.calls = []
+        self.errors = list(errors or [])
+
+    def write_records(self, **kwargs):
+        if self.errors:
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": self.errors.pop(0)}}, "WriteRecords"
+            )
+        self.calls.append(kwargs)
+        return {}
+
+
+def record(index):
+    """
+    Function to build a Timestream record.
+    """
+    return {"MeasureName": "file", "MeasureValue": str(index)}
+
+
+def test_buffered_records_are_written_on_stop():
+    client = FakeTimestreamClient()
+    # The interval never elapses and the batch never fills, only stopping writes the records
+    writer = TimestreamBatchWriter(lambda: client, batch_size=100, flush_interval=60)
+    writer.start()
+    writer.write_records(
+        DatabaseName="db", TableName="table", Records=[record(i) for i in range(5)]
+    )
+    assert client.calls == []
+
+    writer.stop()
+
+    assert len(client.calls) == 1
+    assert len(client.calls[0]["Records"]) == 5
+    assert writer.stats()["written"] == 5
+
+
+def test_records_are_grouped_by_table_in_batches():
+    client = FakeTimestreamClient()
+    writer = TimestreamBatchWriter(lambda: client, batch_size=2)
+    for table in ["a", "b"]:
+        writer.write_records(
+            DatabaseName="db", TableName=table, Records=[record(i) for i in range(3)]
+        )
+
+    writer.flush()
+
+    assert [(call["TableName"], len(call["Records"])) for call in client.calls] == [
+        ("a", 2),
+        ("a", 1),
+        ("b", 2),
+        ("b", 1),
+    ]
+
+
+def test_throttled_writes_are_retried(monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    client = FakeTimestreamClient(errors=["ThrottlingException"])
+    writer = TimestreamBatchWriter(lambda: client)
+    writer.write_records(DatabaseName="db", TableName="table", Records=[record(0)])
+
+    writer.flush()
+
+    assert writer.stats()["written"] == 1
+    assert writer.stats()["failed"] == 0
+
+
+def test_oldest_records_are_dropped_when_full():
+    writer = TimestreamBatchWriter(lambda: None, max_pending=2)
+    writer.write_records(
+        DatabaseName="db", TableName="table", Records=[record(i) for i in range(3)]
+    )
+
+    assert writer.stats()["dropped"] == 1
+    assert [pending[2] for pending in writer.pending] == [record(1), record(2)]
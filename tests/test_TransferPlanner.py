@@ -0,0 +1,55 @@
+"""
+Tests of the transfer plans and the connection budget
+"""
+
+import threading
+
+from s3watcher.TransferPlanner import MB, TransferPlanner
+
+
+def test_small_objects_use_a_single_request():
+    planner = TransferPlanner(connection_budget=8)
+    plan = planner.acquire(1 * MB)
+
+    assert plan.max_concurrency == 1
+    assert not plan.use_threads
+    assert plan.requests == 2
+
+
+def test_large_objects_use_at_most_half_of_the_budget():
+    planner = TransferPlanner(connection_budget=8)
+    plan = planner.acquire(1024 * MB)
+
+    assert plan.max_concurrency == 4
+    assert plan.requests == 1 + 1024 // 8
+
+
+def test_huge_objects_use_larger_parts():
+    planner = TransferPlanner(connection_budget=8)
+    plan = planner.acquire(200000 * MB)
+
+    assert 200000 * MB / plan.multipart_chunksize <= planner.max_parts
+
+
+def test_max_concurrency_caps_the_plan():
+    planner = TransferPlanner(connection_budget=8)
+
+    assert planner.acquire(1024 * MB, max_concurrency=1).max_concurrency == 1
+
+
+def test_budget_is_never_exceeded():
+    planner = TransferPlanner(connection_budget=4)
+    plans = [planner.acquire(1024 * MB), planner.acquire(1024 * MB)]
+    assert planner.in_use == 4
+
+    # The budget is used up, the next transfer waits for a release
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(planner.acquire(1 * MB)))
+    waiter.start()
+    waiter.join(0.3)
+    assert acquired == []
+
+    planner.release(plans[0])
+    waiter.join(5)
+    assert len(acquired) == 1
+    assert planner.in_use == 3
@@ -0,0 +1,86 @@
+"""
+Tests of the visibility leases of in-flight messages
+"""
+
+import time
+
+from s3watcher.SQSHandlerEvent import SQSHandlerEvent
+from s3watcher.VisibilityLeaseManager import VisibilityLeaseManager
+
+
+def receive(aws, visibility_timeout):
+    """
+    Function to send and receive a message, returning its event.
+    """
+    aws.send_event("data/file.bin")
+    message = aws.sqs.receive_message(
+        QueueUrl=aws.queue_url, VisibilityTimeout=visibility_timeout
+    )["Messages"][0]
+    return SQSHandlerEvent.from_sqs_message(message, aws.queue_url)[0]
+
+
+def visible_messages(aws):
+    """
+    Function to receive the visible messages without hiding them again for long.
+    """
+    return aws.sqs.receive_message(
+        QueueUrl=aws.queue_url, MaxNumberOfMessages=10, VisibilityTimeout=1
+    ).get("Messages", [])
+
+
+def test_tracked_leases_are_extended(aws):
+    sqs_event = receive(aws, visibility_timeout=1)
+    leases = VisibilityLeaseManager(
+        lambda: aws.sqs, aws.queue_url, visibility_timeout=1, heartbeat_interval=0.2
+    )
+    leases.track(sqs_event)
+    leases.start()
+    try:
+        # Outlive the original timeout several times over
+        time.sleep(2.5)
+        assert visible_messages(aws) == []
+        assert leases.extended > 0
+    finally:
+        leases.stop()
+
+
+def test_leases_end_with_the_last_event_of_a_message(aws):
+    sqs_event = receive(aws, visibility_timeout=30)
+    leases = VisibilityLeaseManager(lambda: aws.sqs, aws.queue_url)
+    leases.track(sqs_event)
+    leases.track(sqs_event)
+
+    leases.complete(sqs_event)
+    assert sqs_event.receipt_handle in leases.leases
+
+    leases.complete(sqs_event)
+    assert leases.leases == {}
+
+
+def test_release_makes_the_message_visible(aws):
+    sqs_event = receive(aws, visibility_timeout=30)
+    leases = VisibilityLeaseManager(lambda: aws.sqs, aws.queue_url)
+    leases.track(sqs_event)
+
+    leases.release(sqs_event)
+    leases.complete(sqs_event)
+
+    assert leases.leases == {}
+    assert len(visible_messages(aws)) == 1
+
+
+def test_release_keeps_the_lease_of_events_still_in_flight(aws):
+    sqs_event = receive(aws, visibility_timeout=30)
+    leases = VisibilityLeaseManager(lambda: aws.sqs, aws.queue_url)
+    leases.track(sqs_event)
+    leases.track(sqs_event)
+
+    # One event of the message fails while another is still downloading
+    leases.release(sqs_event)
+    leases.complete(sqs_event)
+    assert sqs_event.receipt_handle in leases.leases
+    assert visible_messages(aws) == []
+
+    leases.complete(sqs_event)
+    assert leases.leases == {}
+    assert len(visible_messages(aws)) == 1